@@ -0,0 +1,66 @@
+""" Benchmark (un)packing of single bit values by :mod:`umodbus.bits`.
+
+The functions are compared against the implementation previously used by the
+functions in :mod:`umodbus.functions`. Run it like this::
+
+    $ python -m benchmarks.bench_bits
+
+"""
+from __future__ import print_function
+import struct
+import timeit
+from functools import reduce
+
+from umodbus.bits import pack_bits, unpack_bits
+
+
+def reduce_pack_bits(data):
+    """ Previous implementation of :func:`pack_bits`. """
+    bytes_ = [data[i:i + 8] for i in range(0, len(data), 8)]
+
+    for index, byte in enumerate(bytes_):
+        bytes_[index] = \
+            reduce(lambda a, b: (a << 1) + b, list(reversed(byte)))
+
+    return struct.pack('>' + 'B' * len(bytes_), *bytes_)
+
+
+def format_unpack_bits(data, quantity):
+    """ Previous implementation of :func:`unpack_bits`. """
+    bytes_ = struct.unpack('>' + 'B' * len(data), data)
+    values = list()
+
+    for i, value in enumerate(bytes_):
+        padding = 8 if (quantity - (8 * i)) // 8 > 0 else quantity % 8
+        fmt = '{{0:0{padding}b}}'.format(padding=padding)
+        values = values + [int(i) for i in fmt.format(value)][::-1]
+
+    return values
+
+
+def measure(f, number):
+    """ Return best time in microseconds of a single call of `f`. """
+    return min(timeit.Timer(f).repeat(3, number)) / number * 1e6
+
+
+def main(number=200):
+    print('{0:>8} {1:>10} {2:>12} {3:>10} {4:>12} {5:>14}'.format(
+        'quantity', 'pack (us)', 'before (us)', 'unpack (us)', 'before (us)',
+        'compact (us)'))
+
+    for quantity in [8, 256, 2000]:
+        values = [i % 3 % 2 for i in range(quantity)]
+        data = bytes(pack_bits(values))
+
+        print('{0:>8} {1:>10.1f} {2:>12.1f} {3:>10.1f} {4:>12.1f} '
+              '{5:>14.1f}'.format(
+                  quantity,
+                  measure(lambda: pack_bits(values), number),
+                  measure(lambda: reduce_pack_bits(values), number),
+                  measure(lambda: unpack_bits(data, quantity), number),
+                  measure(lambda: format_unpack_bits(data, quantity), number),
+                  measure(lambda: unpack_bits(data, quantity, True), number)))
+
+
+if __name__ == '__main__':
+    main()
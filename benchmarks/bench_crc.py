@@ -0,0 +1,57 @@
+""" Benchmark CRC calculation of :mod:`umodbus.client.serial.redundancy_check`.
+
+:func:`get_crc` is compared against the byte by byte implementation it
+replaced. Run it like this::
+
+    $ python -m benchmarks.bench_crc
+
+"""
+from __future__ import print_function
+import struct
+import timeit
+
+from umodbus.client.serial.redundancy_check import (get_crc, validate_crc,
+                                                    look_up_table)
+
+
+def bytewise_get_crc(msg):
+    """ Previous implementation of :func:`get_crc`. """
+    register = 0xFFFF
+
+    for byte_ in msg:
+        try:
+            val = struct.unpack('<B', byte_)[0]
+        except TypeError:
+            val = byte_
+
+        register = \
+            (register >> 8) ^ look_up_table[(register ^ val) & 0xFF]
+
+    return struct.pack('<H', register)
+
+
+def measure(f, number):
+    """ Return best time in microseconds of a single call of `f`. """
+    return min(timeit.Timer(f).repeat(3, number)) / number * 1e6
+
+
+def main(number=2000):
+    print('{0:>6} {1:>18} {2:>16} {3:>19} {4:>9}'.format(
+        'bytes', 'bytewise (us)', 'get_crc (us)', 'validate_crc (us)',
+        'speedup'))
+
+    # 8 bytes is a typical request, 256 bytes the largest RTU frame.
+    for size in [8, 64, 256]:
+        msg = bytes(bytearray(i % 256 for i in range(size - 2)))
+        frame = msg + get_crc(msg)
+
+        before = measure(lambda: bytewise_get_crc(msg), number)
+        after = measure(lambda: get_crc(msg), number)
+        validate = measure(lambda: validate_crc(frame), number)
+
+        print('{0:>6} {1:>18.2f} {2:>16.2f} {3:>19.2f} {4:>8.1f}x'.format(
+            size, before, after, validate, before / after))
+
+
+if __name__ == '__main__':
+    main()
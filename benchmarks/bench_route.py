@@ -0,0 +1,75 @@
+""" Benchmark route lookups of :class:`umodbus.route.Map`.
+
+The indexed :meth:`Map.match` is compared against a linear scan over all
+rules, which is how routes used to be matched. Run it like this::
+
+    $ python -m benchmarks.bench_route
+
+"""
+from __future__ import print_function
+import timeit
+
+from umodbus.route import Map
+
+
+class LinearMap(object):
+    """ Map which matches every rule one by one, using `in` on the raw
+    constraints.
+    """
+    def __init__(self):
+        self._rules = []
+
+    def add_rule(self, endpoint, slave_ids, function_codes, addresses):
+        self._rules.append((endpoint, slave_ids, function_codes, addresses))
+
+    def match(self, slave_id, function_code, address):
+        def matches(values, v):
+            return values is None or v in values
+
+        for endpoint, slave_ids, function_codes, addresses in self._rules:
+            if matches(slave_ids, slave_id) and \
+                    matches(function_codes, function_code) and \
+                    matches(addresses, address):
+                return endpoint
+
+
+def endpoint(slave_id, function_code, address):
+    return 0
+
+
+def populate(route_map, number_of_rules):
+    """ Add rules which each cover 100 holding registers of slave 1. """
+    for i in range(number_of_rules):
+        route_map.add_rule(endpoint, [1], [3, 6, 16],
+                           list(range(i * 100, (i + 1) * 100)))
+
+
+def read_125_registers(route_map, starting_address):
+    for address in range(starting_address, starting_address + 125):
+        route_map.match(1, 3, address)
+
+
+def main(number=20):
+    print('{0:>8} {1:>14} {2:>14} {3:>9}'.format(
+        'rules', 'linear (ms)', 'indexed (ms)', 'speedup'))
+
+    for number_of_rules in [10, 100, 300, 600]:
+        # Read the last 125 registers that are covered by a rule.
+        starting_address = number_of_rules * 100 - 125
+        results = []
+
+        for route_map in [LinearMap(), Map()]:
+            populate(route_map, number_of_rules)
+            # Warm up, the index of Map is compiled on first use.
+            read_125_registers(route_map, starting_address)
+
+            timer = timeit.Timer(
+                lambda: read_125_registers(route_map, starting_address))
+            results.append(min(timer.repeat(3, number)) / number * 1000)
+
+        print('{0:>8} {1:>14.3f} {2:>14.3f} {3:>8.0f}x'.format(
+            number_of_rules, results[0], results[1], results[0] / results[1]))
+
+
+if __name__ == '__main__':
+    main()
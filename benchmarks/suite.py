@@ -0,0 +1,387 @@
+""" Benchmark suite covering the hot paths of clients and servers.
+
+It measures:
+
+* creating request ADU's with the client helpers of :mod:`umodbus.client.tcp`,
+* :func:`umodbus.functions.create_function_from_request_pdu`,
+* :meth:`execute` of every function with 1, 10 and 125 addresses,
+* :meth:`create_response_pdu` of every function,
+* :func:`parse_response_adu` of the TCP and RTU clients,
+* :func:`get_crc` and :func:`validate_crc`,
+* round trips of requests over loopback to a Modbus TCP server.
+
+Run it like this::
+
+    $ python -m benchmarks.suite
+
+Results are written as JSON with `--json`. Pass such a file to `--compare`
+to compare results with an earlier run, for example of another commit::
+
+    $ git checkout master
+    $ python -m benchmarks.suite --json master.json
+    $ git checkout feature
+    $ python -m benchmarks.suite --compare master.json
+
+"""
+from __future__ import print_function
+import sys
+import json
+import socket
+import struct
+import timeit
+import platform
+import threading
+import subprocess
+from argparse import ArgumentParser
+try:
+    from socketserver import ThreadingTCPServer
+except ImportError:
+    from SocketServer import ThreadingTCPServer
+
+from umodbus.route import Map
+from umodbus.client import tcp
+from umodbus.client.serial import rtu
+from umodbus.client.serial.redundancy_check import (get_crc, validate_crc,
+                                                    add_crc)
+try:
+    from umodbus.client.serial.redundancy_check import pack_adu
+except ImportError:
+    # Older versions, which the suite can be run against with --compare,
+    # don't have pack_adu().
+    def pack_adu(address, pdu):
+        return add_crc(struct.pack('>B', address) + pdu)
+from umodbus.functions import create_function_from_request_pdu
+from umodbus.server.tcp import RequestHandler, get_server
+
+#: Quantities of addresses requests are measured with.
+QUANTITIES = [1, 10, 125]
+
+
+def read_status(slave_id, function_code, address):
+    return address % 2
+
+
+def read_register(slave_id, function_code, address):
+    return address
+
+
+def write_status(slave_id, function_code, address, value):
+    pass
+
+
+def write_register(slave_id, function_code, address, value):
+    pass
+
+
+def bind_routes(route_map):
+    """ Add routes like those of the system tests, but for 125 addresses. """
+    addresses = list(range(0, 125))
+
+    route_map.add_rule(read_status, [1], [1, 2], addresses)
+    route_map.add_rule(read_register, [1], [3, 4], addresses)
+    route_map.add_rule(write_status, [1], [5, 15], addresses)
+    route_map.add_rule(write_register, [1], [6, 16], addresses)
+
+
+def create_requests(client, quantity):
+    """ Return list with name and request ADU of every function.
+
+    :param client: :mod:`umodbus.client.tcp` or
+        :mod:`umodbus.client.serial.rtu`.
+    :param quantity: Number of addresses of requests, requests with a single
+        address are only returned for a quantity of 1.
+    """
+    requests = [
+        ('read_coils', client.read_coils(1, 0, quantity)),
+        ('read_discrete_inputs', client.read_discrete_inputs(1, 0, quantity)),
+        ('read_holding_registers',
+         client.read_holding_registers(1, 0, quantity)),
+        ('read_input_registers', client.read_input_registers(1, 0, quantity)),
+        ('write_multiple_coils',
+         client.write_multiple_coils(1, 0, [1] * quantity)),
+        ('write_multiple_registers',
+         client.write_multiple_registers(1, 0, list(range(quantity)))),
+    ]
+
+    if quantity == 1:
+        requests += [
+            ('write_single_coil', client.write_single_coil(1, 0, 1)),
+            ('write_single_register',
+             client.write_single_register(1, 0, 1337)),
+        ]
+
+    return requests
+
+
+def create_response_pdu(request_pdu, route_map):
+    function = create_function_from_request_pdu(request_pdu)
+    results = function.execute(1, route_map)
+
+    try:
+        return function.create_response_pdu(results)
+    except TypeError:
+        return function.create_response_pdu()
+
+
+def client_helpers():
+    """ Create request ADU's with the helpers of the TCP client. """
+    yield 'read_coils', lambda: tcp.read_coils(1, 0, 125)
+    yield 'read_discrete_inputs', lambda: tcp.read_discrete_inputs(1, 0, 125)
+    yield ('read_holding_registers',
+           lambda: tcp.read_holding_registers(1, 0, 125))
+    yield ('read_input_registers',
+           lambda: tcp.read_input_registers(1, 0, 125))
+    yield 'write_single_coil', lambda: tcp.write_single_coil(1, 0, 1)
+    yield ('write_single_register',
+           lambda: tcp.write_single_register(1, 0, 1337))
+
+    coils = [1, 0] * 62
+    registers = list(range(125))
+
+    yield ('write_multiple_coils[124]',
+           lambda: tcp.write_multiple_coils(1, 0, coils))
+    yield ('write_multiple_registers[125]',
+           lambda: tcp.write_multiple_registers(1, 0, registers))
+
+
+def decode():
+    """ Create functions from request PDU's. Functions created from read
+    requests are memoized, so those are measured warm.
+    """
+    for name, adu in create_requests(tcp, 1):
+        pdu = adu[7:]
+        yield name, lambda pdu=pdu: create_function_from_request_pdu(pdu)
+
+
+def execute():
+    """ Execute functions against per address routes. """
+    route_map = Map()
+    bind_routes(route_map)
+
+    for quantity in QUANTITIES:
+        for name, adu in create_requests(tcp, quantity):
+            function = create_function_from_request_pdu(adu[7:])
+
+            yield ('{0}[{1}]'.format(name, quantity),
+                   lambda f=function: f.execute(1, route_map))
+
+
+def encode():
+    """ Create response PDU's from results of endpoints. """
+    route_map = Map()
+    bind_routes(route_map)
+
+    for quantity in QUANTITIES:
+        for name, adu in create_requests(tcp, quantity):
+            function = create_function_from_request_pdu(adu[7:])
+
+            if name.startswith('read'):
+                results = function.execute(1, route_map)
+
+                def f(f=function, r=results):
+                    return f.create_response_pdu(r)
+            else:
+                def f(f=function):
+                    return f.create_response_pdu()
+
+            yield '{0}[{1}]'.format(name, quantity), f
+
+
+def parse():
+    """ Parse response ADU's of TCP and RTU servers. """
+    route_map = Map()
+    bind_routes(route_map)
+
+    for quantity in [1, 125]:
+        for name, adu in create_requests(tcp, quantity):
+            resp_pdu = create_response_pdu(adu[7:], route_map)
+            resp_adu = adu[:4] + struct.pack('>HB', len(resp_pdu) + 1, 1) + \
+                resp_pdu
+
+            yield ('tcp.{0}[{1}]'.format(name, quantity),
+                   lambda a=resp_adu, r=adu: tcp.parse_response_adu(a, r))
+
+        for name, adu in create_requests(rtu, quantity):
+            resp_adu = bytes(pack_adu(1, create_response_pdu(adu[1:-2],
+                                                             route_map)))
+
+            yield ('rtu.{0}[{1}]'.format(name, quantity),
+                   lambda a=resp_adu, r=adu: rtu.parse_response_adu(a, r))
+
+
+def crc():
+    """ Calculate and validate CRC's of a small and the largest frame. """
+    for size in [8, 256]:
+        msg = bytes(bytearray(i % 256 for i in range(size - 2)))
+        frame = msg + get_crc(msg)
+
+        yield 'get_crc[{0}]'.format(size), lambda m=msg: get_crc(m)
+        yield 'validate_crc[{0}]'.format(size), lambda f=frame: validate_crc(f)
+
+
+def round_trip():
+    """ Send requests over loopback to a Modbus TCP server and wait for the
+    response.
+    """
+    server = get_server(ThreadingTCPServer, ('localhost', 0), RequestHandler)
+    bind_routes(server.route_map)
+
+    t = threading.Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+
+    sock = socket.create_connection(server.server_address)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    try:
+        for quantity in QUANTITIES:
+            adu = tcp.read_holding_registers(1, 0, quantity)
+            yield ('read_holding_registers[{0}]'.format(quantity),
+                   lambda a=adu: tcp.send_message(a, sock))
+
+        adu = tcp.write_multiple_registers(1, 0, list(range(125)))
+        yield ('write_multiple_registers[125]',
+               lambda: tcp.send_message(adu, sock))
+    finally:
+        sock.close()
+        server.shutdown()
+        server.server_close()
+
+
+#: Groups of benchmarks. Every group is a generator yielding the name and the
+#: callable of a benchmark.
+GROUPS = [
+    ('client', client_helpers),
+    ('decode', decode),
+    ('execute', execute),
+    ('encode', encode),
+    ('parse', parse),
+    ('crc', crc),
+    ('round_trip', round_trip),
+]
+
+
+def measure(f, min_time=0.05, repeat=5):
+    """ Measure duration of a single call of `f`.
+
+    The number of calls per measurement is doubled until a measurement takes
+    at least `min_time` seconds.
+
+    :return: Dict with best and median time in microseconds and the number of
+        calls per measurement.
+    """
+    timer = timeit.Timer(f)
+    number = 1
+
+    while timer.timeit(number) < min_time:
+        number *= 2
+
+    times = sorted(t / number * 1e6 for t in timer.repeat(repeat, number))
+
+    return {
+        'best_us': times[0],
+        'median_us': times[len(times) // 2],
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def get_commit():
+    """ Return hash of checked out git commit, or None. """
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                       stderr=subprocess.STDOUT).decode()\
+            .strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(pattern=None, min_time=0.05, repeat=5, out=sys.stdout):
+    """ Run benchmarks and return results.
+
+    :param pattern: Only run benchmarks of which the full name, like
+        'execute.read_coils[10]', contains this string. Default is None,
+        which runs all benchmarks.
+    :param min_time: Minimal duration of a measurement in seconds.
+    :param repeat: Number of measurements per benchmark.
+    :param out: File to print progress to, or None.
+    :return: List with a dict per benchmark.
+    """
+    results = []
+
+    for group, benchmarks in GROUPS:
+        for name, f in benchmarks():
+            name = '{0}.{1}'.format(group, name)
+
+            if pattern is not None and pattern not in name:
+                continue
+
+            result = measure(f, min_time, repeat)
+            result['name'] = name
+            results.append(result)
+
+            if out is not None:
+                print('{0:<48} {1:>12.2f} us'.format(name, result['best_us']),
+                      file=out)
+
+    return results
+
+
+def compare(results, baseline, out=sys.stdout):
+    """ Print best times of results, those of a baseline and the speedup.
+
+    :param results: List with results.
+    :param baseline: List with results of baseline.
+    """
+    baseline = dict((r['name'], r) for r in baseline)
+
+    print('{0:<48} {1:>12} {2:>12} {3:>8}'.format(
+        'name', 'base (us)', 'now (us)', 'speedup'), file=out)
+
+    for result in results:
+        try:
+            before = baseline[result['name']]['best_us']
+        except KeyError:
+            continue
+
+        print('{0:<48} {1:>12.2f} {2:>12.2f} {3:>7.2f}x'.format(
+            result['name'], before, result['best_us'],
+            before / result['best_us']), file=out)
+
+
+def main(argv=None):
+    parser = ArgumentParser(description='Benchmark uModbus.')
+    parser.add_argument('-k', dest='pattern', default=None,
+                        help='only run benchmarks which contain PATTERN')
+    parser.add_argument('--min-time', type=float, default=0.05,
+                        help='minimal duration of a measurement in seconds')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='number of measurements per benchmark')
+    parser.add_argument('--json', dest='json_path', default=None,
+                        help='write results as JSON to this file')
+    parser.add_argument('--compare', default=None,
+                        help='compare with results in this JSON file')
+    args = parser.parse_args(argv)
+
+    results = run(args.pattern, args.min_time, args.repeat)
+
+    if args.json_path is not None:
+        with open(args.json_path, 'w') as f:
+            json.dump({
+                'commit': get_commit(),
+                'python': platform.python_version(),
+                'implementation': platform.python_implementation(),
+                'platform': platform.platform(),
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+
+        print()
+        compare(results, baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# scripts/examples/prefork_tcp_server.py
+import logging
+from collections import defaultdict
+
+from umodbus import conf
+from umodbus.server.prefork import get_server
+from umodbus.utils import log_to_stream
+
+# Add stream handler to logger 'uModbus'.
+log_to_stream(level=logging.INFO)
+
+# A very simple data store which maps addresses against their values. Every
+# worker has its own copy of it.
+data_store = defaultdict(int)
+
+# Enable values to be signed (default is False).
+conf.SIGNED_VALUES = True
+
+# Fork 4 worker processes which accept connections on the same port.
+app = get_server(('localhost', 502), workers=4)
+
+
+@app.route(slave_ids=[1], function_codes=[3, 4], addresses=list(range(0, 10)))
+def read_data_store(slave_id, function_code, address):
+    """" Return value of address. """
+    return data_store[address]
+
+
+if __name__ == '__main__':
+    try:
+        app.serve_forever()
+    finally:
+        app.shutdown()
+        app.server_close()
+        logging.getLogger('uModbus').info(app.stats())
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# scripts/examples/simple_asyncio_tcp_server.py
+import asyncio
+import logging
+from collections import defaultdict
+
+from umodbus import conf
+from umodbus.server.asyncio_tcp import get_server
+from umodbus.utils import log_to_stream
+
+# Add stream handler to logger 'uModbus'.
+log_to_stream(level=logging.DEBUG)
+
+# A very simple data store which maps addresses against their values.
+data_store = defaultdict(int)
+
+# Enable values to be signed (default is False).
+conf.SIGNED_VALUES = True
+
+app = get_server(('localhost', 502))
+
+
+@app.route(slave_ids=[1], function_codes=[3, 4], addresses=list(range(0, 10)))
+async def read_data_store(slave_id, function_code, address):
+    """" Return value of address. """
+    # Endpoints can await other I/O without blocking other connections.
+    await asyncio.sleep(0)
+    return data_store[address]
+
+
+@app.route(slave_ids=[1], function_codes=[6, 16], addresses=list(range(0, 10)))
+def write_data_store(slave_id, function_code, address, value):
+    """" Set value for address. """
+    data_store[address] = value
+
+
+if __name__ == '__main__':
+    loop = asyncio.get_event_loop()
+
+    try:
+        loop.run_until_complete(app.serve_forever())
+    finally:
+        loop.close()
@@ -2,6 +2,8 @@ import pytest
 
 from umodbus import conf
 from umodbus.client import tcp
+from umodbus.client.planner import ReadPlan
+from umodbus.exceptions import IllegalDataAddressError
 
 
 @pytest.fixture(scope='module', autouse=True)
@@ -73,3 +75,30 @@ def test_response_multi_value_write_request(sock, function, values):
     req_adu = function(slave_id, starting_address, values)
 
     assert tcp.send_message(req_adu, sock) == 2
+
+
+def test_pipelined_requests(sock):
+    """ Validate responses of multiple requests in flight on 1 connection. """
+    conn = tcp.Connection(sock, max_in_flight=2)
+
+    results = conn.send_messages([
+        tcp.read_holding_registers(1, 0, 3),
+        tcp.read_coils(1, 0, 3),
+        tcp.write_single_register(1, 0, 15),
+        tcp.read_input_registers(1, 9, 2),
+    ])
+
+    assert results[:3] == [[0, -1, -2], [0, 1, 0], 15]
+    assert isinstance(results[3], IllegalDataAddressError)
+
+
+def test_read_plan(sock):
+    """ Read scattered addresses with as few requests as possible. """
+    plan = ReadPlan([(1, 3, 0), (1, 3, 2), (1, 3, 9), (1, 1, 3)], max_gap=7)
+
+    assert len(plan.adus) == 2
+
+    responses = [tcp.send_message(adu, sock) for adu in plan.adus]
+
+    assert plan.scatter(responses) == \
+        {(1, 3, 0): 0, (1, 3, 2): -2, (1, 3, 9): -9, (1, 1, 3): 1}
@@ -0,0 +1,200 @@
+import time
+import struct
+import threading
+import pytest
+
+pytest.importorskip('concurrent.futures')
+
+from umodbus.metrics import timer  # NOQA
+from umodbus.exceptions import IllegalDataAddressError  # NOQA
+from umodbus.client.serial import rtu  # NOQA
+from umodbus.client.serial.bus import (BusMaster, HIGH_PRIORITY,  # NOQA
+                                       LOW_PRIORITY)
+from umodbus.client.serial.redundancy_check import add_crc  # NOQA
+
+
+class Bus(object):
+    """ Serial port with slave 1 responding to requests for holding
+    registers. Other slaves are dead.
+    """
+    baudrate = 9600
+
+    def __init__(self):
+        self.timeout = None
+        # Tuples with time and request ADU.
+        self.requests = []
+        # Timeout of serial port while reading a response.
+        self.read_timeouts = []
+        # When set, reading blocks until this event is set.
+        self.block = None
+        # Late response of another slave, received during the next request.
+        self.late_response = b''
+        self._response = b''
+
+    def reset_input_buffer(self):
+        self._response = b''
+
+    def write(self, adu):
+        self.requests.append((timer(), adu))
+        slave_id, function_code, address, quantity = \
+            struct.unpack('>BBHH', adu[:6])
+
+        self._response, self.late_response = self.late_response, b''
+
+        if slave_id != 1:
+            return
+
+        if address > 10:
+            self._response += add_crc(struct.pack('>BBB', slave_id,
+                                                  function_code | 0x80, 2))
+        else:
+            values = range(address, address + quantity)
+            self._response += add_crc(
+                struct.pack('>BBB' + 'H' * quantity, slave_id, function_code,
+                            2 * quantity, *values))
+
+    def flush(self):
+        pass
+
+    def read(self, size):
+        self.read_timeouts.append(self.timeout)
+
+        if self.block is not None:
+            self.block.wait()
+
+        data, self._response = self._response[:size], self._response[size:]
+        return data
+
+
+@pytest.fixture
+def bus():
+    return Bus()
+
+
+@pytest.fixture
+def master(bus):
+    master = BusMaster(bus, timeout=0.2, timeouts={2: 0.01})
+    master.start()
+
+    yield master
+
+    master.close()
+
+
+def test_send_message(master):
+    assert master.send_message(rtu.read_holding_registers(1, 2, 3)) == \
+        [2, 3, 4]
+
+    with pytest.raises(IllegalDataAddressError):
+        master.send_message(rtu.read_holding_registers(1, 99, 1))
+
+
+def test_frames_are_separated_by_gap(bus, master):
+    for _ in range(3):
+        master.send_message(rtu.read_holding_registers(1, 0, 1))
+
+    # 3.5 characters of 11 bits at 9600 baud.
+    assert master.frame_gap == pytest.approx(0.004, abs=0.0001)
+
+    times = [t for t, _ in bus.requests]
+    assert min(b - a for a, b in zip(times, times[1:])) >= master.frame_gap
+
+
+def test_timeout_per_slave(bus, master):
+    with pytest.raises(ValueError):
+        master.send_message(rtu.read_holding_registers(2, 0, 1))
+
+    with pytest.raises(ValueError):
+        master.send_message(rtu.read_holding_registers(3, 0, 1))
+
+    with pytest.raises(ValueError):
+        master.send_message(rtu.read_holding_registers(3, 0, 1), timeout=0.05)
+
+    # Remainder of response is discarded with timeout of 3.5 characters.
+    assert [t for t in bus.read_timeouts if t != master.frame_gap] == \
+        [pytest.approx(t, abs=0.005) for t in [0.01, 0.2, 0.05]]
+
+
+class TricklingBus(Bus):
+    """ Serial port of a slave which sends a byte of its response every
+    30 ms.
+    """
+    def read(self, size):
+        if self.timeout < 0.03:
+            time.sleep(self.timeout)
+            return b''
+
+        time.sleep(0.03)
+        return super(TricklingBus, self).read(1)
+
+
+def test_timeout_applies_to_complete_response():
+    master = BusMaster(TricklingBus(), timeout=0.1)
+    master.start()
+
+    try:
+        start = timer()
+
+        # Response of 7 bytes would take 210 ms.
+        with pytest.raises(ValueError):
+            master.send_message(rtu.read_holding_registers(1, 0, 1))
+
+        assert timer() - start < 0.18
+    finally:
+        master.close()
+
+
+def test_response_of_other_slave_is_discarded(bus, master):
+    bus.late_response = add_crc(struct.pack('>BBBH', 2, 3, 2, 7))
+
+    with pytest.raises(ValueError):
+        master.send_message(rtu.read_holding_registers(1, 0, 1))
+
+    assert master.send_message(rtu.read_holding_registers(1, 0, 1)) == [0]
+
+
+def test_broadcast(bus, master):
+    adu = rtu.write_single_register(0, 1, 1)
+    assert master.send_message(adu) is None
+    assert bus.requests[0][1] == adu
+    assert bus.read_timeouts == []
+
+
+def test_requests_are_sent_by_priority(bus, master):
+    bus.block = threading.Event()
+    first = master.submit(rtu.read_holding_registers(1, 0, 1))
+
+    # Wait until first request is in flight.
+    while not first.running():
+        time.sleep(0.001)
+
+    low = master.submit(rtu.read_holding_registers(1, 1, 1), LOW_PRIORITY)
+    normal = master.submit(rtu.read_holding_registers(1, 2, 1))
+    high = master.submit(rtu.read_holding_registers(1, 3, 1), HIGH_PRIORITY)
+    bus.block.set()
+
+    assert [f.result(timeout=1) for f in [first, low, normal, high]] == \
+        [[0], [1], [2], [3]]
+    assert [adu[3:4] for _, adu in bus.requests] == \
+        [b'\x00', b'\x03', b'\x02', b'\x01']
+
+
+def test_send_messages(master):
+    results = master.send_messages([rtu.read_holding_registers(1, 0, 1),
+                                    rtu.read_holding_registers(2, 0, 1),
+                                    rtu.read_holding_registers(1, 99, 1)])
+
+    assert results[0] == [0]
+    assert isinstance(results[1], ValueError)
+    assert isinstance(results[2], IllegalDataAddressError)
+
+
+def test_close_cancels_queued_requests(bus):
+    master = BusMaster(bus)
+    future = master.submit(rtu.read_holding_registers(1, 0, 1))
+    master.close()
+
+    assert future.cancelled()
+
+    with pytest.raises(RuntimeError):
+        master.submit(rtu.read_holding_registers(1, 0, 1))
@@ -2,6 +2,8 @@ import struct
 import pytest
 
 from umodbus.client.serial.redundancy_check import (get_crc, validate_crc,
+                                                    look_up_table, Crc16,
+                                                    add_crc, pack_adu,
                                                     CRCError)
 
 
@@ -22,3 +24,66 @@ def test_validate_invalid_crc():
     """" Method should raise assertion error. """
     with pytest.raises(CRCError):
         validate_crc(b'\x01\x02\x07')
+
+
+@pytest.mark.parametrize('msg', [
+    b'',
+    b'\x02',
+    b'\x02\x07',
+    b'\x01\x03\x00\x6b\x00\x03',
+    bytes(bytearray(range(256))),
+    bytearray(b'\x01\x03\x00\x6b\x00'),
+])
+def test_get_crc_matches_bytewise_calculation(msg):
+    """ CRC calculated 2 bytes at a time must be equal to CRC calculated byte
+    by byte.
+    """
+    register = 0xFFFF
+    for byte_ in bytearray(msg):
+        register = \
+            (register >> 8) ^ look_up_table[(register ^ byte_) & 0xFF]
+
+    assert get_crc(msg) == struct.pack('<H', register)
+
+
+def test_crc16_incremental():
+    msg = b'\x01\x03\x00\x6b\x00\x03'
+    crc = Crc16()
+
+    # Feed chunks of odd and even size.
+    for chunk in [b'\x01', b'\x03\x00', b'\x6b\x00\x03']:
+        crc.update(chunk)
+
+    assert crc.digest() == get_crc(msg)
+    assert Crc16(msg).digest() == get_crc(msg)
+
+
+def test_crc16_copy():
+    crc = Crc16(b'\x02')
+    other = crc.copy()
+    other.update(b'\x07')
+
+    assert crc.digest() == get_crc(b'\x02')
+    assert other.digest() == get_crc(b'\x02\x07')
+
+
+def test_validate_too_short_message():
+    with pytest.raises(CRCError):
+        validate_crc(b'\x01')
+
+
+def test_pack_adu():
+    pdu = b'\x03\x00\x00\x00\x01'
+    adu = pack_adu(1, pdu)
+
+    assert isinstance(adu, bytearray)
+    assert adu == add_crc(b'\x01' + pdu)
+    validate_crc(adu)
+
+
+def test_16_bit_look_up_table_is_generated_on_first_use(monkeypatch):
+    from umodbus.client.serial import redundancy_check
+
+    monkeypatch.setattr(redundancy_check, 'look_up_table_16', None)
+    assert get_crc(b'\x02\x07') == b'\x41\x12'
+    assert len(redundancy_check.look_up_table_16) == 0x10000
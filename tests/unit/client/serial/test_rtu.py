@@ -1,7 +1,25 @@
+import struct
 import pytest
+from io import BytesIO
 from serial import serial_for_url
 
-from umodbus.client.serial.rtu import send_message, read_coils
+from umodbus.exceptions import IllegalDataAddressError
+from umodbus.client.serial.redundancy_check import add_crc
+from umodbus.client.serial.rtu import (send_message, read_coils,
+                                       read_holding_registers, RequestADU,
+                                       get_expected_response_size,
+                                       recv_response_adu, parse_response_adu)
+
+
+class RecordingReader(object):
+    """ Read from a buffer and record sizes of all reads. """
+    def __init__(self, data):
+        self.buffer = BytesIO(data)
+        self.reads = []
+
+    def read(self, size):
+        self.reads.append(size)
+        return self.buffer.read(size)
 
 
 def test_send_message_with_timeout():
@@ -15,3 +33,39 @@ def test_send_message_with_timeout():
 
     with pytest.raises(ValueError):
         send_message(message, s)
+
+
+def test_request_adu_knows_expected_response_size():
+    adu = read_holding_registers(slave_id=1, starting_address=0, quantity=3)
+
+    assert isinstance(adu, RequestADU)
+    # Address field, function code, byte count, 3 registers and CRC.
+    assert adu.expected_response_size == 11
+    assert get_expected_response_size(adu) == 11
+    assert get_expected_response_size(bytes(adu)) == 11
+
+
+def test_recv_response_adu():
+    """ Response is read with 2 reads: the header and the remainder. """
+    req_adu = read_holding_registers(slave_id=1, starting_address=0,
+                                     quantity=3)
+    resp_adu = add_crc(struct.pack('>BBBHHH', 1, 3, 6, 1, 2, 3))
+    reader = RecordingReader(resp_adu)
+
+    assert recv_response_adu(reader.read, 11) == resp_adu
+    assert reader.reads == [2, 9]
+    assert parse_response_adu(resp_adu, req_adu) == [1, 2, 3]
+
+
+def test_recv_response_adu_with_exception_response():
+    """ Exception response is shorter than a normal response. Only its size
+    is read.
+    """
+    resp_adu = add_crc(struct.pack('>BBB', 1, 0x83, 2))
+    reader = RecordingReader(resp_adu)
+
+    assert recv_response_adu(reader.read, 11) == resp_adu
+    assert reader.reads == [2, 3]
+
+    with pytest.raises(IllegalDataAddressError):
+        parse_response_adu(resp_adu)
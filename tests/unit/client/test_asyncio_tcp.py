@@ -0,0 +1,103 @@
+import asyncio
+import pytest
+
+from umodbus.client import tcp
+from umodbus.client.asyncio_tcp import connect
+from umodbus.exceptions import IllegalDataAddressError
+from umodbus.server.asyncio_tcp import get_server
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def server():
+    server = get_server(('localhost', 0))
+
+    @server.route(slave_ids=[1], function_codes=[3], addresses=range(0, 10))
+    async def read_register(slave_id, function_code, address):
+        # Make responses on requests for lower addresses take longer.
+        await asyncio.sleep((10 - address) * 0.001)
+        return address
+
+    @server.route(slave_ids=[1], function_codes=[3], addresses=[99])
+    async def read_slow_register(slave_id, function_code, address):
+        await asyncio.sleep(0.05)
+        return address
+
+    return server
+
+
+def run(loop, server, test):
+    """ Start server, connect client and run coroutine function `test`. """
+    async def main():
+        await server.start()
+        host, port = server.sockets[0].getsockname()[:2]
+        client = await connect(host, port, timeout=1)
+
+        try:
+            return await test(client)
+        finally:
+            client.close()
+            await client.wait_closed()
+            await server.server_close()
+
+    return loop.run_until_complete(main())
+
+
+def test_send(loop, server):
+    async def test(client):
+        return await client.send(tcp.read_holding_registers(1, 0, 3))
+
+    assert run(loop, server, test) == [0, 1, 2]
+
+
+def test_concurrent_requests_share_connection(loop, server):
+    """ The asyncio server handles requests of a connection one by one, but
+    the client doesn't need to wait for a response before sending the next
+    request.
+    """
+    async def test(client):
+        return await asyncio.gather(*[
+            client.send(tcp.read_holding_registers(1, address, 1))
+            for address in range(10)])
+
+    assert run(loop, server, test) == [[address] for address in range(10)]
+
+
+def test_send_raising_modbus_error(loop, server):
+    async def test(client):
+        await client.send(tcp.read_holding_registers(1, 50, 1))
+
+    with pytest.raises(IllegalDataAddressError):
+        run(loop, server, test)
+
+
+def test_send_with_timeout(loop, server):
+    async def test(client):
+        with pytest.raises(asyncio.TimeoutError):
+            await client.send(tcp.read_holding_registers(1, 99, 1),
+                              timeout=0.01)
+
+        # Late response on 1st request doesn't interfere with next request.
+        return await client.send(tcp.read_holding_registers(1, 9, 1))
+
+    assert run(loop, server, test) == [9]
+
+
+def test_close_fails_pending_requests(loop, server):
+    async def test(client):
+        pending = asyncio.ensure_future(
+            client.send(tcp.read_holding_registers(1, 99, 1)))
+        await asyncio.sleep(0.01)
+
+        client.close()
+
+        with pytest.raises(ConnectionError):
+            await pending
+
+    run(loop, server, test)
@@ -0,0 +1,76 @@
+import pytest
+
+from umodbus.client import tcp
+from umodbus.client.serial import rtu
+from umodbus.client.planner import Span, ReadPlan, plan_spans
+from umodbus.exceptions import IllegalDataAddressError
+
+
+def test_plan_spans_without_gap():
+    tags = [(1, 3, 0), (1, 3, 1), (1, 3, 3), (1, 3, 1)]
+
+    assert plan_spans(tags) == [Span(1, 3, 0, 2), Span(1, 3, 3, 1)]
+
+
+def test_plan_spans_with_gap():
+    tags = [(1, 3, 0), (1, 3, 2), (1, 3, 9), (1, 3, 120)]
+
+    assert plan_spans(tags, max_gap=6) == \
+        [Span(1, 3, 0, 10), Span(1, 3, 120, 1)]
+    assert plan_spans(tags, max_gap=200) == [Span(1, 3, 0, 121)]
+
+
+def test_plan_spans_groups_by_slave_id_and_function_code():
+    tags = [(2, 3, 0), (1, 4, 1), (1, 3, 1), (1, 3, 0)]
+
+    assert plan_spans(tags) == \
+        [Span(1, 3, 0, 2), Span(1, 4, 1, 1), Span(2, 3, 0, 1)]
+
+
+@pytest.mark.parametrize('function_code, max_quantity', [
+    (1, 2000),
+    (2, 2000),
+    (3, 125),
+    (4, 125),
+])
+def test_plan_spans_respects_maximum_quantity(function_code, max_quantity):
+    tags = [(1, function_code, address)
+            for address in range(0, max_quantity + 1)]
+
+    assert plan_spans(tags) == [Span(1, function_code, 0, max_quantity),
+                                Span(1, function_code, max_quantity, 1)]
+
+
+def test_plan_spans_with_invalid_function_code():
+    with pytest.raises(ValueError):
+        plan_spans([(1, 5, 0)])
+
+
+@pytest.mark.parametrize('client', [tcp, rtu])
+def test_read_plan_adus(client):
+    plan = ReadPlan([(1, 1, 4), (1, 1, 6)], max_gap=1, client=client)
+
+    assert len(plan.adus) == 1
+    assert plan.adus[0][-5 if client is tcp else -7:][:5] == \
+        b'\x01\x00\x04\x00\x03'
+
+
+def test_read_plan_scatter():
+    plan = ReadPlan([(1, 3, 5), (1, 3, 7), (1, 1, 0)], max_gap=1)
+
+    assert plan.scatter([[0], [50, 60, 70]]) == \
+        {(1, 3, 5): 50, (1, 3, 7): 70, (1, 1, 0): 0}
+
+
+def test_read_plan_scatter_with_error():
+    plan = ReadPlan([(1, 3, 5), (1, 4, 7)])
+    error = IllegalDataAddressError()
+
+    assert plan.scatter([[1], error]) == {(1, 3, 5): 1, (1, 4, 7): error}
+
+
+def test_read_plan_scatter_with_wrong_number_of_responses():
+    plan = ReadPlan([(1, 3, 5)])
+
+    with pytest.raises(ValueError):
+        plan.scatter([])
@@ -0,0 +1,206 @@
+import os
+import sys
+import time
+import socket
+import threading
+import pytest
+try:
+    from socketserver import ThreadingTCPServer
+except ImportError:
+    from SocketServer import ThreadingTCPServer
+
+from umodbus.client import tcp
+from umodbus.client.pool import ConnectionPool, PoolClosedError
+from umodbus.exceptions import IllegalDataAddressError
+from umodbus.server.tcp import RequestHandler, get_server
+
+
+class CountingRequestHandler(RequestHandler):
+    """ Request handler which counts connections. It closes a connection
+    without responding to the request if the server's `drop` is set.
+    """
+    def setup(self):
+        self.server.connections += 1
+        RequestHandler.setup(self)
+
+    def process(self, request_adu):
+        if self.server.drop.is_set():
+            self.server.drop.clear()
+            raise ValueError
+
+        return RequestHandler.process(self, request_adu)
+
+    def handle(self):
+        try:
+            RequestHandler.handle(self)
+        except ValueError:
+            pass
+
+
+@pytest.fixture
+def server():
+    server = get_server(ThreadingTCPServer, ('localhost', 0),
+                        CountingRequestHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.drop = threading.Event()
+
+    @server.route(slave_ids=[1], function_codes=[3], addresses=[0])
+    def read_register(slave_id, function_code, address):
+        return 1337
+
+    t = threading.Thread(target=server.serve_forever,
+                         kwargs={'poll_interval': 0.01})
+    t.daemon = True
+    t.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pool():
+    pool = ConnectionPool(max_size=2, idle_timeout=60, timeout=1)
+
+    yield pool
+
+    pool.close()
+
+
+def test_pool_reuses_connection(server, pool):
+    for _ in range(5):
+        assert pool.send_message(server.server_address,
+                                 tcp.read_holding_registers(1, 0, 1)) == [1337]
+
+    assert server.connections == 1
+
+
+def test_pool_keeps_connection_after_exception_response(server, pool):
+    with pytest.raises(IllegalDataAddressError):
+        pool.send_message(server.server_address,
+                          tcp.read_holding_registers(1, 1, 1))
+
+    pool.send_message(server.server_address,
+                      tcp.read_holding_registers(1, 0, 1))
+
+    assert server.connections == 1
+
+
+def test_pool_reconnects_when_connection_is_dropped(server, pool):
+    pool.send_message(server.server_address,
+                      tcp.read_holding_registers(1, 0, 1))
+
+    # The server closes the connection when it receives the next request.
+    server.drop.set()
+
+    assert pool.send_message(server.server_address,
+                             tcp.read_holding_registers(1, 0, 1)) == [1337]
+    assert server.connections == 2
+
+
+def test_pool_without_retries(server, pool):
+    server.drop.set()
+
+    with pytest.raises(ValueError):
+        pool.send_message(server.server_address,
+                          tcp.read_holding_registers(1, 0, 1), retries=0)
+
+
+def test_pool_discards_idle_connection_closed_by_server(server, pool):
+    sock = pool.acquire(server.server_address)
+    sock.shutdown(socket.SHUT_WR)
+    # Wait until server has closed its side of the connection.
+    assert sock.recv(1) == b''
+    pool.release(server.server_address, sock)
+
+    assert pool.send_message(server.server_address,
+                             tcp.read_holding_registers(1, 0, 1)) == [1337]
+    assert server.connections == 2
+
+
+def test_pool_closes_expired_connections(server, pool):
+    pool.idle_timeout = 0.05
+
+    pool.send_message(server.server_address,
+                      tcp.read_holding_registers(1, 0, 1))
+    time.sleep(0.1)
+    pool.send_message(server.server_address,
+                      tcp.read_holding_registers(1, 0, 1))
+
+    assert server.connections == 2
+
+
+def test_pool_serializes_use_of_connections(server, pool):
+    socks = [pool.acquire(server.server_address) for _ in range(2)]
+    assert socks[0] is not socks[1]
+
+    # Both connections are in use.
+    with pytest.raises(socket.timeout):
+        pool.acquire(server.server_address)
+
+    threading.Timer(0.1, pool.release,
+                    args=(server.server_address, socks[0])).start()
+
+    assert pool.acquire(server.server_address) is socks[0]
+
+
+def test_pool_without_timeout_waits_for_connection(server):
+    pool = ConnectionPool(max_size=1, timeout=None)
+
+    try:
+        sock = pool.acquire(server.server_address)
+        threading.Timer(0.1, pool.release,
+                        args=(server.server_address, sock)).start()
+
+        assert pool.acquire(server.server_address) is sock
+    finally:
+        pool.close()
+
+
+def test_pool_connection_discards_socket_on_error(server, pool):
+    with pytest.raises(RuntimeError):
+        with pool.connection(server.server_address) as sock:
+            raise RuntimeError
+
+    assert sock.fileno() == -1
+
+    with pool.connection(server.server_address) as other:
+        assert other is not sock
+
+
+def test_pool_close(server, pool):
+    sock = pool.acquire(server.server_address)
+    pool.close()
+
+    with pytest.raises(PoolClosedError):
+        pool.acquire(server.server_address)
+
+    with pytest.raises(PoolClosedError):
+        pool.send_message(server.server_address,
+                          tcp.read_holding_registers(1, 0, 1))
+
+    pool.release(server.server_address, sock)
+    assert sock.fileno() == -1
+
+
+@pytest.mark.skipif(sys.version_info < (3, 0),
+                    reason='Requires socket.socket(fileno=...).')
+def test_pool_reuses_connection_with_large_file_descriptor(server, pool):
+    """ select() can't handle file descriptors of FD_SETSIZE (1024) and
+    larger, which processes with many connections have.
+    """
+    resource = pytest.importorskip('resource')
+
+    if resource.getrlimit(resource.RLIMIT_NOFILE)[0] <= 2000:
+        pytest.skip('Limit of file descriptors is too low.')
+
+    sock = pool.acquire(server.server_address)
+    os.dup2(sock.fileno(), 2000)
+    sock.close()
+
+    sock = socket.socket(fileno=2000)
+    pool.release(server.server_address, sock)
+
+    assert pool.acquire(server.server_address) is sock
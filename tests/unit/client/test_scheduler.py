@@ -0,0 +1,242 @@
+import socket
+import threading
+import pytest
+try:
+    from queue import Queue
+    from socketserver import ThreadingTCPServer
+except ImportError:
+    from Queue import Queue
+    from SocketServer import ThreadingTCPServer
+
+from umodbus.client import tcp
+from umodbus.client.scheduler import PollScheduler
+from umodbus.exceptions import IllegalDataAddressError
+from umodbus.server.tcp import RequestHandler, get_server
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingConnection(object):
+    """ Connection which records batches and returns ADU's as results. """
+    def __init__(self):
+        self.batches = []
+
+    def send_messages(self, adus):
+        self.batches.append(adus)
+        return list(adus)
+
+
+@pytest.fixture
+def tcp_server():
+    server = get_server(ThreadingTCPServer, ('localhost', 0), RequestHandler)
+    server.daemon_threads = True
+
+    @server.route(slave_ids=[1], function_codes=[3], addresses=[0, 1])
+    def read_register(slave_id, function_code, address):
+        return address
+
+    t = threading.Thread(target=server.serve_forever,
+                         kwargs={'poll_interval': 0.01})
+    t.daemon = True
+    t.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def connection():
+    return RecordingConnection()
+
+
+@pytest.fixture
+def scheduler(clock, connection):
+    scheduler = PollScheduler(window=0.01, clock=clock)
+    scheduler.add_device('plc', connection)
+
+    return scheduler
+
+
+def test_scheduler_batches_polls_which_are_due_together(clock, connection,
+                                                         scheduler):
+    scheduler.add_poll('plc', b'fast', 0.1)
+    scheduler.add_poll('plc', b'slow', 1)
+    scheduler.add_poll('plc', b'later', 1, offset=0.105)
+
+    assert scheduler.run_pending() == pytest.approx(0.1)
+    assert connection.batches == [[b'fast', b'slow']]
+
+    # Within window of first poll.
+    clock.now = 0.1
+    scheduler.run_pending()
+    assert connection.batches[1] == [b'fast', b'later']
+
+    clock.now = 0.15
+    scheduler.run_pending()
+    assert len(connection.batches) == 2
+
+
+def test_scheduler_skips_periods_which_passed(clock, connection, scheduler):
+    poll = scheduler.add_poll('plc', b'fast', 0.1)
+    scheduler.run_pending()
+
+    clock.now = 0.35
+    scheduler.run_pending()
+
+    # Periods at 0.1 and 0.2 have been missed, request due at 0.3 is sent
+    # once.
+    assert connection.batches == [[b'fast'], [b'fast']]
+    assert poll.count == 2
+    assert poll.overruns == 2
+    assert poll.due == pytest.approx(0.4)
+    assert poll.max_jitter == pytest.approx(0.05)
+    assert poll.mean_jitter == pytest.approx(0.025)
+
+
+def test_scheduler_skips_period_while_device_is_busy(clock, connection):
+    submitted = []
+
+    class Executor(object):
+        def submit(self, fn, *args):
+            submitted.append((fn, args))
+
+    scheduler = PollScheduler(executor=Executor(), clock=clock)
+    scheduler.add_device('plc', connection)
+    poll = scheduler.add_poll('plc', b'fast', 0.1)
+
+    scheduler.run_pending()
+    clock.now = 0.1
+    scheduler.run_pending()
+
+    assert len(submitted) == 1
+    assert poll.overruns == 1
+
+    fn, args = submitted.pop()
+    fn(*args)
+    clock.now = 0.2
+    scheduler.run_pending()
+
+    assert len(submitted) == 1
+
+
+def test_scheduler_delivers_results(connection, scheduler):
+    class FailingConnection(object):
+        def send_messages(self, adus):
+            raise socket.timeout()
+
+    queue = Queue()
+    results = []
+
+    scheduler.queue = queue
+    scheduler.add_device('dead', FailingConnection())
+
+    ok = scheduler.add_poll('plc', b'ok', 1,
+                            callback=lambda *args: results.append(args))
+    dead = scheduler.add_poll('dead', b'dead', 1)
+    scheduler.run_pending()
+
+    assert results == [(ok, b'ok')]
+    assert queue.get_nowait() == (ok, b'ok')
+
+    poll, result = queue.get_nowait()
+    assert poll is dead
+    assert isinstance(result, socket.timeout)
+    assert dead.errors == 1
+
+
+def test_scheduler_remove_poll(connection, scheduler):
+    poll = scheduler.add_poll('plc', b'fast', 0.1)
+    scheduler.remove_poll(poll)
+
+    assert scheduler.run_pending() is None
+    assert connection.batches == []
+
+
+def test_scheduler_add_poll_with_unknown_device(scheduler):
+    with pytest.raises(ValueError):
+        scheduler.add_poll('unknown', b'', 1)
+
+
+def test_scheduler_polls_server(tcp_server):
+    sock = socket.create_connection(tcp_server.server_address, timeout=1)
+    queue = Queue()
+
+    scheduler = PollScheduler(queue=queue)
+    scheduler.add_device('server', tcp.Connection(sock, max_in_flight=2))
+    scheduler.add_poll('server', tcp.read_holding_registers(1, 0, 2), 0.01)
+    scheduler.add_poll('server', tcp.read_holding_registers(1, 9999, 1), 0.01)
+
+    t = threading.Thread(target=scheduler.run)
+    t.start()
+
+    try:
+        results = [queue.get(timeout=1)[1] for _ in range(4)]
+    finally:
+        scheduler.stop()
+        t.join()
+        sock.close()
+
+    assert results[0] == results[2] == [0, 1]
+    assert isinstance(results[1], IllegalDataAddressError)
+
+
+def test_scheduler_reconnects_broken_connection(clock):
+    connections = []
+
+    class BreakingConnection(RecordingConnection):
+        broken = False
+
+        def send_messages(self, adus):
+            self.broken = True
+            raise socket.timeout()
+
+    def connect():
+        connections.append(BreakingConnection())
+        return connections[-1]
+
+    scheduler = PollScheduler(clock=clock)
+    scheduler.add_device('plc', connect)
+    poll = scheduler.add_poll('plc', b'fast', 0.1)
+
+    assert connections == []
+
+    scheduler.run_pending()
+    clock.now = 0.1
+    scheduler.run_pending()
+
+    assert len(connections) == 2
+    assert poll.errors == 2
+
+
+def test_scheduler_with_executor_which_has_been_shut_down(clock, connection):
+    class Executor(object):
+        def submit(self, fn, *args):
+            raise RuntimeError('Executor has been shut down.')
+
+    results = []
+
+    scheduler = PollScheduler(executor=Executor(), clock=clock)
+    scheduler.add_device('plc', connection)
+    scheduler.add_poll('plc', b'fast', 0.1,
+                       callback=lambda poll, result: results.append(result))
+
+    scheduler.run_pending()
+    clock.now = 0.1
+    scheduler.run_pending()
+
+    # Device isn't busy, so no period is skipped.
+    assert len(results) == 2
+    assert all(isinstance(r, RuntimeError) for r in results)
@@ -1,6 +1,11 @@
+import socket
 import struct
+import pytest
 
-from umodbus.client.tcp import _create_request_adu, _create_mbap_header
+from umodbus.utils import recv_exactly
+from umodbus.client.tcp import (_create_request_adu, _create_mbap_header,
+                                read_holding_registers, Connection,
+                                ConnectionBrokenError)
 
 
 def test_create_request_adu():
@@ -36,3 +41,94 @@ def validate_mbap_fields(mbap, slave_id, pdu):
     assert protocol_id == 0
     assert length == len(pdu) + 1
     assert unit_id == slave_id
+
+
+@pytest.fixture
+def socket_pair():
+    client, server = socket.socketpair()
+    client.settimeout(1)
+    server.settimeout(1)
+
+    yield client, server
+
+    client.close()
+    server.close()
+
+
+def respond(sock, req_adu, values):
+    """ Send response ADU for read holding registers request. """
+    transaction_id, _, _, unit_id = struct.unpack('>HHHB', req_adu[:7])
+    pdu = struct.pack('>BB' + 'H' * len(values), 3, len(values) * 2, *values)
+
+    sock.sendall(struct.pack('>HHHB', transaction_id, 0, len(pdu) + 1,
+                             unit_id) + pdu)
+
+
+def test_connection_matches_responses_by_transaction_id(socket_pair):
+    client, server = socket_pair
+    conn = Connection(client, max_in_flight=3)
+
+    transaction_ids = [conn.send(read_holding_registers(1, i, 1))
+                       for i in range(3)]
+    assert transaction_ids == [1, 2, 3]
+    assert conn.in_flight == 3
+
+    requests = [recv_exactly(server.recv, 12) for _ in range(3)]
+
+    # Respond in reverse order.
+    for req_adu in reversed(requests):
+        respond(server, req_adu, [struct.unpack('>H', req_adu[8:10])[0]])
+
+    assert conn.receive(transaction_ids[1]) == [1]
+    assert conn.receive(transaction_ids[0]) == [0]
+    assert conn.receive(transaction_ids[2]) == [2]
+    assert conn.in_flight == 0
+
+    with pytest.raises(KeyError):
+        conn.receive(transaction_ids[0])
+
+
+def test_connection_limits_requests_in_flight(socket_pair):
+    client, server = socket_pair
+    conn = Connection(client, max_in_flight=1)
+
+    conn.send(read_holding_registers(1, 0, 1))
+    respond(server, recv_exactly(server.recv, 12), [5])
+
+    # Sending 2nd request requires response on 1st request to be read.
+    conn.send(read_holding_registers(1, 0, 1))
+    assert conn.in_flight == 1
+    assert conn.receive(1) == [5]
+
+
+def test_connection_transaction_id_wraps_around(socket_pair):
+    client, _ = socket_pair
+    conn = Connection(client)
+    conn._transaction_id = 0xFFFF
+
+    assert conn.send(read_holding_registers(1, 0, 1)) == 0
+
+
+def test_connection_with_invalid_max_in_flight(socket_pair):
+    with pytest.raises(ValueError):
+        Connection(socket_pair[0], max_in_flight=0)
+
+
+def test_connection_breaks_on_timeout(socket_pair):
+    client, server = socket_pair
+    client.settimeout(0.01)
+    conn = Connection(client)
+
+    transaction_id = conn.send(read_holding_registers(1, 0, 1))
+    # Server sends only part of the response.
+    server.sendall(struct.pack('>HHH', transaction_id, 0, 5))
+
+    with pytest.raises(socket.timeout):
+        conn.receive(transaction_id)
+
+    assert conn.broken
+    assert conn.in_flight == 0
+    assert client.fileno() == -1
+
+    with pytest.raises(ConnectionBrokenError):
+        conn.send_messages([read_holding_registers(1, 0, 1)])
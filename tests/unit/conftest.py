@@ -1,8 +1,20 @@
+import sys
 import pytest
 
 from umodbus import conf
 from umodbus.config import Config
 
+collect_ignore = []
+
+if sys.version_info < (3, 3):
+    # memoryview.cast() has been added in Python 3.3.
+    collect_ignore.append('server/test_prefork.py')
+
+if sys.version_info < (3, 5):
+    # These modules use async/await syntax.
+    collect_ignore.append('client/test_asyncio_tcp.py')
+    collect_ignore.append('server/test_asyncio_tcp.py')
+
 
 @pytest.fixture(scope='module', autouse=True)
 def enable_signed_values(request):
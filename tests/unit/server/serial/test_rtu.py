@@ -1,6 +1,18 @@
+import time
+import logging
+import threading
 import pytest
 from serial import Serial, serial_for_url
-from umodbus.server.serial.rtu import RTUServer, get_char_size
+try:
+    from queue import Queue, Empty
+except ImportError:
+    from Queue import Queue, Empty
+
+from umodbus.client.serial import rtu
+from umodbus.client.serial.redundancy_check import CRCError
+from umodbus.server.serial import get_server
+from umodbus.server.serial.rtu import (RTUServer, get_char_size,
+                                       get_request_adu_size)
 
 
 @pytest.fixture
@@ -34,3 +46,255 @@ def test_rtu_server_send_empty_message(rtu_server):
 
     with pytest.raises(ValueError):
         rtu_server.serve_once()
+
+
+@pytest.mark.parametrize('request_adu, size', [
+    (b'\x01\x01', 8),
+    (b'\x01\x06', 8),
+    (b'\x01\x0f', 7),
+    (b'\x01\x10\x00\x00\x00\x01', 7),
+    (b'\x01\x10\x00\x00\x00\x01\x02', 11),
+    (b'\x01\x0f\x00\x00\x00\x10\x02', 11),
+    (b'\x01\x10\x00\x00\x00\x7f\xfe', 256),
+    (b'\x01\x63', None),
+])
+def test_get_request_adu_size(request_adu, size):
+    assert get_request_adu_size(request_adu) == size
+
+
+@pytest.fixture
+def rtu_server_with_route():
+    server = get_server(RTUServer, serial_for_url('loop://'))
+
+    @server.route(slave_ids=[1], function_codes=[3, 16], addresses=[0, 1])
+    def endpoint(slave_id, function_code, address, value=None):
+        return address
+
+    return server
+
+
+def test_rtu_server_serves_request_without_waiting_for_timeout(
+        rtu_server_with_route):
+    """ Requests are handled as soon as all their bytes have been received,
+    even if another request follows immediately.
+    """
+    server = rtu_server_with_route
+    server.serial_port.timeout = 5
+
+    requests = [
+        rtu.read_holding_registers(1, 0, 2),
+        rtu.write_multiple_registers(1, 0, [1, 2]),
+    ]
+    server.serial_port.write(b''.join(requests))
+
+    start = time.time()
+    server.serve_once()
+    server.serve_once()
+    assert time.time() - start < 1
+
+    # The loop device echoes responses back, behind the requests.
+    responses = server.serial_port.read(server.serial_port.in_waiting)
+    assert rtu.parse_response_adu(responses[:9], requests[0]) == [0, 1]
+    assert rtu.parse_response_adu(responses[9:], requests[1]) == 2
+
+
+def test_rtu_server_resynchronizes_after_crc_error(rtu_server_with_route):
+    server = rtu_server_with_route
+
+    # First bytes of a previous frame, followed by a full request.
+    server.serial_port.write(b'\x03\x00' + rtu.read_holding_registers(1, 0, 2))
+
+    with pytest.raises(CRCError):
+        server.serve_once()
+
+    assert server.serial_port.in_waiting == 0
+
+    request = rtu.read_holding_registers(1, 0, 2)
+    server.serial_port.write(request)
+    server.serve_once()
+
+    response = server.serial_port.read(server.serial_port.in_waiting)
+    assert rtu.parse_response_adu(response, request) == [0, 1]
+
+
+class Line(object):
+    """ Serial port which receives the data passed to :meth:`send` and puts
+    the data written to it on :attr:`written`. Like :class:`serial.Serial`,
+    reading blocks until enough bytes have been received or the port times
+    out.
+    """
+    baudrate = 9600
+
+    def __init__(self):
+        self.timeout = None
+        self.inter_byte_timeout = None
+        self.written = Queue()
+        self._incoming = Queue()
+        self._buffer = b''
+
+    def send(self, data):
+        self._incoming.put(data)
+
+    def read(self, size):
+        deadline = time.time() + self.timeout
+
+        while len(self._buffer) < size:
+            try:
+                self._buffer += self._incoming.get(
+                    timeout=max(deadline - time.time(), 0))
+            except Empty:
+                break
+
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def write(self, data):
+        self.written.put(bytes(data))
+
+
+def test_rtu_server_resynchronizes_within_inter_frame_delay():
+    """ serve_forever() sets the timeout of the serial port to the poll
+    interval. Resynchronizing only waits for the inter-frame delay, so a
+    request which follows a corrupt frame shortly after is served.
+    """
+    server = get_server(RTUServer, Line())
+
+    @server.route(slave_ids=[1], function_codes=[3], addresses=[0])
+    def endpoint(slave_id, function_code, address):
+        return 1337
+
+    t = threading.Thread(target=server.serve_forever,
+                         kwargs={'poll_interval': 0.5})
+    t.start()
+
+    try:
+        server.serial_port.send(b'\x01\x03' + b'\x00' * 10)
+        time.sleep(0.05)
+
+        request = rtu.read_holding_registers(1, 0, 1)
+        server.serial_port.send(request)
+
+        response = server.serial_port.written.get(timeout=2)
+        assert rtu.parse_response_adu(response, request) == [1337]
+        assert server.serial_port.timeout == 0.5
+    finally:
+        server.shutdown()
+        t.join()
+
+
+def test_rtu_server_handles_requests_on_executor():
+    """ A request for a unit which blocks doesn't stall a request for another
+    unit on the same serial line.
+    """
+    futures = pytest.importorskip('concurrent.futures')
+
+    event = threading.Event()
+    executor = futures.ThreadPoolExecutor(max_workers=2)
+    server = get_server(RTUServer, serial_for_url('loop://'), executor)
+    server.serial_port.timeout = 5
+
+    @server.route(slave_ids=[1], function_codes=[3], addresses=[0])
+    def slow_endpoint(slave_id, function_code, address):
+        return int(event.wait(5))
+
+    @server.route(slave_ids=[2], function_codes=[3], addresses=[0])
+    def endpoint(slave_id, function_code, address):
+        return 2
+
+    requests = [
+        rtu.read_holding_registers(1, 0, 1),
+        rtu.read_holding_registers(2, 0, 1),
+    ]
+    server.serial_port.write(b''.join(requests))
+
+    try:
+        server.serve_once()
+        server.serve_once()
+
+        # The loop device echoes responses back.
+        assert rtu.parse_response_adu(server.serial_port.read(7),
+                                      requests[1]) == [2]
+
+        event.set()
+
+        assert rtu.parse_response_adu(server.serial_port.read(7),
+                                      requests[0]) == [1]
+    finally:
+        event.set()
+        server.executor.shutdown()
+
+
+def test_rtu_server_shuts_down_executor():
+    futures = pytest.importorskip('concurrent.futures')
+
+    executor = futures.ThreadPoolExecutor(max_workers=1)
+    server = get_server(RTUServer, Line(), executor)
+
+    @server.route(slave_ids=[1], function_codes=[3], addresses=[0])
+    def endpoint(slave_id, function_code, address):
+        return 1337
+
+    t = threading.Thread(target=server.serve_forever,
+                         kwargs={'poll_interval': 0.01})
+    t.start()
+
+    request = rtu.read_holding_registers(1, 0, 1)
+    server.serial_port.send(request)
+    response = server.serial_port.written.get(timeout=2)
+    assert rtu.parse_response_adu(response, request) == [1337]
+
+    server.shutdown()
+    t.join()
+
+    with pytest.raises(RuntimeError):
+        executor.submit(int)
+
+
+def test_rtu_server_with_metrics(rtu_server_with_route):
+    from umodbus.metrics import Metrics
+
+    server = rtu_server_with_route
+    server.metrics = Metrics()
+
+    server.serial_port.write(rtu.read_holding_registers(1, 0, 2))
+    server.serve_once()
+
+    assert server.metrics.as_dict()[1][3]['requests'] == 1
+    assert server.metrics.as_dict()[1][3]['bytes_in'] == 8
+    assert server.metrics.as_dict()[1][3]['bytes_out'] == 9
+
+
+def test_rtu_server_logs_frames_only_when_traced(rtu_server_with_route,
+                                                 monkeypatch, caplog):
+    from umodbus.server import serial
+    from umodbus.server.serial import rtu as rtu_server
+    from umodbus.utils import trace_frames
+
+    server = rtu_server_with_route
+    request = rtu.read_holding_registers(1, 0, 2)
+
+    def forbidden_hexlify(data):
+        raise AssertionError('Frame is formatted while it isn\'t logged.')
+
+    monkeypatch.setattr(serial, 'hexlify', forbidden_hexlify)
+    monkeypatch.setattr(rtu_server, 'hexlify', forbidden_hexlify)
+
+    server.serial_port.write(request)
+    server.serve_once()
+    server.serial_port.read(server.serial_port.in_waiting)
+
+    monkeypatch.undo()
+
+    try:
+        trace_frames()
+
+        server.serial_port.write(request)
+        server.serve_once()
+    finally:
+        logging.getLogger('uModbus.frames').setLevel(logging.NOTSET)
+
+    assert [r.getMessage() for r in caplog.records
+            if r.name == 'uModbus.frames'] == [
+        '<-- 010300000002c40b',
+        '--> 010304000000013bf3',
+    ]
@@ -0,0 +1,135 @@
+import asyncio
+import pytest
+
+from umodbus.client import tcp
+from umodbus.exceptions import IllegalDataAddressError, ServerDeviceFailureError
+from umodbus.server.asyncio_tcp import get_server
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def server():
+    server = get_server(('localhost', 0))
+
+    @server.route(slave_ids=[1], function_codes=[3], addresses=[0, 1])
+    def read_register(slave_id, function_code, address):
+        return address + 10
+
+    @server.route(slave_ids=[1], function_codes=[3], addresses=[2, 3])
+    async def read_register_async(slave_id, function_code, address):
+        await asyncio.sleep(0)
+        return address + 20
+
+    @server.block_route(slave_ids=[2], function_codes=[3], addresses=range(0, 100))  # NOQA
+    async def read_block_async(slave_id, function_code, starting_address,
+                               quantity):
+        return list(range(starting_address, starting_address + quantity))
+
+    @server.block_route(slave_ids=[3], function_codes=[3], addresses=range(0, 100))  # NOQA
+    async def read_block_wrong_quantity(slave_id, function_code,
+                                        starting_address, quantity):
+        return []
+
+    server.written = []
+
+    @server.route(slave_ids=[1], function_codes=[16], addresses=range(0, 10))
+    async def write_register(slave_id, function_code, address, value):
+        server.written.append((address, value))
+
+    return server
+
+
+def request(loop, server, *adus):
+    """ Start server, send ADU's over 1 connection and return responses. """
+    async def run():
+        await server.start()
+        host, port = server.sockets[0].getsockname()[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+
+        try:
+            responses = []
+            for adu in adus:
+                writer.write(adu)
+                responses.append(tcp.parse_response_adu(
+                    await _read_response(reader), adu))
+
+            return responses
+        finally:
+            writer.close()
+
+            # StreamWriter.wait_closed() has been added in Python 3.7.
+            if hasattr(writer, 'wait_closed'):
+                await writer.wait_closed()
+            await server.server_close()
+
+    return loop.run_until_complete(run())
+
+
+async def _read_response(reader):
+    header = await reader.readexactly(7)
+    length = int.from_bytes(header[4:6], 'big')
+
+    return header + await reader.readexactly(length - 1)
+
+
+def test_sync_and_async_endpoints(loop, server):
+    adu = tcp.read_holding_registers(1, 0, 4)
+    assert request(loop, server, adu) == [[10, 11, 22, 23]]
+
+
+def test_async_block_endpoint(loop, server):
+    adu = tcp.read_holding_registers(2, 5, 3)
+    assert request(loop, server, adu) == [[5, 6, 7]]
+
+
+def test_async_write_endpoint(loop, server):
+    adu = tcp.write_multiple_registers(1, 2, [7, 8])
+    assert request(loop, server, adu) == [2]
+    assert server.written == [(2, 7), (3, 8)]
+
+
+def test_multiple_requests_over_1_connection(loop, server):
+    adus = [tcp.read_holding_registers(1, 0, 1),
+            tcp.read_holding_registers(2, 0, 2)]
+    assert request(loop, server, *adus) == [[10], [0, 1]]
+
+
+def test_missing_route(loop, server):
+    with pytest.raises(IllegalDataAddressError):
+        request(loop, server, tcp.read_holding_registers(1, 3, 2))
+
+
+def test_async_block_endpoint_returning_wrong_quantity(loop, server):
+    with pytest.raises(ServerDeviceFailureError):
+        request(loop, server, tcp.read_holding_registers(3, 0, 2))
+
+
+def test_serve_forever_until_shutdown(loop, server):
+    async def run():
+        await server.start()
+        serving = asyncio.ensure_future(server.serve_forever())
+
+        host, port = server.sockets[0].getsockname()[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+
+        adu = tcp.read_holding_registers(1, 1, 1)
+        writer.write(adu)
+        response = tcp.parse_response_adu(await _read_response(reader), adu)
+
+        server.shutdown()
+        await serving
+
+        # Server closes connection of client on shutdown.
+        assert await reader.read() == b''
+        writer.close()
+
+        return response
+
+    assert loop.run_until_complete(run()) == [11]
+    assert server.sockets == []
@@ -0,0 +1,114 @@
+import time
+import threading
+import pytest
+
+futures = pytest.importorskip('concurrent.futures')
+
+from umodbus.server.executor import UnitExecutor  # NOQA
+
+
+@pytest.fixture
+def executor():
+    executor = UnitExecutor(futures.ThreadPoolExecutor(max_workers=4))
+
+    yield executor
+
+    executor.shutdown()
+
+
+def test_unit_executor_runs_calls_of_unit_in_order(executor):
+    calls = []
+    running = []
+
+    def call(unit_id, index):
+        running.append(unit_id)
+        # Calls of the same unit never run concurrently.
+        assert running.count(unit_id) == 1
+        time.sleep(0.001)
+        calls.append((unit_id, index))
+        running.remove(unit_id)
+
+        return index
+
+    results = [executor.submit(unit_id, call, unit_id, index)
+               for index in range(20) for unit_id in [1, 2]]
+
+    assert [f.result(timeout=5) for f in results] == \
+        [index for index in range(20) for _ in [1, 2]]
+
+    for unit_id in [1, 2]:
+        assert [i for u, i in calls if u == unit_id] == list(range(20))
+
+
+def test_unit_executor_runs_calls_of_units_concurrently(executor):
+    """ A blocking call of 1 unit doesn't stall calls of other units. """
+    event = threading.Event()
+
+    blocked = executor.submit(1, event.wait, 5)
+    queued = executor.submit(1, lambda: 1)
+
+    assert executor.submit(2, lambda: 2).result(timeout=5) == 2
+    assert not queued.done()
+
+    event.set()
+
+    assert blocked.result(timeout=5) is True
+    assert queued.result(timeout=5) == 1
+
+
+def test_unit_executor_sets_exception(executor):
+    def fail():
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        executor.submit(1, fail).result(timeout=5)
+
+    # Next call of unit still runs.
+    assert executor.submit(1, lambda: 1).result(timeout=5) == 1
+
+
+def test_unit_executor_shutdown_cancels_queued_calls(executor):
+    event = threading.Event()
+
+    blocked = executor.submit(1, event.wait, 5)
+    queued = executor.submit(1, lambda: 1)
+
+    threading.Timer(0.1, event.set).start()
+    executor.shutdown()
+
+    assert blocked.result() is True
+    assert queued.cancelled()
+
+
+def test_unit_executor_fails_queued_calls_when_submit_fails():
+    """ When submitting the next call of a unit fails, queued calls of the
+    unit fail and later calls of the unit run.
+    """
+    class Executor(futures.ThreadPoolExecutor):
+        submitted = 0
+
+        def submit(self, fn, *args):
+            self.submitted += 1
+
+            if self.submitted == 2:
+                raise ValueError('Submit failed.')
+
+            return super(Executor, self).submit(fn, *args)
+
+    executor = UnitExecutor(Executor(max_workers=2))
+    event = threading.Event()
+
+    try:
+        blocked = executor.submit(1, event.wait, 5)
+        queued = [executor.submit(1, lambda: 1) for _ in range(2)]
+        event.set()
+
+        assert blocked.result(timeout=5) is True
+
+        for future in queued:
+            with pytest.raises(ValueError):
+                future.result(timeout=5)
+
+        assert executor.submit(1, lambda: 2).result(timeout=5) == 2
+    finally:
+        executor.shutdown()
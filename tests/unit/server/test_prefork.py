@@ -0,0 +1,81 @@
+import os
+import socket
+import pytest
+
+from umodbus.client import tcp
+from umodbus.datastore import SharedDataStore
+from umodbus.server.prefork import get_server
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'),
+                                reason='Requires os.fork().')
+
+
+@pytest.fixture(params=[True, False], ids=['reuse_port', 'shared_socket'])
+def server(request):
+    if request.param and not hasattr(socket, 'SO_REUSEPORT'):
+        pytest.skip('SO_REUSEPORT is not supported.')
+
+    server = get_server(('localhost', 0), workers=2, reuse_port=request.param)
+    server.store = SharedDataStore(unit_ids=[2], size=10)
+    server.store.bind(server.route_map)
+
+    @server.route(slave_ids=[1], function_codes=[3], addresses=[0])
+    def read_pid(slave_id, function_code, address):
+        return os.getpid() & 0xFFFF
+
+    server.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+    server.store.close()
+
+
+def send_message(server, adu):
+    sock = socket.create_connection(server.server_address, timeout=5)
+
+    try:
+        return tcp.send_message(adu, sock)
+    finally:
+        sock.close()
+
+
+def test_prefork_server(server):
+    """ Requests are handled by the workers, not by the parent process. """
+    pids = set(send_message(server, tcp.read_holding_registers(1, 0, 1))[0]
+               for _ in range(20))
+
+    assert os.getpid() & 0xFFFF not in pids
+    assert len(server.processes) == 2
+
+    stats = server.stats()
+    assert stats['requests'] == 20
+    assert stats['connections'] == 20
+    assert sum(w['requests'] for w in stats['workers']) == 20
+
+
+def test_prefork_server_shutdown(server):
+    # A connection which is kept open doesn't block shutdown.
+    sock = socket.create_connection(server.server_address, timeout=5)
+    processes = server.processes
+
+    try:
+        tcp.send_message(tcp.read_holding_registers(1, 0, 1), sock)
+        server.shutdown(timeout=5)
+    finally:
+        sock.close()
+
+    assert server.processes == []
+    assert all(p.exitcode == 0 for p in processes)
+
+
+def test_prefork_server_with_shared_data_store(server):
+    """ A value written by 1 worker is visible to all workers. """
+    send_message(server, tcp.write_multiple_registers(2, 0, [1, 2, 3]))
+
+    for _ in range(10):
+        assert send_message(server, tcp.read_holding_registers(2, 0, 3)) == \
+            [1, 2, 3]
+
+    assert server.store[2].holding_registers[0:3] == [1, 2, 3]
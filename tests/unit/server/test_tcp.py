@@ -2,10 +2,16 @@
 those parts which can't be tested by system tests should be tested using
 unit tests.
 """
+import time
 import struct
+import socket
+import threading
 import pytest
 
+from umodbus.route import Map
+from umodbus.utils import recv_exactly
 from umodbus.exceptions import ServerDeviceFailureError
+from umodbus.client import tcp
 from umodbus.client.tcp import read_coils
 from umodbus.server.tcp import RequestHandler
 
@@ -65,3 +71,236 @@ def def_test_get_request_pdu(request_handler, mbap_header):
 
 def test_response_adu(request_handler, mbap_header, meta_data):
     assert len(request_handler.create_response_adu(meta_data, b'')) == 7
+
+
+def test_response_adu_with_pdu(request_handler, meta_data):
+    response_adu = request_handler.create_response_adu(meta_data,
+                                                       b'\x03\x02\x00\x05')
+
+    assert response_adu == \
+        struct.pack('>HHHB', 1337, 0, 5, 5) + b'\x03\x02\x00\x05'
+
+
+class Server(object):
+    def __init__(self):
+        self.route_map = Map()
+        self.registers = [0] * 10
+
+        self.route_map.add_rule(self.read, [1], [3], range(10))
+        self.route_map.add_rule(self.write, [1], [16], range(10))
+
+    def read(self, slave_id, function_code, address):
+        return self.registers[address]
+
+    def write(self, slave_id, function_code, address, value):
+        self.registers[address] = value
+
+
+def test_handle_multiple_requests_with_one_buffer():
+    """ Requests of a connection are received in the same buffer. Each
+    request must be handled using its own bytes only.
+    """
+    client, server_sock = socket.socketpair()
+    server = Server()
+
+    requests = [
+        tcp.write_multiple_registers(1, 0, [1, 2, 3]),
+        tcp.read_holding_registers(1, 0, 4),
+        tcp.write_multiple_registers(1, 1, [7]),
+        tcp.read_holding_registers(1, 0, 4),
+    ]
+
+    try:
+        client.sendall(b''.join(requests))
+        client.shutdown(socket.SHUT_WR)
+
+        # Handles requests until client has closed its side of connection.
+        RequestHandler(server_sock, ('localhost', 0), server)
+
+        results = [tcp.parse_response_adu(recv_response_adu(client), req)
+                   for req in requests]
+    finally:
+        client.close()
+        server_sock.close()
+
+    assert results == [3, [1, 2, 3, 0], 1, [1, 7, 3, 0]]
+
+
+def test_process_may_keep_request_adu():
+    """ process() gets a copy of the request, which isn't overwritten by the
+    next request.
+    """
+    class RecordingRequestHandler(RequestHandler):
+        def process(self, request_adu):
+            received.append(request_adu)
+            return super(RecordingRequestHandler, self).process(request_adu)
+
+    client, server_sock = socket.socketpair()
+    received = []
+
+    requests = [
+        tcp.write_multiple_registers(1, 0, [1, 2, 3]),
+        tcp.read_holding_registers(1, 0, 4),
+    ]
+
+    try:
+        client.sendall(b''.join(requests))
+        client.shutdown(socket.SHUT_WR)
+
+        RecordingRequestHandler(server_sock, ('localhost', 0), Server())
+    finally:
+        client.close()
+        server_sock.close()
+
+    assert received == requests
+    assert all(isinstance(adu, bytes) for adu in received)
+
+
+def test_handle_closes_connection_on_invalid_length():
+    """ A length field larger than the largest ADU closes the connection,
+    instead of growing the buffer.
+    """
+    client, server_sock = socket.socketpair()
+    client.settimeout(1)
+
+    try:
+        # PDU of 299 bytes.
+        client.sendall(struct.pack('>HHHB', 1, 0, 300, 1) +
+                       tcp.read_holding_registers(1, 0, 1)[7:] +
+                       b'\x00' * 294)
+        client.shutdown(socket.SHUT_WR)
+
+        RequestHandler(server_sock, ('localhost', 0), Server())
+        server_sock.shutdown(socket.SHUT_WR)
+
+        assert client.recv(1) == b''
+    finally:
+        client.close()
+        server_sock.close()
+
+
+def recv_response_adu(sock):
+    mbap = recv_exactly(sock.recv, 7)
+    length = struct.unpack('>H', mbap[4:6])[0]
+
+    return mbap + recv_exactly(sock.recv, length - 1)
+
+
+def test_handle_requests_on_executor():
+    """ A request for a unit which blocks doesn't stall a request for another
+    unit on the same connection.
+    """
+    futures = pytest.importorskip('concurrent.futures')
+    from umodbus.server.executor import UnitExecutor
+
+    client, server_sock = socket.socketpair()
+    client.settimeout(5)
+    event = threading.Event()
+
+    server = Server()
+    server.executor = UnitExecutor(futures.ThreadPoolExecutor(max_workers=2))
+    server.route_map.add_rule(lambda **kwargs: int(event.wait(5)), [2], [3],
+                              range(10))
+
+    requests = [
+        tcp.read_holding_registers(2, 0, 1),
+        tcp.read_holding_registers(1, 0, 1),
+    ]
+
+    handler = threading.Thread(target=RequestHandler,
+                               args=(server_sock, ('localhost', 0), server))
+    handler.start()
+
+    try:
+        client.sendall(b''.join(requests))
+        client.shutdown(socket.SHUT_WR)
+
+        # Response of unit 1 is received while unit 2 is still blocking.
+        response_adu = recv_response_adu(client)
+        assert response_adu[:2] == requests[1][:2]
+        assert tcp.parse_response_adu(response_adu, requests[1]) == [0]
+
+        event.set()
+
+        assert tcp.parse_response_adu(recv_response_adu(client),
+                                      requests[0]) == [1]
+
+        # Handler waits for pending requests before it returns.
+        handler.join(5)
+        assert not handler.is_alive()
+    finally:
+        event.set()
+        client.close()
+        server_sock.close()
+        server.executor.shutdown()
+
+
+def test_handle_waits_until_responses_have_been_sent():
+    """ The connection is closed after handle() returns, so it must not
+    return before responses of submitted requests have been sent.
+    """
+    futures = pytest.importorskip('concurrent.futures')
+    from umodbus.server.executor import UnitExecutor
+
+    class SlowRequestHandler(RequestHandler):
+        def respond(self, response_adu):
+            time.sleep(0.05)
+            RequestHandler.respond(self, response_adu)
+
+    client, server_sock = socket.socketpair()
+    client.settimeout(5)
+
+    server = Server()
+    server.executor = UnitExecutor(futures.ThreadPoolExecutor(max_workers=2))
+    def endpoint(**kwargs):
+        # Complete future after handle() started waiting for it.
+        time.sleep(0.05)
+        return 1
+
+    server.route_map.add_rule(endpoint, [2], [3], range(10))
+
+    request = tcp.read_holding_registers(2, 0, 1)
+
+    try:
+        client.sendall(request)
+        client.shutdown(socket.SHUT_WR)
+
+        SlowRequestHandler(server_sock, ('localhost', 0), server)
+        server_sock.close()
+
+        assert tcp.parse_response_adu(recv_response_adu(client),
+                                      request) == [1]
+    finally:
+        client.close()
+        server_sock.close()
+        server.executor.shutdown()
+
+
+def test_handle_requests_with_metrics():
+    from umodbus.metrics import Metrics
+
+    client, server_sock = socket.socketpair()
+    server = Server()
+    server.metrics = Metrics()
+
+    requests = [
+        tcp.read_holding_registers(1, 0, 2),
+        tcp.read_holding_registers(1, 9, 2),
+    ]
+
+    try:
+        client.sendall(b''.join(requests))
+        client.shutdown(socket.SHUT_WR)
+
+        RequestHandler(server_sock, ('localhost', 0), server)
+    finally:
+        client.close()
+        server_sock.close()
+
+    metrics = server.metrics.as_dict()[1][3]
+
+    assert metrics['requests'] == 2
+    # Address 10 doesn't exist.
+    assert metrics['exceptions'] == {2: 1}
+    assert metrics['bytes_in'] == 24
+    assert metrics['bytes_out'] == 13 + 9
@@ -0,0 +1,164 @@
+import json
+import socket
+import random
+import struct
+import threading
+import pytest
+
+from umodbus.client import tcp
+from umodbus.utils import recv_exactly
+from umodbus.metrics import timer
+from umodbus.bench import (parse_mix, parse_span, create_adus, percentile,
+                           run, start_local_server, main, Worker)
+
+
+def test_parse_mix():
+    assert parse_mix('3:8,16:2') == [(3, 8), (16, 2)]
+    assert parse_mix('3,4') == [(3, 1), (4, 1)]
+
+    with pytest.raises(ValueError):
+        parse_mix('3:a')
+
+
+@pytest.mark.parametrize('span', ['1', '10:10', '0:65537', 'a:b'])
+def test_parse_span_raising_error(span):
+    with pytest.raises(ValueError):
+        parse_span(span)
+
+
+def test_create_adus():
+    adus = create_adus([(3, 3), (6, 1)], 2, (100, 110), 10, 100,
+                       random.Random(0))
+
+    assert len(adus) == 100
+
+    function_codes = [bytearray(adu)[7] for adu in adus]
+    assert set(function_codes) == set([3, 6])
+    assert function_codes.count(3) > function_codes.count(6)
+
+    for adu in adus:
+        assert bytearray(adu)[6] == 2
+
+        if bytearray(adu)[7] == 3:
+            # Quantity is limited to span.
+            assert adu[7:] == tcp.read_holding_registers(2, 100, 10)[7:]
+
+
+@pytest.mark.parametrize('quantity', [0, 126])
+def test_create_adus_with_invalid_quantity(quantity):
+    with pytest.raises(ValueError):
+        create_adus([(3, 1)], 1, (0, 1000), quantity)
+
+
+@pytest.mark.parametrize('mix', [[(3, 0)], [(3, -1), (16, 2)], []])
+def test_create_adus_with_invalid_mix(mix):
+    with pytest.raises(ValueError):
+        create_adus(mix, 1, (0, 1000), 1)
+
+
+def test_main_with_invalid_mix(capsys):
+    with pytest.raises(SystemExit):
+        main(['--local', '--mix', '3:0,16:0'])
+
+    assert 'Weights of mix' in capsys.readouterr()[1]
+
+
+@pytest.mark.parametrize('p, value', [
+    (0, 1), (50, 50), (99, 99), (99.9, 100), (100, 100),
+])
+def test_percentile(p, value):
+    assert percentile(list(range(1, 101)), p) == value
+
+
+def test_percentile_of_empty_sequence():
+    assert percentile([], 50) is None
+
+
+@pytest.fixture
+def server():
+    server = start_local_server(1)
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_run(server):
+    # Unit 2 doesn't exist, so these requests get an exception response.
+    adus = create_adus([(3, 1), (16, 1)], 1, (0, 100), 10, 10) + \
+        [tcp.read_holding_registers(2, 0, 1)]
+
+    report = run(server.server_address, adus, connections=2, depth=4,
+                 duration=0.2)
+
+    assert report['errors'] == []
+    assert report['requests'] > 0
+    # Illegal Data Address.
+    assert 0 < report['exceptions'][2] < report['requests']
+    assert report['latency_ms']['p50'] <= report['latency_ms']['p99'] <= \
+        report['latency_ms']['max']
+
+
+def test_run_with_rate(server):
+    adus = create_adus([(3, 1)], 1, (0, 100), 1)
+
+    report = run(server.server_address, adus, connections=2, depth=4,
+                 duration=0.5, rate=40)
+
+    assert 10 <= report['requests'] <= 25
+
+
+def test_main(capsys):
+    assert main(['--local', '--duration', '0.1', '--json']) == 0
+
+    report = json.loads(capsys.readouterr()[0])
+    assert report['requests'] > 0
+
+
+def test_main_without_server(capsys):
+    server = start_local_server(1)
+    address = '{0}:{1}'.format(*server.server_address)
+    server.shutdown()
+    server.server_close()
+
+    assert main([address, '--duration', '0.1']) == 1
+    assert 'error:' in capsys.readouterr()[0]
+
+
+def test_main_with_invalid_quantity(capsys):
+    with pytest.raises(SystemExit):
+        main(['--local', '--quantity', '126'])
+
+    assert 'Quantity must be between 1 and 125' in capsys.readouterr()[1]
+
+
+def test_worker_with_unknown_transaction_id():
+    """ A response with a transaction id of no request in flight is
+    discarded, the worker stops with an error when the server closes the
+    connection.
+    """
+    listener = socket.socket()
+    listener.bind(('localhost', 0))
+    listener.listen(1)
+
+    def respond_with_wrong_transaction_id():
+        conn, _ = listener.accept()
+        request = recv_exactly(conn.recv, 12)
+        transaction_id = struct.unpack('>H', request[:2])[0]
+        conn.sendall(struct.pack('>HHHBBBH', transaction_id + 1, 0, 5, 1, 3,
+                                 2, 0))
+        conn.close()
+
+    t = threading.Thread(target=respond_with_wrong_transaction_id)
+    t.start()
+
+    adus = [tcp.read_holding_registers(1, 0, 1)]
+    worker = Worker(listener.getsockname(), adus)
+    worker.run(timer() + 5)
+
+    t.join()
+    listener.close()
+
+    assert isinstance(worker.error, ValueError)
+    assert len(worker.latencies) == 0
@@ -0,0 +1,65 @@
+import pytest
+
+from umodbus import conf
+from umodbus.bits import pack_bits, unpack_bits
+from umodbus.functions import ReadCoils, WriteMultipleCoils
+
+
+@pytest.mark.parametrize('values, data', [
+    ([1], b'\x01'),
+    ([0, 1, 1], b'\x06'),
+    ([0, 0, 0, 0, 0, 0, 0, 1], b'\x80'),
+    ([1, 1, 0, 0, 0, 0, 0, 0, 1], b'\x03\x01'),
+    ([True, False, True], b'\x05'),
+])
+def test_pack_bits(values, data):
+    assert pack_bits(values) == data
+    assert unpack_bits(data, len(values)) == [int(v) for v in values]
+
+
+def test_pack_bits_with_invalid_value():
+    with pytest.raises(ValueError):
+        pack_bits([0, 2])
+
+
+def test_unpack_bits_ignores_padding():
+    assert unpack_bits(b'\xff', 3) == [1, 1, 1]
+
+
+def test_pack_and_unpack_2000_bits():
+    values = [(i * 7) % 3 % 2 for i in range(2000)]
+    data = pack_bits(values)
+
+    assert len(data) == 250
+    assert unpack_bits(data, 2000) == values
+
+
+def test_unpack_bits_compact():
+    bits = unpack_bits(b'\x06', 3, compact=True)
+
+    assert isinstance(bits, bytearray)
+    assert list(bits) == [0, 1, 1]
+
+
+@pytest.fixture
+def compact_bit_values(request):
+    conf.COMPACT_BIT_VALUES = True
+
+    def fin():
+        conf.COMPACT_BIT_VALUES = False
+
+    request.addfinalizer(fin)
+
+
+@pytest.mark.usefixtures('compact_bit_values')
+def test_functions_with_compact_bit_values():
+    """ Functions unpacking single bit values honour
+    :attr:`Config.COMPACT_BIT_VALUES`.
+    """
+    function = ReadCoils.create_from_response_pdu(b'\x01\x01\x06',
+                                                  b'\x01\x00\x00\x00\x03')
+    assert function.data == bytearray([0, 1, 1])
+
+    function = WriteMultipleCoils.create_from_request_pdu(
+        b'\x0f\x00\x00\x00\x03\x01\x06')
+    assert function.values == bytearray([0, 1, 1])
@@ -0,0 +1,25 @@
+import struct
+import pytest
+
+from umodbus.codec import get_struct
+
+
+def test_get_struct():
+    s = get_struct('BB', 3, 'h')
+
+    assert isinstance(s, struct.Struct)
+    assert s.format in ['>BBhhh', b'>BBhhh']
+    assert s.pack(3, 6, -1, 0, 1) == b'\x03\x06\xff\xff\x00\x00\x00\x01'
+
+
+def test_get_struct_is_cached():
+    assert get_struct('BHHB', 2, 'H') is get_struct('BHHB', 2, 'H')
+    assert get_struct('BHHB', 2, 'H') is not get_struct('BHHB', 2, 'h')
+    assert get_struct('BHHB', 2, 'H') is not get_struct('BHHB', 3, 'H')
+
+
+def test_get_struct_without_values():
+    assert get_struct('BB').unpack(b'\x01\x02') == (1, 2)
+
+    with pytest.raises(struct.error):
+        get_struct('', 1, 'H').pack(-1)
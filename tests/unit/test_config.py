@@ -1,9 +1,13 @@
+from umodbus.config import Config
+
+
 class TestConfig:
     def test_defaults(self, config):
         """ Test whether defaults configuration values are correct. """
         assert config.SINGLE_BIT_VALUE_FORMAT_CHARACTER == 'B'
         assert config.MULTI_BIT_VALUE_FORMAT_CHARACTER == 'H'
         assert not config.SIGNED_VALUES
+        assert not config.COMPACT_BIT_VALUES
 
     def test_multi_bit_value_signed(self, config):
         """  Test if MULTI_BIT_VALUE_FORMAT_CHARACTER changes when setting
@@ -12,3 +16,7 @@ class TestConfig:
         assert config.MULTI_BIT_VALUE_FORMAT_CHARACTER == 'H'
         config.SIGNED_VALUES = True
         assert config.MULTI_BIT_VALUE_FORMAT_CHARACTER == 'h'
+
+    def test_compact_bit_values_from_environment(self, monkeypatch):
+        monkeypatch.setenv('UMODBUS_COMPACT_BIT_VALUES', '1')
+        assert Config().COMPACT_BIT_VALUES
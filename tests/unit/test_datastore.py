@@ -0,0 +1,156 @@
+import os
+import sys
+import pytest
+
+from umodbus import conf
+from umodbus.route import Map
+from umodbus.client import tcp
+from umodbus.functions import create_function_from_request_pdu
+from umodbus.datastore import DataStore, SharedDataStore
+
+# memoryview.cast() has been added in Python 3.3.
+requires_memoryview_cast = pytest.mark.skipif(sys.version_info < (3, 3),
+                                              reason='Requires Python 3.3.')
+
+
+@pytest.fixture(params=[
+    DataStore,
+    pytest.param(SharedDataStore, marks=requires_memoryview_cast),
+])
+def store(request):
+    store = request.param(unit_ids=[1, 2], size=100)
+
+    yield store
+
+    store.close()
+
+
+@pytest.fixture
+def route_map(store):
+    route_map = Map()
+    store.bind(route_map)
+
+    return route_map
+
+
+def execute(route_map, adu, slave_id=1):
+    """ Execute request ADU build by client and return result. """
+    function = create_function_from_request_pdu(adu[7:])
+
+    return function.execute(slave_id, route_map)
+
+
+def test_store_tables(store):
+    unit = store[1]
+
+    assert len(unit.coils) == 100
+    assert len(unit.holding_registers) == 100
+
+    unit.holding_registers[0:3] = [1, 2, 0xFFFF]
+    unit.coils[99] = 1
+
+    assert unit.holding_registers[0:4] == [1, 2, 0xFFFF, 0]
+    assert unit.holding_registers[2] == 0xFFFF
+    assert unit.coils[98:100] == [0, 1]
+
+    # Tables of units and tables of a unit don't overlap.
+    assert store[2].holding_registers[0:3] == [0, 0, 0]
+    assert unit.input_registers[0:3] == [0, 0, 0]
+    assert unit.discrete_inputs[:] == [0] * 100
+
+    assert 2 in store
+    assert 3 not in store
+
+
+def test_store_table_signed_values(store, monkeypatch):
+    store[1].holding_registers[0] = 0xFFFF
+    monkeypatch.setattr(conf, 'SIGNED_VALUES', True)
+
+    assert store[1].holding_registers[0] == -1
+
+    store[1].holding_registers[1:2] = [-2]
+    assert store[1].holding_registers[0:2] == [-1, -2]
+
+
+def test_store_table_slice_assignment_of_wrong_size(store):
+    with pytest.raises(ValueError):
+        store[1].holding_registers[0:2] = [1, 2, 3]
+
+    with pytest.raises(ValueError):
+        store[1].coils[98:101] = [1, 1, 1]
+
+    assert len(store[1].holding_registers) == 100
+    assert len(store[1].coils) == 100
+
+
+def test_store_bind(store, route_map):
+    store[1].coils[0:3] = [1, 0, 1]
+    store[1].discrete_inputs[10] = 1
+    store[2].input_registers[99] = 1337
+
+    assert execute(route_map, tcp.read_coils(1, 0, 4)) == [1, 0, 1, 0]
+    assert execute(route_map, tcp.read_discrete_inputs(1, 9, 2)) == [0, 1]
+    assert execute(route_map, tcp.read_input_registers(2, 99, 1), 2) == \
+        [1337]
+
+    execute(route_map, tcp.write_multiple_registers(1, 5, [4, 5, 6]))
+    execute(route_map, tcp.write_single_register(1, 8, 7))
+    execute(route_map, tcp.write_single_coil(1, 3, 1))
+    execute(route_map, tcp.write_multiple_coils(1, 4, [1, 1]))
+
+    assert execute(route_map, tcp.read_holding_registers(1, 5, 4)) == \
+        [4, 5, 6, 7]
+    assert store[1].coils[0:6] == [1, 0, 1, 1, 1, 1]
+
+
+def test_store_bind_addresses(store, route_map):
+    """ Store serves only addresses and units it contains. """
+    assert route_map.match_block(1, 3, 0, 100) is not None
+    assert route_map.match_block(1, 3, 1, 100) is None
+    assert route_map.match_block(3, 3, 0, 1) is None
+    assert route_map.match_block(1, 16, 99, 1) is not None
+    # Only block rules are added.
+    assert route_map.match(1, 16, 0) is None
+
+
+def test_data_store_memory_use():
+    store = DataStore(unit_ids=[1])
+    registers = store[1].holding_registers
+
+    assert len(registers) == 65536
+    assert registers._values.itemsize * len(registers) == 128 * 1024
+
+
+@requires_memoryview_cast
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='Requires os.fork().')
+def test_shared_store_across_processes():
+    """ A value written by a forked process is visible to its parent. """
+    store = SharedDataStore(unit_ids=[1, 2], size=100)
+    pid = os.fork()
+
+    if pid == 0:
+        store[2].holding_registers[50:52] = [1337, 1338]
+        os._exit(0)
+
+    _, status = os.waitpid(pid, 0)
+
+    try:
+        assert status == 0
+        assert store[2].holding_registers[50:52] == [1337, 1338]
+    finally:
+        store.close()
+
+
+@requires_memoryview_cast
+def test_shared_store_with_path(tmpdir):
+    path = str(tmpdir.join('store'))
+    store = SharedDataStore(unit_ids=[1], size=10, path=path)
+    store[1].input_registers[9] = 1337
+
+    other = SharedDataStore(unit_ids=[1], size=10, path=path)
+
+    try:
+        assert other[1].input_registers[9] == 1337
+    finally:
+        store.close()
+        other.close()
@@ -351,3 +351,80 @@ def test_create_function_from_response_pdu():
 
     assert isinstance(create_function_from_response_pdu(resp_pdu, req_pdu),
                       ReadCoils)
+
+
+@pytest.mark.parametrize('function', [
+    'read_coils',
+    'read_discrete_inputs',
+    'read_holding_registers',
+    'read_input_registers',
+])
+def test_read_function_execute_block_route(request, route_map, function):
+    """ A block route covering all addresses is called once. """
+    function = request.getfixturevalue(function)
+    endpoint = MagicMock(return_value=[1] * function.quantity)
+    route_map.add_block_rule(endpoint, [1], None, None)
+
+    assert function.execute(1, route_map) == [1] * function.quantity
+    endpoint.assert_called_once_with(
+        slave_id=1, function_code=function.function_code,
+        starting_address=function.starting_address,
+        quantity=function.quantity)
+
+
+def test_read_function_execute_block_route_not_covering_request(
+        route_map, read_holding_registers):
+    """ Fall back to per address routes if block route doesn't cover all
+    addresses.
+    """
+    block_endpoint = MagicMock()
+    route_map.add_block_rule(block_endpoint, [1], [3], [100, 101])
+    route_map.add_rule(lambda **kwargs: kwargs['address'], [1], [3],
+                       range(100, 104))
+
+    assert read_holding_registers.execute(1, route_map) == \
+        [100, 101, 102, 103]
+    assert not block_endpoint.called
+
+
+def test_read_function_execute_block_route_returning_wrong_quantity(
+        route_map, read_holding_registers):
+    route_map.add_block_rule(lambda **kwargs: [1], [1], [3], None)
+
+    with pytest.raises(ServerDeviceFailureError):
+        read_holding_registers.execute(1, route_map)
+
+
+@pytest.mark.parametrize('function, values', [
+    ('write_single_coil', [1]),
+    ('write_single_register', [18]),
+    ('write_multiple_coils', [1, 0]),
+    ('write_multiple_registers', [1337, 15, 128]),
+])
+def test_write_function_execute_block_route(request, route_map, function,
+                                            values):
+    function = request.getfixturevalue(function)
+    endpoint = MagicMock()
+    route_map.add_block_rule(endpoint, [1], None, None)
+
+    function.execute(1, route_map)
+
+    starting_address = getattr(function, 'starting_address', None)
+    if starting_address is None:
+        starting_address = function.address
+
+    endpoint.assert_called_once_with(
+        slave_id=1, function_code=function.function_code,
+        starting_address=starting_address, values=values)
+
+
+def test_create_function_from_request_pdu_caches_read_requests():
+    cache = create_function_from_request_pdu.cache
+    read_pdu = b'\x03\x00\x07\x00\x03'
+    write_pdu = b'\x06\x00\x07\x00\x03'
+
+    assert create_function_from_request_pdu(read_pdu) is \
+        create_function_from_request_pdu(read_pdu)
+    assert create_function_from_request_pdu(write_pdu) is not \
+        create_function_from_request_pdu(write_pdu)
+    assert cache.maxsize is not None
@@ -0,0 +1,78 @@
+import pytest
+
+from umodbus.metrics import Metrics
+
+
+@pytest.fixture
+def metrics():
+    metrics = Metrics(buckets=[0.001, 0.01])
+    metrics.record(1, 3, None, 12, 15, 0.0005)
+    metrics.record(1, 3, 2, 12, 9, 0.005)
+    metrics.record(1, 3, 2, 12, 9, 0.5)
+    metrics.record(2, 16, None, 17, 12, 0.001)
+
+    return metrics
+
+
+def test_metrics_as_dict(metrics):
+    assert metrics.as_dict() == {
+        1: {
+            3: {
+                'requests': 3,
+                'exceptions': {2: 2},
+                'bytes_in': 36,
+                'bytes_out': 33,
+                'duration_sum': pytest.approx(0.5055),
+                'duration_buckets': [(0.001, 1), (0.01, 2),
+                                     (float('inf'), 3)],
+            },
+        },
+        2: {
+            16: {
+                'requests': 1,
+                'exceptions': {},
+                'bytes_in': 17,
+                'bytes_out': 12,
+                'duration_sum': 0.001,
+                # Upper bound of bucket is inclusive.
+                'duration_buckets': [(0.001, 1), (0.01, 1),
+                                     (float('inf'), 1)],
+            },
+        },
+    }
+
+
+def test_metrics_record_pdus():
+    metrics = Metrics()
+    metrics.record_pdus(1, b'\x03\x00\x00\x00\x01', b'\x03\x02\x00\x01', 12,
+                        11, 0.001)
+    metrics.record_pdus(1, memoryview(b'\x03\x00\x00\x00\x01'), b'\x83\x02',
+                        12, 9, 0.001)
+
+    m = metrics.as_dict()[1][3]
+    assert m['requests'] == 2
+    assert m['exceptions'] == {2: 1}
+
+
+def test_metrics_to_prometheus(metrics):
+    lines = metrics.to_prometheus().splitlines()
+
+    assert '# TYPE umodbus_requests_total counter' in lines
+    assert 'umodbus_requests_total{unit_id="1",function_code="3"} 3' in lines
+    assert 'umodbus_exception_responses_total{unit_id="1",function_code="3",'\
+        'error_code="2"} 2' in lines
+    assert 'umodbus_received_bytes_total{unit_id="2",function_code="16"} 17' \
+        in lines
+    assert 'umodbus_sent_bytes_total{unit_id="1",function_code="3"} 33' in \
+        lines
+    assert '# TYPE umodbus_request_duration_seconds histogram' in lines
+    assert 'umodbus_request_duration_seconds_bucket{unit_id="1",'\
+        'function_code="3",le="0.01"} 2' in lines
+    assert 'umodbus_request_duration_seconds_bucket{unit_id="1",'\
+        'function_code="3",le="+Inf"} 3' in lines
+    assert 'umodbus_request_duration_seconds_count{unit_id="1",'\
+        'function_code="3"} 3' in lines
+
+
+def test_empty_metrics_to_prometheus():
+    assert 'umodbus_requests_total' in Metrics().to_prometheus('umodbus')
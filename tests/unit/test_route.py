@@ -1,6 +1,6 @@
 import pytest
 
-from umodbus.route import DataRule
+from umodbus.route import Map, DataRule
 
 
 endpoint = lambda slave_id, function_code, address: 0
@@ -34,3 +34,114 @@ def test_wildcard_function_code():
 def test_wildcard_address():
     rule = DataRule(endpoint, slave_ids=[1], function_codes=[1], addresses=None)
     assert rule.match(slave_id=1, function_code=1, address=1)
+
+
+def test_range_and_generator_constraints():
+    rule = DataRule(endpoint, slave_ids=range(1, 3),
+                    function_codes=(f for f in [3, 4]),
+                    addresses=range(100, 200))
+    assert rule.match(slave_id=2, function_code=4, address=199)
+    assert not rule.match(slave_id=3, function_code=4, address=199)
+    assert not rule.match(slave_id=2, function_code=4, address=200)
+
+
+def test_map_first_match_wins():
+    route_map = Map()
+    first = lambda: 1
+    second = lambda: 2
+    route_map.add_rule(first, [1], [3], list(range(10, 20)))
+    route_map.add_rule(second, [1], [3], list(range(0, 100)))
+
+    assert route_map.match(1, 3, 9) is second
+    assert route_map.match(1, 3, 10) is first
+    assert route_map.match(1, 3, 19) is first
+    assert route_map.match(1, 3, 20) is second
+    assert route_map.match(1, 3, 100) is None
+    assert route_map.match(2, 3, 10) is None
+    assert route_map.match(1, 4, 10) is None
+
+
+def test_map_wildcards():
+    route_map = Map()
+    specific = lambda: 1
+    fallback = lambda: 2
+    route_map.add_rule(specific, [1], [3], [5, 6, 8])
+    route_map.add_rule(fallback, None, None, None)
+
+    assert route_map.match(1, 3, 5) is specific
+    assert route_map.match(1, 3, 7) is fallback
+    assert route_map.match(1, 3, 8) is specific
+    assert route_map.match(2, 1, 5) is fallback
+
+
+def test_map_wildcard_shadows_later_rules():
+    route_map = Map()
+    wildcard = lambda: 1
+    shadowed = lambda: 2
+    route_map.add_rule(wildcard, [1], None, None)
+    route_map.add_rule(shadowed, [1], [3], [5])
+
+    assert route_map.match(1, 3, 5) is wildcard
+
+
+def test_map_adding_rule_invalidates_index():
+    route_map = Map()
+    route_map.add_rule(endpoint, [1], [3], [5])
+    assert route_map.match(1, 3, 6) is None
+
+    route_map.add_rule(endpoint, [1], [3], [6])
+    assert route_map.match(1, 3, 6) is endpoint
+
+
+def test_map_with_constraint_that_can_not_be_indexed():
+    class Even(object):
+        def __contains__(self, value):
+            return value % 2 == 0
+
+    route_map = Map()
+    route_map.add_rule(endpoint, [1], [3], Even())
+
+    assert route_map.match(1, 3, 4) is endpoint
+    assert route_map.match(1, 3, 5) is None
+
+
+@pytest.mark.parametrize('address', [0, 99, 100, 150, 249, 250, 400, 65535])
+def test_map_matches_like_linear_scan(address):
+    route_map = Map()
+    for i in range(50):
+        route_map.add_rule(lambda: i, [i % 3], [3, 4],
+                           list(range(i * 5, i * 5 + 20)))
+
+    for slave_id in range(3):
+        expected = None
+        for rule in route_map._rules:
+            if rule.match(slave_id, 3, address):
+                expected = rule.endpoint
+                break
+
+        assert route_map.match(slave_id, 3, address) is expected
+
+
+def test_map_match_block():
+    route_map = Map()
+    first = lambda: 1
+    second = lambda: 2
+    route_map.add_block_rule(first, [1], [3], list(range(0, 10)))
+    route_map.add_block_rule(second, [1], [3, 4], range(0, 100))
+
+    assert route_map.match_block(1, 3, 0, 10) is first
+    assert route_map.match_block(1, 3, 5, 6) is second
+    assert route_map.match_block(1, 4, 0, 10) is second
+    assert route_map.match_block(1, 3, 95, 6) is None
+    assert route_map.match_block(2, 3, 0, 1) is None
+
+    # Block rules don't affect per address matching.
+    assert route_map.match(1, 3, 0) is None
+
+
+def test_map_match_block_with_gap_in_addresses():
+    route_map = Map()
+    route_map.add_block_rule(endpoint, None, None, [1, 2, 4])
+
+    assert route_map.match_block(1, 3, 1, 2) is endpoint
+    assert route_map.match_block(1, 3, 1, 4) is None
@@ -1,10 +1,12 @@
 import sys
 import logging
+import pytest
 from logging import getLogger
 
 from umodbus.utils import (log_to_stream, unpack_mbap, pack_mbap,
                            pack_exception_pdu,
-                           get_function_code_from_request_pdu)
+                           get_function_code_from_request_pdu, memoize,
+                           recv_exactly_into, to_bytes, trace_frames)
 
 
 def test_log_to_stream():
@@ -21,6 +23,26 @@ def test_log_to_stream():
     assert handler.level == logging.NOTSET
 
 
+def test_trace_frames():
+    log = getLogger('uModbus')
+    frame_log = getLogger('uModbus.frames')
+    level = log.level
+
+    try:
+        log.setLevel(logging.WARNING)
+        assert not frame_log.isEnabledFor(logging.DEBUG)
+
+        trace_frames()
+        assert frame_log.isEnabledFor(logging.DEBUG)
+
+        log.setLevel(logging.DEBUG)
+        trace_frames(False)
+        assert not frame_log.isEnabledFor(logging.DEBUG)
+    finally:
+        log.setLevel(level)
+        frame_log.setLevel(logging.NOTSET)
+
+
 def test_unpack_mbap():
     """ MBAP should contain correct values for Transaction identifier, Protocol
     identifier, Length and Unit identifer.
@@ -44,3 +66,132 @@ def test_pack_exception_pdu():
 def test_get_function_code_from_request_pdu():
     """ Get correct function code from PDU. """
     assert get_function_code_from_request_pdu(b'\x01\x00d\x00\x03') == 1
+
+
+def test_memoize_without_arguments():
+    calls = []
+
+    @memoize
+    def f(arg):
+        calls.append(arg)
+        return arg * 2
+
+    assert f(1) == 2
+    assert f(1) == 2
+    assert calls == [1]
+    assert f.cache.info()['hits'] == 1
+    assert f.cache.info()['misses'] == 1
+    assert f.cache.maxsize is None
+
+
+@pytest.mark.parametrize('policy, cached', [
+    ('lru', [1, 3]),
+    ('fifo', [2, 3]),
+])
+def test_memoize_evicts_entries(policy, cached):
+    @memoize(maxsize=2, policy=policy)
+    def f(arg):
+        return arg
+
+    f(1)
+    f(2)
+    # With LRU policy 2 is least recently used now, with FIFO 1 is oldest.
+    f(1)
+    f(3)
+    assert len(f.cache) == 2
+
+    assert [arg for arg in [1, 2, 3] if arg in f.cache] == cached
+
+
+def test_memoize_with_cacheable():
+    calls = []
+
+    @memoize(cacheable=lambda arg: arg > 0)
+    def f(arg):
+        calls.append(arg)
+        return arg
+
+    f(-1)
+    f(-1)
+    f(1)
+    f(1)
+
+    assert calls == [-1, -1, 1]
+    assert len(f.cache) == 1
+
+
+def test_memoize_with_maxsize_0():
+    @memoize(maxsize=0)
+    def f(arg):
+        return arg
+
+    f(1)
+    assert len(f.cache) == 0
+
+
+def test_memoize_cache_clear():
+    @memoize
+    def f(arg):
+        return arg
+
+    f(1)
+    f(1)
+    f.cache.clear()
+
+    assert f.cache.info() == {'hits': 0, 'misses': 0, 'size': 0,
+                              'maxsize': None, 'policy': 'lru'}
+
+
+def test_memoize_decorator_applied_to_multiple_functions():
+    decorator = memoize(maxsize=10)
+
+    @decorator
+    def f(arg):
+        return 'f', arg
+
+    @decorator
+    def g(arg):
+        return 'g', arg
+
+    assert f(1) == ('f', 1)
+    assert g(1) == ('g', 1)
+    assert f.cache is not g.cache
+
+
+def test_memoize_with_invalid_policy():
+    with pytest.raises(ValueError):
+        memoize(policy='random')
+
+
+def test_memoize_with_key():
+    calls = []
+
+    @memoize(key=to_bytes)
+    def f(arg):
+        calls.append(to_bytes(arg))
+        return len(arg)
+
+    buffer = bytearray(b'\x01\x02')
+    assert f(memoryview(buffer)) == 2
+    assert f(bytearray(b'\x01\x02')) == 2
+    assert calls == [b'\x01\x02']
+    assert b'\x01\x02' in f.cache
+
+
+def test_recv_exactly_into():
+    chunks = [b'\x01', b'\x02\x03']
+
+    def recv_into(buffer):
+        chunk = chunks.pop(0)
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+    buffer = bytearray(4)
+    recv_exactly_into(recv_into, memoryview(buffer)[1:])
+
+    assert buffer == b'\x00\x01\x02\x03'
+
+
+def test_recv_exactly_into_raising_value_error():
+    with pytest.raises(ValueError):
+        recv_exactly_into(lambda buffer: 0, memoryview(bytearray(1)))
@@ -3,5 +3,10 @@ from logging import getLogger, NullHandler
 log = getLogger('uModbus')
 log.addHandler(NullHandler())
 
+# Hex dumps of frames received and sent by servers are logged at level DEBUG
+# by this child logger. Its level can be set independently of `log`, see
+# umodbus.utils.trace_frames().
+frame_log = getLogger('uModbus.frames')
+
 from .config import Config  # NOQA
 conf = Config()
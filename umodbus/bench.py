@@ -0,0 +1,452 @@
+""" Load generator for Modbus TCP servers.
+
+It opens a number of connections to a server and sends requests over them
+for a while. Every connection has up to `depth` requests in flight. The
+requests are a mix of function codes, with addresses spread over a span::
+
+    $ python -m umodbus.bench localhost:502 --connections 4 --depth 8 \\
+        --mix 3:8,16:2 --span 0:1000 --quantity 10 --duration 2
+    requests:     46144
+    duration:     2.04 s
+    throughput:   22593.2 requests/s
+    latency:      p50 1.23 ms, p99 6.67 ms, p999 12.49 ms, max 42.40 ms
+    exceptions:   0
+
+Pass `--rate` to send at most that many requests per second, over all
+connections. With `--local` the requests are sent to a server which is
+started in this process, using :func:`umodbus.server.tcp.get_server` and a
+:class:`umodbus.datastore.DataStore`.
+
+Requests are sent with a :class:`umodbus.client.tcp.Connection`, so the
+client code is part of what is measured. Results are printed as JSON with
+`--json`.
+
+"""
+from __future__ import print_function, division
+import sys
+import json
+import time
+import socket
+import random
+import threading
+from array import array
+from collections import deque
+from argparse import ArgumentParser
+try:
+    from socketserver import ThreadingTCPServer
+except ImportError:
+    from SocketServer import ThreadingTCPServer
+
+from umodbus.client import tcp
+from umodbus.metrics import timer
+from umodbus.exceptions import ModbusError
+from umodbus.functions import (READ_COILS, READ_DISCRETE_INPUTS,
+                               READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS,
+                               WRITE_SINGLE_COIL, WRITE_SINGLE_REGISTER,
+                               WRITE_MULTIPLE_COILS, WRITE_MULTIPLE_REGISTERS)
+
+#: Number of distinct request ADU's every connection cycles through.
+NUMBER_OF_ADUS = 1024
+
+#: Maximum number of addresses per request. Requests for more than 125
+#: registers aren't allowed.
+MAX_QUANTITY = 125
+
+
+def parse_mix(mix):
+    """ Parse mix of function codes and return list with function codes and
+    their weights.
+
+        >>> parse_mix('3:8,16:2')
+        [(3, 8), (16, 2)]
+        >>> parse_mix('3,4')
+        [(3, 1), (4, 1)]
+
+    :param mix: String with comma separated function codes, each optionally
+        followed by a colon and its weight.
+    :return: List with tuples of function code and weight.
+    :raises ValueError: When mix is malformed.
+    """
+    result = []
+
+    for item in mix.split(','):
+        function_code, _, weight = item.partition(':')
+        result.append((int(function_code), int(weight or 1)))
+
+    return result
+
+
+def parse_span(span):
+    """ Parse span of addresses, like '0:100', and return tuple with first
+    address and the address following the last one.
+
+    :raises ValueError: When span is malformed or empty.
+    """
+    start, end = [int(a) for a in span.split(':')]
+
+    if not 0 <= start < end <= 0x10000:
+        raise ValueError('Span must be between 0 and 65536.')
+
+    return start, end
+
+
+def create_adu(function_code, unit_id, address, quantity):
+    """ Return request ADU for function code.
+
+    :raises ValueError: When function code is not supported.
+    """
+    if function_code == READ_COILS:
+        return tcp.read_coils(unit_id, address, quantity)
+    elif function_code == READ_DISCRETE_INPUTS:
+        return tcp.read_discrete_inputs(unit_id, address, quantity)
+    elif function_code == READ_HOLDING_REGISTERS:
+        return tcp.read_holding_registers(unit_id, address, quantity)
+    elif function_code == READ_INPUT_REGISTERS:
+        return tcp.read_input_registers(unit_id, address, quantity)
+    elif function_code == WRITE_SINGLE_COIL:
+        return tcp.write_single_coil(unit_id, address, 1)
+    elif function_code == WRITE_SINGLE_REGISTER:
+        return tcp.write_single_register(unit_id, address, address & 0x7FFF)
+    elif function_code == WRITE_MULTIPLE_COILS:
+        return tcp.write_multiple_coils(unit_id, address,
+                                        [a % 2 for a in range(quantity)])
+    elif function_code == WRITE_MULTIPLE_REGISTERS:
+        return tcp.write_multiple_registers(unit_id, address,
+                                            list(range(quantity)))
+
+    raise ValueError('Function code {0} is not supported.'
+                     .format(function_code))
+
+
+def create_adus(mix, unit_id, span, quantity, number=NUMBER_OF_ADUS,
+                rng=random):
+    """ Return list with request ADU's, with function codes distributed
+    according to mix and random starting addresses in span.
+
+    :param mix: List with tuples of function code and weight.
+    :param unit_id: Unit id.
+    :param span: Tuple with first address and address after the last one.
+    :param quantity: Number of addresses of requests with multiple addresses.
+    :param number: Number of ADU's.
+    :param rng: Instance of :class:`random.Random`.
+    :return: List with request ADU's.
+    :raises ValueError: When quantity isn't between 1 and
+        :data:`MAX_QUANTITY`, or when a weight is negative or all weights
+        are 0.
+    """
+    if not 1 <= quantity <= MAX_QUANTITY:
+        raise ValueError('Quantity must be between 1 and {0}.'
+                         .format(MAX_QUANTITY))
+
+    if any(weight < 0 for _, weight in mix) or \
+            not any(weight > 0 for _, weight in mix):
+        raise ValueError('Weights of mix must not be negative and at least 1 '
+                         'must be larger than 0.')
+
+    start, end = span
+    quantity = min(quantity, end - start)
+
+    function_codes = []
+
+    for function_code, weight in mix:
+        function_codes += [function_code] * weight
+
+    adus = []
+
+    for _ in range(number):
+        function_code = rng.choice(function_codes)
+
+        if function_code in [WRITE_SINGLE_COIL, WRITE_SINGLE_REGISTER]:
+            address = rng.randrange(start, end)
+        else:
+            address = rng.randrange(start, end - quantity + 1)
+
+        adus.append(create_adu(function_code, unit_id, address, quantity))
+
+    return adus
+
+
+def percentile(values, p):
+    """ Return p-th percentile of sorted values, using nearest rank.
+
+    :param values: Sorted sequence.
+    :param p: Percentile, between 0 and 100.
+    :return: Value, or None if sequence is empty.
+    """
+    if len(values) == 0:
+        return None
+
+    index = int(len(values) * p / 100 + 0.5) - 1
+
+    return values[min(max(index, 0), len(values) - 1)]
+
+
+class Worker(object):
+    """ Send requests over 1 :class:`umodbus.client.tcp.Connection` and
+    record their latency.
+
+    Responses are collected in the order of the requests. When a server
+    responds out of order, a response is recorded when the responses to all
+    earlier requests have been received.
+
+    :param address: Tuple with host and port.
+    :param adus: List with request ADU's to cycle through.
+    :param depth: Maximum number of requests in flight.
+    :param interval: Minimal time in seconds between 2 requests, or 0.
+    :param timeout: Socket timeout in seconds.
+    """
+    def __init__(self, address, adus, depth=1, interval=0, timeout=5):
+        self.address = address
+        self.adus = adus
+        self.depth = depth
+        self.interval = interval
+        self.timeout = timeout
+
+        #: Latencies of responses in seconds.
+        self.latencies = array('d')
+        #: Map error code of exception responses to their number.
+        self.exceptions = {}
+        #: Exception which stopped the worker, if any.
+        self.error = None
+
+        # Tuples with transaction id and time of requests which haven't been
+        # collected yet, oldest first.
+        self._in_flight = deque()
+
+    def run(self, deadline):
+        """ Send requests until deadline, then wait for responses of
+        requests in flight.
+
+        :param deadline: Time as returned by :func:`umodbus.metrics.timer`.
+        """
+        try:
+            sock = socket.create_connection(self.address, self.timeout)
+        except socket.error as e:
+            self.error = e
+            return
+
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._run(tcp.Connection(sock, max_in_flight=self.depth),
+                      deadline)
+        except Exception as e:
+            self.error = e
+        finally:
+            sock.close()
+
+    def _run(self, connection, deadline):
+        adus = self.adus
+        in_flight = self._in_flight
+        i = 0
+        next_send = timer()
+
+        while True:
+            now = timer()
+
+            if now >= deadline:
+                break
+
+            if len(in_flight) < self.depth and now >= next_send:
+                adu = adus[i % len(adus)]
+                i += 1
+
+                sent = timer()
+                in_flight.append((connection.send(adu), sent))
+
+                next_send = max(next_send + self.interval, now) \
+                    if self.interval else now
+                continue
+
+            if in_flight:
+                self._receive(connection)
+            else:
+                time.sleep(min(next_send, deadline) - now)
+
+        while in_flight:
+            self._receive(connection)
+
+    def _receive(self, connection):
+        """ Collect response to oldest request and record its latency. """
+        transaction_id, sent = self._in_flight.popleft()
+
+        try:
+            connection.receive(transaction_id)
+        except ModbusError as e:
+            self.exceptions[e.error_code] = \
+                self.exceptions.get(e.error_code, 0) + 1
+
+        self.latencies.append(timer() - sent)
+
+
+def run(address, adus, connections=1, depth=1, duration=10, rate=0,
+        timeout=5):
+    """ Send requests over a number of connections and return report.
+
+    :param address: Tuple with host and port.
+    :param adus: List with request ADU's.
+    :param connections: Number of connections.
+    :param depth: Maximum number of requests in flight per connection.
+    :param duration: Seconds to send requests.
+    :param rate: Maximum number of requests per second over all connections,
+        or 0 for no maximum.
+    :param timeout: Socket timeout in seconds.
+    :return: Dict with report.
+    """
+    interval = connections / rate if rate else 0
+    workers = [Worker(address, adus, depth, interval, timeout)
+               for _ in range(connections)]
+
+    start = timer()
+    deadline = start + duration
+    threads = [threading.Thread(target=w.run, args=(deadline,))
+               for w in workers]
+
+    for t in threads:
+        t.daemon = True
+        t.start()
+
+    for t in threads:
+        t.join()
+
+    elapsed = timer() - start
+
+    latencies = sorted(latency for w in workers for latency in w.latencies)
+    exceptions = {}
+
+    for w in workers:
+        for error_code, count in w.exceptions.items():
+            exceptions[error_code] = exceptions.get(error_code, 0) + count
+
+    def to_ms(seconds):
+        return None if seconds is None else seconds * 1000
+
+    return {
+        'requests': len(latencies),
+        'duration': elapsed,
+        'throughput': len(latencies) / elapsed,
+        'latency_ms': {
+            'p50': to_ms(percentile(latencies, 50)),
+            'p99': to_ms(percentile(latencies, 99)),
+            'p999': to_ms(percentile(latencies, 99.9)),
+            'max': to_ms(latencies[-1] if latencies else None),
+        },
+        'exceptions': exceptions,
+        'errors': [str(w.error) for w in workers if w.error is not None],
+    }
+
+
+def format_report(report):
+    """ Return report as human readable text. """
+    latency = report['latency_ms']
+    lines = [
+        'requests:     {0}'.format(report['requests']),
+        'duration:     {0:.2f} s'.format(report['duration']),
+        'throughput:   {0:.1f} requests/s'.format(report['throughput']),
+    ]
+
+    if report['requests']:
+        lines.append('latency:      p50 {0:.2f} ms, p99 {1:.2f} ms, '
+                     'p999 {2:.2f} ms, max {3:.2f} ms'.format(
+                         latency['p50'], latency['p99'], latency['p999'],
+                         latency['max']))
+
+    lines.append('exceptions:   {0}'.format(
+        sum(report['exceptions'].values())))
+
+    for error_code, count in sorted(report['exceptions'].items()):
+        lines.append('  error code {0}: {1}'.format(error_code, count))
+
+    for error in report['errors']:
+        lines.append('error:        {0}'.format(error))
+
+    return '\n'.join(lines)
+
+
+def start_local_server(unit_id):
+    """ Start server on a free port of localhost in a thread and return it.
+    The server serves all addresses of all tables of the unit from a
+    :class:`umodbus.datastore.DataStore`.
+    """
+    from umodbus.datastore import DataStore
+    from umodbus.server.tcp import RequestHandler, get_server
+
+    server = get_server(ThreadingTCPServer, ('localhost', 0), RequestHandler)
+    server.daemon_threads = True
+    DataStore(unit_ids=[unit_id]).bind(server.route_map)
+
+    t = threading.Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+
+    return server
+
+
+def main(argv=None):
+    parser = ArgumentParser(prog='python -m umodbus.bench',
+                            description='Generate load on a Modbus TCP '
+                            'server.')
+    parser.add_argument('address', nargs='?', default='localhost:502',
+                        help='host and port of server, default '
+                        'localhost:502')
+    parser.add_argument('--local', action='store_true',
+                        help='send requests to a server started in this '
+                        'process, instead of to address')
+    parser.add_argument('-c', '--connections', type=int, default=1,
+                        help='number of connections, default 1')
+    parser.add_argument('-d', '--depth', type=int, default=1,
+                        help='maximum number of requests in flight per '
+                        'connection, default 1')
+    parser.add_argument('--mix', type=parse_mix, default='3',
+                        help='comma separated function codes with optional '
+                        'weight, like 3:8,16:2, default 3')
+    parser.add_argument('--unit', type=int, default=1,
+                        help='unit id, default 1')
+    parser.add_argument('--span', type=parse_span, default='0:100',
+                        help='addresses requests are spread over, like '
+                        '0:100, default 0:100')
+    parser.add_argument('--quantity', type=int, default=1,
+                        help='number of addresses per request, at most '
+                        '125, default 1')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='maximum number of requests per second, '
+                        'default no maximum')
+    parser.add_argument('--duration', type=float, default=10,
+                        help='seconds to send requests, default 10')
+    parser.add_argument('--timeout', type=float, default=5,
+                        help='socket timeout in seconds, default 5')
+    parser.add_argument('--json', action='store_true',
+                        help='print report as JSON')
+    args = parser.parse_args(argv)
+
+    try:
+        adus = create_adus(args.mix, args.unit, args.span, args.quantity)
+    except ValueError as e:
+        parser.error(str(e))
+
+    server = None
+
+    if args.local:
+        server = start_local_server(args.unit)
+        address = server.server_address
+    else:
+        host, _, port = args.address.partition(':')
+        address = (host or 'localhost', int(port or 502))
+
+    try:
+        report = run(address, adus, args.connections, args.depth,
+                     args.duration, args.rate, args.timeout)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    if args.json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    else:
+        print(format_report(report))
+
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
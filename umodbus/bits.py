@@ -0,0 +1,71 @@
+""" Pack and unpack single bit values, like the status of coils and discrete
+inputs.
+
+Modbus packs 8 single bit values in a byte. The LSB of the first byte contains
+the first value, the following values fill the byte towards its MSB and then
+continue in the next byte. The last byte is padded with zeros::
+
+    >>> pack_bits([1, 1, 0, 0, 0, 0, 0, 0, 1])
+    bytearray(b'\\x03\\x01')
+    >>> unpack_bits(b'\\x03\\x01', 9)
+    [1, 1, 0, 0, 0, 0, 0, 0, 1]
+
+Both functions use look up tables with an entry for every value of a byte, so
+a byte is converted at once instead of bit by bit.
+
+"""
+from umodbus import conf
+
+# Map every byte value to a string of 8 bytes, each containing 1 bit of that
+# value, LSB first. 6 maps to b'\x00\x01\x01\x00\x00\x00\x00\x00'.
+_byte_to_bits = [bytes(bytearray((value >> bit) & 1 for bit in range(8)))
+                 for value in range(256)]
+
+# Reverse of _byte_to_bits.
+_bits_to_byte = dict((bits, value) for value, bits in enumerate(_byte_to_bits))
+
+
+def pack_bits(values):
+    """ Pack sequence of 0's and 1's in bytes.
+
+    :param values: Sequence with 0's and 1's, like a list or bytearray.
+    :return: Bytearray with ceil(len(values) / 8) bytes.
+    :raises ValueError: When values contains something else than 0 or 1.
+    """
+    bits = bytearray(values)
+    remainder = len(bits) % 8
+
+    if remainder:
+        bits.extend(bytearray(8 - remainder))
+
+    bits = bytes(bits)
+
+    try:
+        return bytearray([_bits_to_byte[bits[i:i + 8]]
+                          for i in range(0, len(bits), 8)])
+    except KeyError:
+        raise ValueError('Single bit values must be 0 or 1.')
+
+
+def unpack_bits(data, quantity, compact=None):
+    """ Unpack bytes in single bit values.
+
+    :param data: Bytes with packed values.
+    :param quantity: Number of values to unpack. Padding bits beyond this
+        number are ignored.
+    :param compact: When True, return a bytearray with 1 byte per value,
+        which takes less memory and time to create than a list. Default is
+        :attr:`umodbus.config.Config.COMPACT_BIT_VALUES`.
+    :return: List, or bytearray, with 0's and 1's.
+    """
+    if compact is None:
+        compact = conf.COMPACT_BIT_VALUES
+
+    bits = bytearray(b''.join([_byte_to_bits[value]
+                               for value in bytearray(data)]))
+    del bits[quantity:]
+
+    if compact:
+        return bits
+
+    return list(bits)
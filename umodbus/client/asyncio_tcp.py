@@ -0,0 +1,147 @@
+""" Modbus TCP client based on :mod:`asyncio`.
+
+Request ADU's are created with the functions in :mod:`umodbus.client.tcp`,
+:meth:`Client.send` sends them and returns the parsed response::
+
+    >>> client = await connect('localhost', 502, timeout=1)
+    >>> await client.send(tcp.read_holding_registers(1, 0, 10))
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
+
+Multiple coroutines can use the same client at once. Each request gets its
+own transaction id and responses are matched against requests using this
+id, so all requests share a single connection.
+
+.. note:: This module requires Python 3.5 or newer.
+
+"""
+import struct
+import asyncio
+
+from umodbus import log
+from umodbus.utils import unpack_mbap
+from umodbus.client.tcp import parse_response_adu
+
+
+async def connect(host, port, timeout=None, **kwargs):
+    """ Open connection to server and return :class:`Client`.
+
+    :param host: Host of server.
+    :param port: Port of server.
+    :param timeout: Default timeout in seconds for connecting and for each
+        request, default None.
+    :param kwargs: Other keyword arguments are passed to
+        :func:`asyncio.open_connection`.
+    :return: Instance of :class:`Client`.
+    :raises asyncio.TimeoutError: When connection isn't established within
+        timeout.
+    """
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(host, port, **kwargs), timeout)
+
+    return Client(reader, writer, timeout)
+
+
+class Client(object):
+    """ Modbus TCP client on top of :mod:`asyncio` streams.
+
+    :param reader: Instance of :class:`asyncio.StreamReader`.
+    :param writer: Instance of :class:`asyncio.StreamWriter`.
+    :param timeout: Default timeout in seconds for each request, default
+        None.
+    """
+    def __init__(self, reader, writer, timeout=None):
+        self.reader = reader
+        self.writer = writer
+        self.timeout = timeout
+
+        self._transaction_id = 0
+        # Map transaction id of requests awaiting a response to a future.
+        self._pending = {}
+        self._receiver = None
+
+    def _next_transaction_id(self):
+        while True:
+            # 65535 = (2**16)-1 aka maximum number that fits in 2 bytes.
+            self._transaction_id = (self._transaction_id + 1) & 0xFFFF
+
+            if self._transaction_id not in self._pending:
+                return self._transaction_id
+
+    async def send(self, adu, timeout=None):
+        """ Send ADU to server and return parsed response.
+
+        :param adu: Request ADU.
+        :param timeout: Timeout in seconds, default is timeout of client.
+        :return: Parsed response from server.
+        :raises asyncio.TimeoutError: When no response is received within
+            timeout.
+        :raises ModbusError: When response contains an error code.
+        """
+        if timeout is None:
+            timeout = self.timeout
+
+        if self._receiver is None or self._receiver.done():
+            self._receiver = asyncio.ensure_future(self._receive())
+
+        transaction_id = self._next_transaction_id()
+        adu = struct.pack('>H', transaction_id) + adu[2:]
+
+        response = asyncio.get_event_loop().create_future()
+        self._pending[transaction_id] = response
+
+        try:
+            self.writer.write(adu)
+            await self.writer.drain()
+            resp_adu = await asyncio.wait_for(response, timeout)
+        finally:
+            self._pending.pop(transaction_id, None)
+
+        return parse_response_adu(resp_adu, adu)
+
+    async def _receive(self):
+        """ Read responses and pass them to the requests waiting for them. """
+        try:
+            while True:
+                mbap = await self.reader.readexactly(7)
+                transaction_id, _, length, _ = unpack_mbap(mbap)
+                resp_adu = mbap + await self.reader.readexactly(length - 1)
+
+                response = self._pending.get(transaction_id)
+
+                if response is None or response.done():
+                    log.warning('Discard response with unknown transaction id '
+                                '{0}.'.format(transaction_id))
+                    continue
+
+                response.set_result(resp_adu)
+        except Exception as e:
+            # Connection is broken or closed, none of the pending requests
+            # gets a response.
+            for response in self._pending.values():
+                if not response.done():
+                    response.set_exception(e)
+
+    def close(self):
+        """ Close connection. Requests awaiting a response fail with a
+        :class:`ConnectionError`.
+        """
+        if self._receiver is not None:
+            self._receiver.cancel()
+
+        for response in self._pending.values():
+            if not response.done():
+                response.set_exception(
+                    ConnectionError('Connection has been closed.'))
+
+        self.writer.close()
+
+    async def wait_closed(self):
+        """ Wait until connection is closed. """
+        if self._receiver is not None:
+            try:
+                await self._receiver
+            except asyncio.CancelledError:
+                pass
+
+        if hasattr(self.writer, 'wait_closed'):
+            await self.writer.wait_closed()
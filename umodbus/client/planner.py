@@ -0,0 +1,189 @@
+""" Plan read requests for scattered addresses.
+
+Reading every address with a separate request is slow, especially on a
+serial line. :class:`ReadPlan` groups addresses into as few requests as
+possible and maps the responses back onto the addresses::
+
+    >>> tags = [(1, 3, 0), (1, 3, 2), (1, 3, 9), (1, 3, 120), (1, 1, 4)]
+    >>> plan = ReadPlan(tags, max_gap=10)
+    >>> len(plan.adus)
+    3
+    >>> responses = [tcp.send_message(adu, sock) for adu in plan.adus]
+    >>> values = plan.scatter(responses)
+    >>> values[(1, 3, 9)]
+    1337
+
+A tag is a tuple with slave id, function code and address. Only function
+codes 1 to 4 (the read functions) are supported.
+
+"""
+from bisect import bisect_right
+
+from umodbus.client import tcp
+from umodbus.functions import (READ_COILS, READ_DISCRETE_INPUTS,
+                               READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS,
+                               ReadCoils, ReadDiscreteInputs,
+                               ReadHoldingRegisters, ReadInputRegisters)
+
+function_code_to_builder_name = {
+    READ_COILS: 'read_coils',
+    READ_DISCRETE_INPUTS: 'read_discrete_inputs',
+    READ_HOLDING_REGISTERS: 'read_holding_registers',
+    READ_INPUT_REGISTERS: 'read_input_registers',
+}
+
+function_code_to_max_quantity = {
+    READ_COILS: ReadCoils.max_quantity,
+    READ_DISCRETE_INPUTS: ReadDiscreteInputs.max_quantity,
+    READ_HOLDING_REGISTERS: ReadHoldingRegisters.max_quantity,
+    READ_INPUT_REGISTERS: ReadInputRegisters.max_quantity,
+}
+
+
+class Span(object):
+    """ Contiguous range of addresses read with a single request.
+
+    :param slave_id: Slave id.
+    :param function_code: Function code.
+    :param starting_address: First address of range.
+    :param quantity: Number of addresses in range.
+    """
+    def __init__(self, slave_id, function_code, starting_address, quantity):
+        self.slave_id = slave_id
+        self.function_code = function_code
+        self.starting_address = starting_address
+        self.quantity = quantity
+
+    def __repr__(self):
+        return '<Span slave_id={0} function_code={1} starting_address={2} ' \
+            'quantity={3}>'.format(self.slave_id, self.function_code,
+                                   self.starting_address, self.quantity)
+
+    def __eq__(self, other):
+        return isinstance(other, Span) and \
+            (self.slave_id, self.function_code, self.starting_address,
+             self.quantity) == \
+            (other.slave_id, other.function_code, other.starting_address,
+             other.quantity)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def create_adu(self, client=tcp):
+        """ Return request ADU for this span.
+
+        :param client: Module with ADU builders, :mod:`umodbus.client.tcp`
+            (default) or :mod:`umodbus.client.serial.rtu`.
+        :return: Byte array with ADU.
+        """
+        builder = getattr(client,
+                          function_code_to_builder_name[self.function_code])
+
+        return builder(self.slave_id, self.starting_address, self.quantity)
+
+
+def plan_spans(tags, max_gap=0):
+    """ Return list with the smallest number of :class:`Span` covering all
+    tags.
+
+    A span never exceeds the maximum quantity of its function: 2000 for
+    coils and discrete inputs, 125 for registers.
+
+    :param tags: Iterable with tuples of slave id, function code and address.
+    :param max_gap: Maximum number of untagged addresses a span may include
+        between 2 tagged addresses, default 0.
+    :return: List with instances of :class:`Span`, sorted by slave id,
+        function code and starting address.
+    :raises ValueError: When a tag has a function code which can't be read.
+    """
+    if max_gap < 0:
+        raise ValueError('max_gap must be 0 or larger.')
+
+    addresses = {}
+    for slave_id, function_code, address in tags:
+        if function_code not in function_code_to_max_quantity:
+            raise ValueError('Function code {0} is not a read '
+                             'function.'.format(function_code))
+
+        addresses.setdefault((slave_id, function_code), set()).add(address)
+
+    spans = []
+
+    for (slave_id, function_code), group in sorted(addresses.items()):
+        max_quantity = function_code_to_max_quantity[function_code]
+        start = previous = None
+
+        # Spans are grown greedily, every address that can't be added to
+        # the current span starts a new span.
+        for address in sorted(group):
+            if start is not None and \
+                    address - previous - 1 <= max_gap and \
+                    address - start < max_quantity:
+                previous = address
+                continue
+
+            if start is not None:
+                spans.append(Span(slave_id, function_code, start,
+                                  previous - start + 1))
+
+            start = previous = address
+
+        spans.append(Span(slave_id, function_code, start,
+                          previous - start + 1))
+
+    return spans
+
+
+class ReadPlan(object):
+    """ Plan with the smallest number of read requests to read all tags.
+
+    :param tags: Iterable with tuples of slave id, function code and address.
+    :param max_gap: Maximum number of untagged addresses a request may read
+        between 2 tagged addresses, default 0. A larger gap leads to fewer,
+        but larger requests.
+    :param client: Module with ADU builders, :mod:`umodbus.client.tcp`
+        (default) or :mod:`umodbus.client.serial.rtu`.
+    """
+    def __init__(self, tags, max_gap=0, client=tcp):
+        self.tags = list(tags)
+        self.spans = plan_spans(self.tags, max_gap)
+        self.adus = [span.create_adu(client) for span in self.spans]
+
+        # Map every tag to the index of the span reading it.
+        self._span_index = {}
+        starts = [(span.slave_id, span.function_code, span.starting_address)
+                  for span in self.spans]
+
+        for tag in self.tags:
+            self._span_index[tag] = bisect_right(starts, tag) - 1
+
+    def scatter(self, responses):
+        """ Map responses onto tags.
+
+        A response can also be an instance of :class:`Exception`, like the
+        results of :meth:`umodbus.client.tcp.Connection.send_messages`. All
+        tags read by that request are mapped to the exception.
+
+        :param responses: Sequence with parsed responses, in same order as
+            :attr:`adus`.
+        :return: Dict mapping every tag to its value.
+        :raises ValueError: When number of responses doesn't match number of
+            requests.
+        """
+        if len(responses) != len(self.spans):
+            raise ValueError('Expected {0} responses, got {1}.'.format(
+                len(self.spans), len(responses)))
+
+        values = {}
+        for tag in self.tags:
+            index = self._span_index[tag]
+            response = responses[index]
+
+            if isinstance(response, Exception):
+                values[tag] = response
+            else:
+                address = tag[2]
+                values[tag] = \
+                    response[address - self.spans[index].starting_address]
+
+        return values
@@ -0,0 +1,257 @@
+""" Pool of Modbus TCP connections, shared by threads.
+
+Many devices accept only a few connections and are slow to accept new ones.
+:class:`ConnectionPool` keeps connections open after use, so requests to the
+same device reuse them::
+
+    >>> pool = ConnectionPool(max_size=2, idle_timeout=60)
+    >>> pool.send_message(('192.168.1.10', 502),
+    ...                   tcp.read_holding_registers(1, 0, 10))
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
+
+A connection is used by 1 thread at a time. A thread which needs a
+connection to a device which already has `max_size` connections in use waits
+until one is returned.
+
+"""
+import errno
+import socket
+import threading
+from contextlib import contextmanager
+
+from umodbus.client import tcp
+from umodbus.metrics import timer
+from umodbus.exceptions import ModbusError
+
+
+class PoolClosedError(RuntimeError):
+    """ Raised when a connection is acquired from a closed pool. """
+
+
+class _Pool(object):
+    """ Connections to a single address. """
+    def __init__(self):
+        # Tuples with idle socket and time it was returned, most recently
+        # returned last.
+        self.idle = []
+        # Number of open connections, idle or in use.
+        self.size = 0
+
+
+class ConnectionPool(object):
+    """ Thread safe pool of Modbus TCP connections, per host and port.
+
+    :param max_size: Maximum number of connections per address.
+    :param idle_timeout: Seconds after which an unused connection is closed,
+        or None to keep unused connections open.
+    :param timeout: Timeout in seconds for connecting, for sending and
+        receiving and for waiting for a free connection, or None to wait
+        indefinitely.
+    :param keepalive: Seconds a connection is idle before TCP keepalive
+        probes are sent, or None to disable TCP keepalive. Platforms which
+        don't support setting this time use their default.
+    """
+    def __init__(self, max_size=2, idle_timeout=60, timeout=5, keepalive=60):
+        if max_size < 1:
+            raise ValueError('max_size must be at least 1.')
+
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.keepalive = keepalive
+
+        self._closed = False
+        self._condition = threading.Condition()
+        # Map tuple with host and port to _Pool.
+        self._pools = {}
+
+    def acquire(self, address):
+        """ Return connected socket to address, for exclusive use by the
+        caller. Return it with :meth:`release`.
+
+        :param address: Tuple with host and port.
+        :return: Connected socket.
+        :raises socket.timeout: When no connection became available in time.
+        :raises PoolClosedError: When pool has been closed.
+        """
+        deadline = None if self.timeout is None else timer() + self.timeout
+
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolClosedError('Pool has been closed.')
+
+                pool = self._pools.setdefault(address, _Pool())
+
+                sock = self._pop_idle(pool)
+
+                if sock is not None:
+                    return sock
+
+                if pool.size < self.max_size:
+                    # Connect after releasing the lock, so other addresses
+                    # don't wait for it.
+                    pool.size += 1
+                    break
+
+                remaining = None if deadline is None else deadline - timer()
+
+                if remaining is not None and remaining <= 0:
+                    raise socket.timeout('No connection to {0}:{1} became '
+                                         'available.'.format(*address))
+
+                self._condition.wait(remaining)
+
+        try:
+            return self._connect(address)
+        except Exception:
+            with self._condition:
+                pool.size -= 1
+                self._condition.notify_all()
+            raise
+
+    def release(self, address, sock, discard=False):
+        """ Return connection to pool.
+
+        :param address: Tuple with host and port.
+        :param sock: Socket returned by :meth:`acquire`.
+        :param discard: Close connection instead of returning it to the pool.
+            Discard connections which might have a response of an earlier
+            request pending or which are broken.
+        """
+        with self._condition:
+            pool = self._pools[address]
+
+            if discard or self._closed:
+                sock.close()
+                pool.size -= 1
+            else:
+                pool.idle.append((sock, timer()))
+
+            self._condition.notify_all()
+
+    @contextmanager
+    def connection(self, address):
+        """ Context manager which acquires a connection and releases it
+        afterwards. The connection is discarded if an exception other than
+        :class:`umodbus.exceptions.ModbusError` is raised::
+
+            >>> with pool.connection(('localhost', 502)) as sock:
+            ...     tcp.send_message(tcp.read_coils(1, 0, 8), sock)
+
+        :param address: Tuple with host and port.
+        """
+        sock = self.acquire(address)
+
+        try:
+            yield sock
+        except ModbusError:
+            # Server sent a proper response, the connection is fine.
+            self.release(address, sock)
+            raise
+        except Exception:
+            self.release(address, sock, discard=True)
+            raise
+        else:
+            self.release(address, sock)
+
+    def send_message(self, address, adu, retries=1):
+        """ Send ADU to server at address and return parsed response.
+
+        If a connection turns out to be closed or reset by the server, the
+        request is sent again over a new connection. This might execute a
+        request twice, if the server closed the connection after executing
+        it. Pass 0 `retries` to prevent that.
+
+        :param address: Tuple with host and port.
+        :param adu: Request ADU.
+        :param retries: Number of times a request is sent again.
+        :return: Parsed response from server.
+        :raises ModbusError: When response contains an error code.
+        :raises PoolClosedError: When pool has been closed.
+        """
+        for attempt in range(retries + 1):
+            try:
+                with self.connection(address) as sock:
+                    return tcp.send_message(adu, sock)
+            except socket.timeout:
+                raise
+            except (ValueError, socket.error):
+                # recv_exactly() raises ValueError when the server closed the
+                # connection.
+                if attempt == retries:
+                    raise
+
+    def close(self):
+        """ Close idle connections. Connections in use are closed when they
+        are released.
+        """
+        with self._condition:
+            self._closed = True
+
+            for pool in self._pools.values():
+                for sock, _ in pool.idle:
+                    sock.close()
+                    pool.size -= 1
+
+                pool.idle = []
+
+            self._condition.notify_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _pop_idle(self, pool):
+        """ Return most recently used healthy idle connection of pool, or
+        None. Expired and broken connections are closed.
+        """
+        if self.idle_timeout is not None:
+            expired = timer() - self.idle_timeout
+
+            # Idle connections are ordered by the time they were returned.
+            while pool.idle and pool.idle[0][1] < expired:
+                pool.idle.pop(0)[0].close()
+                pool.size -= 1
+
+        while pool.idle:
+            sock, _ = pool.idle.pop()
+
+            if self._is_healthy(sock):
+                return sock
+
+            sock.close()
+            pool.size -= 1
+
+    def _is_healthy(self, sock):
+        """ Return whether idle connection can be used. An idle connection is
+        readable when the server closed it, or when it sent data no request
+        is waiting for. Neither can be used.
+        """
+        # Unlike select(), a non-blocking peek works for any file descriptor,
+        # also in processes with more than FD_SETSIZE of them.
+        sock.setblocking(False)
+
+        try:
+            sock.recv(1, socket.MSG_PEEK)
+        except socket.error as e:
+            return e.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK)
+        finally:
+            sock.settimeout(self.timeout)
+
+        return False
+
+    def _connect(self, address):
+        sock = socket.create_connection(address, self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        if self.keepalive is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+            if hasattr(socket, 'TCP_KEEPIDLE'):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE,
+                                int(self.keepalive))
+
+        return sock
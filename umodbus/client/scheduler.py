@@ -0,0 +1,341 @@
+""" Poll devices periodically.
+
+:class:`PollScheduler` sends requests at fixed periods. Requests to the same
+device which are due at the same time are sent as 1 batch, pipelined over a
+:class:`umodbus.client.tcp.Connection`::
+
+    >>> scheduler = PollScheduler(executor=ThreadPoolExecutor(4))
+    >>> scheduler.add_device('plc', tcp.Connection(sock, max_in_flight=4))
+    >>> scheduler.add_poll('plc', tcp.read_holding_registers(1, 0, 10), 0.1,
+    ...                    callback=lambda poll, result: print(result))
+    >>> scheduler.add_poll('plc', tcp.read_coils(1, 0, 8), 60)
+    >>> scheduler.run()
+
+Due times are on a fixed grid: a poll with a period of 1 second is due at
+t, t + 1, t + 2, etc., no matter how long requests take. A poll which can't
+be sent in its period, because the device is still busy with an earlier batch
+or because the scheduler is late, skips that period instead of being sent
+twice in a row. Skipped periods are counted as overruns.
+
+"""
+from __future__ import division
+import heapq
+import threading
+from itertools import count
+
+from umodbus import log
+from umodbus.metrics import timer
+
+
+class Poll(object):
+    """ Request which is sent periodically. Created by
+    :meth:`PollScheduler.add_poll`.
+
+    :param device: Key of device the request is sent to.
+    :param adu: Request ADU.
+    :param period: Number of seconds between 2 requests.
+    :param callback: Function called with poll and result, or None.
+    """
+    def __init__(self, device, adu, period, callback=None):
+        self.device = device
+        self.adu = adu
+        self.period = period
+        self.callback = callback
+
+        #: Time the request is due next, according to clock of scheduler.
+        self.due = None
+        #: Number of times the request has been sent.
+        self.count = 0
+        #: Number of responses which were an exception.
+        self.errors = 0
+        #: Number of periods in which the request wasn't sent.
+        self.overruns = 0
+        #: Largest difference in seconds between the time the request was
+        #: due and the time it was sent.
+        self.max_jitter = 0.0
+
+        self._jitter_sum = 0.0
+        self._active = True
+
+    @property
+    def mean_jitter(self):
+        """ Average difference in seconds between the time the request was
+        due and the time it was sent.
+        """
+        if self.count == 0:
+            return 0.0
+
+        return self._jitter_sum / self.count
+
+    def __repr__(self):
+        return '<Poll device={0!r} period={1}>'.format(self.device,
+                                                       self.period)
+
+
+class PollScheduler(object):
+    """ Send requests to devices at fixed periods.
+
+    Every batch of requests to a device is sent with the `send_messages()`
+    method of the device's connection. A device has 1 batch in flight at a
+    time, so a :class:`umodbus.client.tcp.Connection` never has more
+    requests in flight than its `max_in_flight`.
+
+    Results are parsed responses, or exceptions. They are passed to the
+    callback of the poll and put on `queue` as a tuple with poll and result.
+
+    :param executor: Instance of :class:`concurrent.futures.Executor` to send
+        batches on, so devices are polled concurrently. Default is None,
+        which sends batches one after another on the thread calling
+        :meth:`run_pending`.
+    :param queue: Instance of :class:`queue.Queue` to put results on, or
+        None.
+    :param window: Requests to a device due within this number of seconds
+        are sent in the same batch, default 0.005. A request can be sent up
+        to `window` seconds early.
+    :param clock: Function returning the current time in seconds.
+    """
+    def __init__(self, executor=None, queue=None, window=0.005, clock=timer):
+        self.executor = executor
+        self.queue = queue
+        self.window = window
+        self.clock = clock
+
+        # Map device to its connection.
+        self._connections = {}
+        # Map device to function returning a new connection to it.
+        self._connect = {}
+        # Devices which have a batch in flight.
+        self._busy = set()
+        # Heap with tuples of due time, sequence number and poll. The
+        # sequence number keeps polls with the same due time in the order
+        # they were added.
+        self._heap = []
+        self._sequence = count()
+        self._stopped = False
+        self._condition = threading.Condition()
+
+    def add_device(self, device, connection):
+        """ Add device, or replace connection of device.
+
+        A :class:`umodbus.client.tcp.Connection` breaks after a timeout and
+        can't be used anymore. Pass a function returning a new connection
+        instead, so the device is reconnected::
+
+            >>> scheduler.add_device('plc', lambda: tcp.Connection(
+            ...     socket.create_connection(('192.168.1.10', 502), 1)))
+
+        :param device: Hashable key of device, like its host name.
+        :param connection: Instance of :class:`umodbus.client.tcp.Connection`
+            or any object with a `send_messages()` method which takes a list
+            with request ADU's and returns a list with results. Or a function
+            returning such an object, which is called before the first batch
+            is sent and again when the connection is `broken`.
+        """
+        with self._condition:
+            if callable(connection):
+                self._connections[device] = None
+                self._connect[device] = connection
+            else:
+                self._connections[device] = connection
+                self._connect.pop(device, None)
+
+    def add_poll(self, device, adu, period, callback=None, offset=0):
+        """ Send request to device every `period` seconds.
+
+        :param device: Key of device, added with :meth:`add_device`.
+        :param adu: Request ADU, created with one of the ADU builders of
+            :mod:`umodbus.client.tcp`.
+        :param period: Number of seconds between 2 requests.
+        :param callback: Function called with poll and result after every
+            request, default None. It's called on the thread which sent the
+            request.
+        :param offset: Number of seconds until the request is sent the first
+            time, default 0.
+        :return: Instance of :class:`Poll`.
+        :raises ValueError: When period isn't positive or device is unknown.
+        """
+        if period <= 0:
+            raise ValueError('period must be larger than 0.')
+
+        poll = Poll(device, adu, period, callback)
+
+        with self._condition:
+            if device not in self._connections:
+                raise ValueError('Unknown device {0!r}.'.format(device))
+
+            poll.due = self.clock() + offset
+            self._push(poll)
+            # Let run() recalculate how long it can wait.
+            self._condition.notify_all()
+
+        return poll
+
+    def remove_poll(self, poll):
+        """ Stop sending request of poll. A batch in flight might still
+        deliver a result for it.
+
+        :param poll: Instance of :class:`Poll`.
+        """
+        with self._condition:
+            poll._active = False
+
+    def run_pending(self):
+        """ Send all requests which are due, grouped per device.
+
+        :return: Number of seconds until next request is due, or None when
+            there are no polls.
+        """
+        now = self.clock()
+        batches = {}
+
+        with self._condition:
+            popped = []
+
+            while self._heap and self._heap[0][0] <= now + self.window:
+                popped.append(heapq.heappop(self._heap)[2])
+
+            for poll in popped:
+                if not poll._active:
+                    continue
+
+                due = self._advance(poll, now)
+
+                if poll.device in self._busy:
+                    # Sending it after the batch in flight is done would
+                    # poll the device twice in a row, skip this period.
+                    poll.overruns += 1
+                else:
+                    jitter = abs(now - due)
+                    poll.count += 1
+                    poll.max_jitter = max(poll.max_jitter, jitter)
+                    poll._jitter_sum += jitter
+
+                    batches.setdefault(poll.device, []).append(poll)
+
+                self._push(poll)
+
+            self._busy.update(batches)
+
+        for device, polls in batches.items():
+            if self.executor is None:
+                self._send(device, polls)
+                continue
+
+            try:
+                self.executor.submit(self._send, device, polls)
+            except Exception as e:
+                # For example because the executor has been shut down.
+                log.error('Could not submit batch for device {0!r}: '
+                          '{1!r}'.format(device, e))
+                self._fail(device, polls, e)
+
+        with self._condition:
+            return self._next_due_in()
+
+    def run(self):
+        """ Send requests when they're due until :meth:`stop` is called. """
+        try:
+            while True:
+                self.run_pending()
+
+                with self._condition:
+                    if self._stopped:
+                        return
+
+                    timeout = self._next_due_in()
+
+                    if timeout is None or timeout > 0:
+                        self._condition.wait(timeout)
+
+                    if self._stopped:
+                        return
+        finally:
+            with self._condition:
+                self._stopped = False
+
+    def stop(self):
+        """ Stop :meth:`run`. Batches in flight aren't interrupted. """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def _push(self, poll):
+        heapq.heappush(self._heap, (poll.due, next(self._sequence), poll))
+
+    def _advance(self, poll, now):
+        """ Skip periods of poll which have passed and move its due time to
+        the next period.
+
+        :return: Due time of the current period.
+        """
+        if now > poll.due:
+            missed = int((now - poll.due) // poll.period)
+            poll.due += missed * poll.period
+            poll.overruns += missed
+
+        due = poll.due
+        poll.due += poll.period
+
+        return due
+
+    def _next_due_in(self):
+        if not self._heap:
+            return None
+
+        return self._heap[0][0] - self.clock()
+
+    def _send(self, device, polls):
+        """ Send batch of requests to device and deliver results. """
+        try:
+            adus = [poll.adu for poll in polls]
+            results = self._get_connection(device).send_messages(adus)
+        except Exception as e:
+            log.error('Could not poll device {0!r}: {1!r}'.format(device, e))
+            self._fail(device, polls, e)
+            return
+
+        try:
+            for poll, result in zip(polls, results):
+                self._deliver(poll, result)
+        finally:
+            with self._condition:
+                self._busy.discard(device)
+
+    def _get_connection(self, device):
+        """ Return connection to device, connect if there's none or if it's
+        broken and the device has been added with a function to connect.
+        """
+        connection = self._connections[device]
+        connect = self._connect.get(device)
+
+        if connect is not None and \
+                (connection is None or getattr(connection, 'broken', False)):
+            # Only 1 batch per device is in flight, so no other thread
+            # replaces the connection of this device.
+            connection = self._connections[device] = connect()
+
+        return connection
+
+    def _fail(self, device, polls, e):
+        """ Deliver exception as result of batch which couldn't be sent and
+        mark device as idle.
+        """
+        try:
+            for poll in polls:
+                self._deliver(poll, e)
+        finally:
+            with self._condition:
+                self._busy.discard(device)
+
+    def _deliver(self, poll, result):
+        if isinstance(result, Exception):
+            poll.errors += 1
+
+        if poll.callback is not None:
+            try:
+                poll.callback(poll, result)
+            except Exception:
+                log.exception('Callback of {0!r} failed'.format(poll))
+
+        if self.queue is not None:
+            self.queue.put((poll, result))
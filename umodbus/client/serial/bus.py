@@ -0,0 +1,271 @@
+""" Share a Modbus RTU bus between threads.
+
+On a multi-drop bus only 1 request can be in flight. :class:`BusMaster` owns
+the serial port and sends requests queued by any number of threads one at a
+time, urgent requests first::
+
+    >>> bus = BusMaster(Serial('/dev/ttyUSB0', 19200), timeout=0.5)
+    >>> bus.start()
+    >>> bus.send_message(rtu.read_holding_registers(1, 0, 10))
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
+    >>> future = bus.submit(rtu.read_coils(2, 0, 8), priority=HIGH_PRIORITY)
+
+:meth:`BusMaster.submit` returns a :class:`concurrent.futures.Future`.
+Coroutines can await it with :func:`asyncio.wrap_future`.
+
+Between 2 frames the bus is silent for at least 3.5 characters, as the
+specification requires.
+
+.. note:: This module requires :mod:`concurrent.futures`, which on Python 2
+    is provided by the `futures` package.
+
+"""
+import time
+import struct
+import threading
+from itertools import count
+from concurrent.futures import Future
+try:
+    from queue import PriorityQueue, Empty
+except ImportError:
+    from Queue import PriorityQueue, Empty
+
+from umodbus.metrics import timer
+from umodbus.client.serial.rtu import (get_expected_response_size,
+                                       recv_response_adu, parse_response_adu,
+                                       get_char_size, MAX_ADU_SIZE)
+
+#: Priorities of requests. Requests with a lower value are sent first,
+#: requests with the same priority in the order they were submitted.
+HIGH_PRIORITY = 0
+NORMAL_PRIORITY = 1
+LOW_PRIORITY = 2
+
+
+class BusMaster(object):
+    """ Send requests queued by multiple threads over a Modbus RTU bus.
+
+    :param serial_port: Instance of :class:`serial.Serial`. It must not be
+        used by anything else.
+    :param timeout: Default number of seconds to wait for a complete
+        response, default 1.
+    :param timeouts: Dict mapping slave id to number of seconds to wait for a
+        response of that slave, default None. Give slow slaves a long timeout
+        here and use a short default timeout, so a dead slave takes little
+        time from requests to other slaves.
+    :param turnaround_delay: Number of seconds the bus is silent after a
+        broadcast, so slaves can process it, default 0.1.
+    """
+    def __init__(self, serial_port, timeout=1, timeouts=None,
+                 turnaround_delay=0.1):
+        self.serial_port = serial_port
+        self.timeout = timeout
+        self.timeouts = dict(timeouts or {})
+        self.turnaround_delay = turnaround_delay
+
+        # See docstring of get_char_size() for meaning of constant below.
+        self.frame_gap = 3.5 * get_char_size(serial_port.baudrate)
+
+        self._queue = PriorityQueue()
+        self._sequence = count()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = None
+        # Time from which the bus can be used again.
+        self._idle_at = 0
+
+    def start(self):
+        """ Start thread which sends the requests. """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('Bus master has been closed.')
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+
+    def submit(self, adu, priority=NORMAL_PRIORITY, timeout=None):
+        """ Queue request and return future with its parsed response.
+
+        The future is done with the response, which is None for a
+        broadcast, or with an exception: :class:`ValueError` when the slave
+        didn't respond in time or the response doesn't match the request,
+        :class:`umodbus.exceptions.ModbusError` when the response contains an
+        error code.
+
+        :param adu: Request ADU, created with one of the ADU builders of
+            :mod:`umodbus.client.serial.rtu`.
+        :param priority: Priority of request, default
+            :data:`NORMAL_PRIORITY`.
+        :param timeout: Number of seconds to wait for the response. Default
+            is None, which uses the timeout for the slave.
+        :return: Instance of :class:`concurrent.futures.Future`.
+        :raises RuntimeError: When bus master has been closed.
+        """
+        future = Future()
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('Bus master has been closed.')
+
+            self._queue.put((priority, next(self._sequence),
+                             (adu, timeout, future)))
+
+        return future
+
+    def send_message(self, adu, priority=NORMAL_PRIORITY, timeout=None):
+        """ Send request and return parsed response.
+
+        :param adu: Request ADU.
+        :param priority: Priority of request, default
+            :data:`NORMAL_PRIORITY`.
+        :param timeout: Number of seconds to wait for the response. Default
+            is None, which uses the timeout for the slave.
+        :return: Parsed response from slave.
+        :raises ModbusError: When response contains an error code.
+        :raises ValueError: When slave didn't respond in time or response
+            doesn't match request.
+        """
+        return self.submit(adu, priority, timeout).result()
+
+    def send_messages(self, adus, priority=NORMAL_PRIORITY):
+        """ Send all requests and return parsed responses in same order as
+        the ADU's. Exceptions are put in the list in place of the result.
+
+        With this method a bus master can be used as connection of a
+        :class:`umodbus.client.scheduler.PollScheduler`.
+
+        :param adus: Iterable with request ADU's.
+        :param priority: Priority of requests, default
+            :data:`NORMAL_PRIORITY`.
+        :return: List with parsed responses.
+        """
+        futures = [self.submit(adu, priority) for adu in adus]
+        results = []
+
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+
+        return results
+
+    def close(self):
+        """ Stop thread and cancel queued requests. The request in flight is
+        completed. The serial port isn't closed.
+        """
+        with self._lock:
+            if self._closed:
+                return
+
+            self._closed = True
+            # Wake up thread, before any queued request.
+            self._queue.put((float('-inf'), next(self._sequence), None))
+
+        if self._thread is not None:
+            self._thread.join()
+
+        while True:
+            try:
+                _, _, item = self._queue.get_nowait()
+            except Empty:
+                break
+
+            if item is not None:
+                item[-1].cancel()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run(self):
+        while True:
+            _, _, item = self._queue.get()
+
+            if item is None:
+                return
+
+            adu, timeout, future = item
+
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                result = self._send(adu, timeout)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def _send(self, adu, timeout):
+        """ Send request when bus has been silent long enough and return
+        parsed response.
+        """
+        slave_id = struct.unpack('>B', adu[:1])[0]
+
+        if timeout is None:
+            timeout = self.timeouts.get(slave_id, self.timeout)
+
+        delay = self._idle_at - timer()
+
+        if delay > 0:
+            time.sleep(delay)
+
+        # Discard late response to an earlier request which timed out.
+        self.serial_port.reset_input_buffer()
+        self.serial_port.write(adu)
+        self.serial_port.flush()
+
+        if slave_id == 0:
+            # Slaves don't respond to a broadcast.
+            self._idle_at = timer() + self.turnaround_delay
+            return None
+
+        # The response is read in multiple reads, the timeout applies to all
+        # of them together. Otherwise a slave which sends a byte now and then
+        # could hold the bus much longer.
+        deadline = timer() + timeout
+
+        def read(size):
+            remaining = deadline - timer()
+
+            if remaining <= 0:
+                return b''
+
+            self.serial_port.timeout = remaining
+            return self.serial_port.read(size)
+
+        try:
+            response_adu = recv_response_adu(read,
+                                             get_expected_response_size(adu))
+
+            # Address field and function code (without error bit) must match
+            # the request. A response of a slave which timed out earlier
+            # might arrive during this request.
+            if response_adu[:1] != adu[:1] or \
+                    struct.unpack('>B', response_adu[1:2])[0] & 0x7F != \
+                    struct.unpack('>B', adu[1:2])[0]:
+                raise ValueError('Response doesn\'t match request.')
+        except ValueError:
+            # Read remainder of late or incomplete response, so it isn't
+            # taken for the response of the next request.
+            self._discard_until_silent()
+            raise
+        finally:
+            self._idle_at = timer() + self.frame_gap
+
+        return parse_response_adu(response_adu, adu)
+
+    def _discard_until_silent(self):
+        """ Discard received bytes until the bus has been silent for 3.5
+        characters.
+        """
+        self.serial_port.timeout = self.frame_gap
+
+        while len(self.serial_port.read(MAX_ADU_SIZE)) > 0:
+            pass
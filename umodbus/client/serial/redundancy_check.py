@@ -1,8 +1,13 @@
 """ CRC is calculated over slave id + PDU.
 
 Most code is taken from: https://github.com/pyhys/minimalmodbus/blob/e99f4d74c83258c6039073082955ac9bed3f2155/minimalmodbus.py  # NOQA
+
+The CRC is calculated 2 bytes at a time using a look up table with an entry
+for every 16 bit value. That table is generated when the first CRC is
+calculated, so importing this module stays fast.
 """
 import struct
+from array import array
 
 
 def generate_look_up_table():
@@ -31,6 +36,58 @@ def generate_look_up_table():
 look_up_table = generate_look_up_table()
 
 
+def generate_16_bit_look_up_table():
+    """ Generate look up table to process 2 bytes at once.
+
+    Processing byte `b0` followed by byte `b1` only depends on
+    `register ^ (b0 | b1 << 8)`, so the result of processing both bytes
+    can be looked up using that value as index.
+
+    :return: Array with 65536 unsigned shorts.
+    """
+    return array('H', [
+        (look_up_table[x & 0xFF] >> 8) ^
+        look_up_table[(x >> 8) ^ (look_up_table[x & 0xFF] & 0xFF)]
+        for x in range(0x10000)])
+
+
+# Generated on first use by _update_crc(). Threads which generate it at
+# the same time get equal tables, so no lock is needed.
+look_up_table_16 = None
+
+
+def _update_crc(register, msg):
+    """ Process message and return new value of CRC register.
+
+    :param register: Current value of CRC register.
+    :param msg: A byte array.
+    :return: Integer.
+    """
+    global look_up_table_16
+
+    size = len(msg)
+    odd = size % 2
+
+    if size > 1:
+        if look_up_table_16 is None:
+            look_up_table_16 = generate_16_bit_look_up_table()
+
+        # Each little-endian word contains 2 bytes of message, in order.
+        words = struct.unpack('<{0}H'.format(size // 2),
+                              msg[:size - 1] if odd else msg)
+
+        for word in words:
+            register = look_up_table_16[register ^ word]
+
+    if odd:
+        # Using bytearray gets an int, also on Python 2.
+        last_byte = bytearray(msg[-1:])[0]
+        register = \
+            (register >> 8) ^ look_up_table[(register ^ last_byte) & 0xFF]
+
+    return register
+
+
 def get_crc(msg):
     """ Return CRC of 2 byte for message.
 
@@ -39,21 +96,68 @@ def get_crc(msg):
     :param msg: A byte array.
     :return: Byte array of 2 bytes.
     """
-    register = 0xFFFF
+    # CRC is little-endian!
+    return struct.pack('<H', _update_crc(0xFFFF, msg))
 
-    for byte_ in msg:
-        try:
-            val = struct.unpack('<B', byte_)[0]
-        # Iterating over a bit-like objects in Python 3 gets you ints.
-        # Because fuck logic.
-        except TypeError:
-            val = byte_
 
-        register = \
-            (register >> 8) ^ look_up_table[(register ^ val) & 0xFF]
+class Crc16(object):
+    """ Incremental CRC calculation, useful to calculate the CRC of a frame
+    while its bytes arrive::
+
+        >>> crc = Crc16()
+        >>> crc.update(b'\x02')
+        >>> crc.update(b'\x07')
+        >>> crc.digest()
+        b'A\x12'
+
+    :param msg: Optional byte array to start with.
+    """
+    def __init__(self, msg=b''):
+        self.register = 0xFFFF
+        self.update(msg)
+
+    def update(self, msg):
+        """ Add bytes to message.
+
+        :param msg: A byte array.
+        """
+        self.register = _update_crc(self.register, msg)
 
+    def digest(self):
+        """ Return CRC of all bytes added so far.
+
+        :return: Byte array of 2 bytes.
+        """
+        return struct.pack('<H', self.register)
+
+    def copy(self):
+        """ Return copy of this instance. """
+        other = Crc16()
+        other.register = self.register
+        return other
+
+
+def pack_adu(address, pdu):
+    """ Return ADU with address field, PDU and CRC for Modbus RTU.
+
+    All parts are packed into a single buffer, instead of concatenating them.
+    Servers send this buffer as is. The request builders of
+    :mod:`umodbus.client.serial.rtu` copy it into a
+    :class:`umodbus.client.serial.rtu.RequestADU`.
+
+    :param address: Address field, the slave id.
+    :param pdu: A byte array.
+    :return: Bytearray with ADU.
+    """
+    adu = bytearray(len(pdu) + 3)
+    adu[0] = address
+    adu[1:-2] = pdu
+
+    register = _update_crc(0xFFFF, memoryview(adu)[:-2])
     # CRC is little-endian!
-    return struct.pack('<H', register)
+    struct.pack_into('<H', adu, len(adu) - 2, register)
+
+    return adu
 
 
 def add_crc(msg):
@@ -71,8 +175,9 @@ def validate_crc(msg):
     :param msg: Byte array with message with CRC.
     :raise: CRCError.
     """
-    if not struct.unpack('<H', get_crc(msg[:-2])) ==\
-            struct.unpack('<H', msg[-2:]):
+    # Appending the CRC of a message to that message results in a message
+    # which has a CRC of 0.
+    if len(msg) < 2 or _update_crc(0xFFFF, msg) != 0:
         raise CRCError('CRC validation failed.')
 
 
@@ -42,9 +42,10 @@ The lenght of this ADU is 8 bytes::
     8
 
 """
+from __future__ import division
 import struct
 
-from umodbus.client.serial.redundancy_check import get_crc, validate_crc
+from umodbus.client.serial.redundancy_check import pack_adu, validate_crc
 from umodbus.functions import (create_function_from_response_pdu,
                                expected_response_pdu_size_from_request_pdu,
                                pdu_to_function_code_or_raise_error, ReadCoils,
@@ -54,17 +55,39 @@ from umodbus.functions import (create_function_from_response_pdu,
                                WriteMultipleRegisters)
 from umodbus.utils import recv_exactly
 
+# 256 is the maximum size of a Modbus RTU frame.
+MAX_ADU_SIZE = 256
 
-def _create_request_adu(slave_id, req_pdu):
+
+class RequestADU(bytes):
+    """ Byte array with request ADU which also knows the size of the response
+    ADU. :func:`send_message` uses this size to read the response, so the
+    request doesn't have to be parsed again.
+
+    Slicing or concatenating a :class:`RequestADU` returns plain bytes.
+    """
+    #: Size of response ADU in bytes, None if unknown.
+    expected_response_size = None
+
+
+def _create_request_adu(slave_id, req_pdu, expected_response_pdu_size=None):
     """ Return request ADU for Modbus RTU.
 
     :param slave_id: Slave id.
     :param req_pdu: Byte array with PDU.
-    :return: Byte array with ADU.
+    :param expected_response_pdu_size: Size of response PDU in bytes, default
+        None.
+    :return: Instance of :class:`RequestADU`.
     """
-    first_part_adu = struct.pack('>B', slave_id) + req_pdu
+    # RequestADU is immutable like bytes, so the buffer of pack_adu() is
+    # copied once. Request ADU's are at most 256 bytes.
+    adu = RequestADU(pack_adu(slave_id, req_pdu))
 
-    return first_part_adu + get_crc(first_part_adu)
+    if expected_response_pdu_size is not None:
+        # Address field (1 byte) and CRC (2 bytes) surround the PDU.
+        adu.expected_response_size = expected_response_pdu_size + 3
+
+    return adu
 
 
 def read_coils(slave_id, starting_address, quantity):
@@ -77,7 +100,8 @@ def read_coils(slave_id, starting_address, quantity):
     function.starting_address = starting_address
     function.quantity = quantity
 
-    return _create_request_adu(slave_id, function.request_pdu)
+    return _create_request_adu(slave_id, function.request_pdu,
+                               function.expected_response_pdu_size)
 
 
 def read_discrete_inputs(slave_id, starting_address, quantity):
@@ -90,7 +114,8 @@ def read_discrete_inputs(slave_id, starting_address, quantity):
     function.starting_address = starting_address
     function.quantity = quantity
 
-    return _create_request_adu(slave_id, function.request_pdu)
+    return _create_request_adu(slave_id, function.request_pdu,
+                               function.expected_response_pdu_size)
 
 
 def read_holding_registers(slave_id, starting_address, quantity):
@@ -103,7 +128,8 @@ def read_holding_registers(slave_id, starting_address, quantity):
     function.starting_address = starting_address
     function.quantity = quantity
 
-    return _create_request_adu(slave_id, function.request_pdu)
+    return _create_request_adu(slave_id, function.request_pdu,
+                               function.expected_response_pdu_size)
 
 
 def read_input_registers(slave_id, starting_address, quantity):
@@ -116,7 +142,8 @@ def read_input_registers(slave_id, starting_address, quantity):
     function.starting_address = starting_address
     function.quantity = quantity
 
-    return _create_request_adu(slave_id, function.request_pdu)
+    return _create_request_adu(slave_id, function.request_pdu,
+                               function.expected_response_pdu_size)
 
 
 def write_single_coil(slave_id, address, value):
@@ -129,7 +156,8 @@ def write_single_coil(slave_id, address, value):
     function.address = address
     function.value = value
 
-    return _create_request_adu(slave_id, function.request_pdu)
+    return _create_request_adu(slave_id, function.request_pdu,
+                               function.expected_response_pdu_size)
 
 
 def write_single_register(slave_id, address, value):
@@ -142,7 +170,8 @@ def write_single_register(slave_id, address, value):
     function.address = address
     function.value = value
 
-    return _create_request_adu(slave_id, function.request_pdu)
+    return _create_request_adu(slave_id, function.request_pdu,
+                               function.expected_response_pdu_size)
 
 
 def write_multiple_coils(slave_id, starting_address, values):
@@ -155,7 +184,8 @@ def write_multiple_coils(slave_id, starting_address, values):
     function.starting_address = starting_address
     function.values = values
 
-    return _create_request_adu(slave_id, function.request_pdu)
+    return _create_request_adu(slave_id, function.request_pdu,
+                               function.expected_response_pdu_size)
 
 
 def write_multiple_registers(slave_id, starting_address, values):
@@ -168,7 +198,8 @@ def write_multiple_registers(slave_id, starting_address, values):
     function.starting_address = starting_address
     function.values = values
 
-    return _create_request_adu(slave_id, function.request_pdu)
+    return _create_request_adu(slave_id, function.request_pdu,
+                               function.expected_response_pdu_size)
 
 
 def parse_response_adu(resp_adu, req_adu=None):
@@ -202,6 +233,74 @@ def raise_for_exception_adu(resp_adu):
     pdu_to_function_code_or_raise_error(resp_pdu)
 
 
+def get_char_size(baudrate):
+    """ Get the size of 1 character in seconds.
+
+    From the implementation guide:
+
+        "The implementation of RTU reception driver may imply the management of
+        a lot of interruptions due to the t 1.5  and t 3.5  timers. With high
+
+        communication baud rates, this leads to a heavy CPU load. Consequently
+        these two timers must be strictly respected when the baud rate is equal
+        or lower than 19200 Bps. For baud rates greater than 19200 Bps, fixed
+        values for the 2 timers should be used:  it is recommended to use a
+        value of 750us for the inter-character time-out (t 1.5) and a value of
+        1.750ms for inter-frame delay (t 3.5)."
+    """
+    if baudrate <= 19200:
+        # One frame is 11 bits.
+        return 11 / baudrate
+
+    # 750 us / 1.5 = 500 us or 0.0005 s.
+    return 0.0005
+
+
+def get_expected_response_size(adu):
+    """ Return size of response ADU for request ADU.
+
+    :param adu: Request ADU.
+    :return: Number of bytes.
+    """
+    size = getattr(adu, 'expected_response_size', None)
+
+    if size is None:
+        size = expected_response_pdu_size_from_request_pdu(adu[1:-2]) + 3
+
+    return size
+
+
+def recv_response_adu(recv_fn, expected_response_size):
+    """ Read response ADU using at most 2 calls of `recv_fn`, if it returns
+    all requested bytes at once.
+
+    First the address field and function code are read. The function code
+    tells whether the response is an exception response of 5 bytes or a
+    normal response of `expected_response_size` bytes. Then the remainder is
+    read at once.
+
+    This takes as many reads as reading the first 5 bytes and then the
+    remainder. The difference is that `expected_response_size` is passed
+    in, so the request isn't parsed again to find it.
+
+    :param recv_fn: Function that can return up to given bytes
+        (i.e. serial_port.read).
+    :param expected_response_size: Size of normal response ADU in bytes.
+    :return: Byte string with response ADU.
+    :raises ValueError: Could not receive enough data (usually timeout).
+    """
+    header = recv_exactly(recv_fn, 2)
+    function_code = struct.unpack('>B', header[1:2])[0]
+
+    if function_code & 0x80:
+        # Exception response contains an error code (1 byte) and CRC.
+        remainder = 3
+    else:
+        remainder = expected_response_size - 2
+
+    return header + recv_exactly(recv_fn, remainder)
+
+
 def send_message(adu, serial_port):
     """ Send ADU over serial to to server and return parsed response.
 
@@ -212,14 +311,7 @@ def send_message(adu, serial_port):
     serial_port.write(adu)
     serial_port.flush()
 
-    # Check exception ADU (which is shorter than all other responses) first.
-    exception_adu_size = 5
-    response_error_adu = recv_exactly(serial_port.read, exception_adu_size)
-    raise_for_exception_adu(response_error_adu)
-
-    expected_response_size = \
-        expected_response_pdu_size_from_request_pdu(adu[1:-2]) + 3
-    response_remainder = recv_exactly(
-        serial_port.read, expected_response_size - exception_adu_size)
+    response_adu = recv_response_adu(serial_port.read,
+                                     get_expected_response_size(adu))
 
-    return parse_response_adu(response_error_adu + response_remainder, adu)
+    return parse_response_adu(response_adu, adu)
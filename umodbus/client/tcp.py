@@ -85,6 +85,9 @@ byte) + PDU (5 bytes).
 import struct
 from random import randint
 
+from umodbus import log
+from umodbus.codec import MBAP
+from umodbus.exceptions import ModbusError
 from umodbus.functions import (create_function_from_response_pdu,
                                expected_response_pdu_size_from_request_pdu,
                                pdu_to_function_code_or_raise_error, ReadCoils,
@@ -92,7 +95,7 @@ from umodbus.functions import (create_function_from_response_pdu,
                                ReadInputRegisters, WriteSingleCoil,
                                WriteSingleRegister, WriteMultipleCoils,
                                WriteMultipleRegisters)
-from umodbus.utils import recv_exactly
+from umodbus.utils import recv_exactly, unpack_mbap
 
 
 def _create_request_adu(slave_id, pdu):
@@ -116,7 +119,7 @@ def _create_mbap_header(slave_id, pdu):
     transaction_id = randint(0, 65535)
     length = len(pdu) + 1
 
-    return struct.pack('>HHHB', transaction_id, 0, length, slave_id)
+    return MBAP.pack(transaction_id, 0, length, slave_id)
 
 
 def read_coils(slave_id, starting_address, quantity):
@@ -267,3 +270,182 @@ def send_message(adu, sock):
         sock.recv, expected_response_size - exception_adu_size)
 
     return parse_response_adu(response_error_adu + response_remainder, adu)
+
+
+class ConnectionBrokenError(ValueError):
+    """ Raised when a :class:`Connection` is used after a request failed to
+    be sent or a response failed to be received.
+    """
+
+
+class Connection(object):
+    """ Modbus TCP connection which can have multiple requests in flight.
+
+    Each request gets a transaction id from a counter, which replaces the
+    transaction id of the ADU. Responses are matched against requests by
+    their transaction id, so a server is free to respond in any order::
+
+        >>> conn = Connection(create_connection(('localhost', 502)))
+        >>> conn.send_messages([read_coils(1, 0, 10),
+        ...                     read_holding_registers(1, 0, 10)])
+        [[0, 1, 0, 1, 0, 1, 0, 1, 0, 1], [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]]
+
+    A connection is not thread safe.
+
+    When sending a request or receiving a response fails, for example because
+    of a timeout, the connection is broken: the socket is closed and
+    further use raises :class:`ConnectionBrokenError`. Create a new
+    connection to continue.
+
+    :param sock: Connected socket.
+    :param max_in_flight: Maximum number of requests awaiting a response.
+        :meth:`send` reads responses when this number is reached.
+    """
+    def __init__(self, sock, max_in_flight=16):
+        if not (1 <= max_in_flight <= 0xFFFF):
+            raise ValueError('max_in_flight must be between 1 and 65535.')
+
+        self.sock = sock
+        self.max_in_flight = max_in_flight
+
+        self._transaction_id = 0
+        # Map transaction id of requests awaiting a response to request ADU.
+        self._in_flight = {}
+        # Map transaction id to responses that have been received, but not
+        # yet collected by receive().
+        self._received = {}
+
+        #: Whether sending or receiving failed, see
+        #: :class:`ConnectionBrokenError`.
+        self.broken = False
+
+    @property
+    def in_flight(self):
+        """ Number of requests awaiting a response. """
+        return len(self._in_flight)
+
+    def _next_transaction_id(self):
+        while True:
+            # 65535 = (2**16)-1 aka maximum number that fits in 2 bytes.
+            self._transaction_id = (self._transaction_id + 1) & 0xFFFF
+
+            if self._transaction_id not in self._in_flight and \
+                    self._transaction_id not in self._received:
+                return self._transaction_id
+
+    def send(self, adu):
+        """ Send request ADU without waiting for response and return its
+        transaction id.
+
+        :param adu: Request ADU.
+        :return: Transaction id of the request.
+        :raises ConnectionBrokenError: When connection is broken.
+        """
+        self._raise_if_broken()
+
+        while len(self._in_flight) >= self.max_in_flight:
+            self._receive_one()
+
+        transaction_id = self._next_transaction_id()
+        adu = struct.pack('>H', transaction_id) + adu[2:]
+
+        try:
+            self.sock.sendall(adu)
+        except Exception:
+            # Part of the request might have been sent.
+            self._break()
+            raise
+
+        self._in_flight[transaction_id] = adu
+
+        return transaction_id
+
+    def receive(self, transaction_id):
+        """ Return parsed response for request with given transaction id.
+        Responses to other requests received in the meantime are kept until
+        they are asked for.
+
+        :param transaction_id: Transaction id returned by :meth:`send`.
+        :return: Parsed response from server.
+        :raises ModbusError: When response contains an error code.
+        :raises KeyError: When transaction id is unknown.
+        :raises ConnectionBrokenError: When connection is broken.
+        """
+        self._raise_if_broken()
+
+        if transaction_id not in self._received and \
+                transaction_id not in self._in_flight:
+            raise KeyError(transaction_id)
+
+        while transaction_id not in self._received:
+            self._receive_one()
+
+        req_adu, resp_adu = self._received.pop(transaction_id)
+
+        return parse_response_adu(resp_adu, req_adu)
+
+    def send_message(self, adu):
+        """ Send ADU to server and return parsed response.
+
+        :param adu: Request ADU.
+        :return: Parsed response from server.
+        """
+        return self.receive(self.send(adu))
+
+    def send_messages(self, adus):
+        """ Send all ADU's, with at most :attr:`max_in_flight` in flight at
+        once, and return parsed responses in same order as the ADU's.
+
+        If a response contains an error code, the :class:`ModbusError` is put
+        in the list in place of the result.
+
+        :param adus: Iterable with request ADU's.
+        :return: List with parsed responses.
+        """
+        transaction_ids = [self.send(adu) for adu in adus]
+        results = []
+
+        for transaction_id in transaction_ids:
+            try:
+                results.append(self.receive(transaction_id))
+            except ModbusError as e:
+                results.append(e)
+
+        return results
+
+    def _receive_one(self):
+        """ Read 1 response from socket and store it. Responses with an
+        unknown transaction id are discarded.
+
+        :raises ValueError: Could not receive enough data (usually timeout).
+        """
+        try:
+            mbap = recv_exactly(self.sock.recv, 7)
+            transaction_id, _, length, _ = unpack_mbap(mbap)
+            resp_adu = mbap + recv_exactly(self.sock.recv, length - 1)
+        except Exception:
+            # The stream might end in the middle of a response, so the next
+            # read wouldn't start at a MBAP header.
+            self._break()
+            raise
+
+        try:
+            req_adu = self._in_flight.pop(transaction_id)
+        except KeyError:
+            log.warning('Discard response with unknown transaction id '
+                        '{0}.'.format(transaction_id))
+            return
+
+        self._received[transaction_id] = (req_adu, resp_adu)
+
+    def _break(self):
+        """ Close socket and forget requests in flight. """
+        self.broken = True
+        self._in_flight.clear()
+        self._received.clear()
+        self.sock.close()
+
+    def _raise_if_broken(self):
+        if self.broken:
+            raise ConnectionBrokenError('Connection is broken, create a new '
+                                        'one.')
@@ -0,0 +1,68 @@
+""" Precompiled structs to (un)pack PDU's.
+
+:func:`struct.pack` and :func:`struct.unpack` compile their format string on
+every call, unless the format is still in the small cache of :mod:`struct`.
+PDU's with a variable number of values, like responses of Read Holding
+Registers, need a different format for every quantity and every type of
+value. Building those formats and compiling them on every request is
+expensive.
+
+:func:`get_struct` returns a :class:`struct.Struct` which has been compiled
+once for a combination of header, quantity and format character::
+
+    >>> get_struct('BB', 3, 'H').format
+    '>BBHHH'
+
+"""
+import struct
+
+# Map (header, quantity, format character) to compiled struct. The number of
+# keys is limited, because the quantity of a PDU is limited to 2 bytes.
+_structs = {}
+
+
+def get_struct(header, quantity=0, format_character=''):
+    """ Return big endian :class:`struct.Struct` with a header followed by
+    quantity times format character.
+
+    :param header: Format characters of fixed part of struct, without byte
+        order character.
+    :param quantity: Number of values following the header, default 0.
+    :param format_character: Format character of values, like
+        :attr:`umodbus.config.Config.TYPE_CHAR`.
+    :return: Instance of :class:`struct.Struct`.
+    """
+    key = (header, quantity, format_character)
+
+    try:
+        return _structs[key]
+    except KeyError:
+        s = _structs[key] = \
+            struct.Struct('>' + header + format_character * quantity)
+
+        return s
+
+
+# Structs of fixed size parts of PDU's.
+
+#: Unsigned byte, like a function code or byte count.
+UNSIGNED_BYTE = struct.Struct('>B')
+
+#: Unsigned short, like an address or quantity.
+UNSIGNED_SHORT = struct.Struct('>H')
+
+#: Function code followed by 2 unsigned shorts, like a request PDU of Read
+#: Coils.
+FUNCTION_CODE_AND_2_SHORTS = struct.Struct('>BHH')
+
+#: Function code, starting address, quantity and byte count. This is the
+#: header of request PDU's of Write Multiple Coils and Write Multiple
+#: Registers.
+WRITE_MULTIPLE_HEADER = struct.Struct('>BHHB')
+
+#: 2 unsigned shorts, like starting address and quantity in a response PDU of
+#: Write Multiple Coils.
+TWO_SHORTS = struct.Struct('>HH')
+
+#: MBAP header of Modbus TCP: transaction id, protocol id, length and unit id.
+MBAP = struct.Struct('>HHHB')
@@ -27,9 +27,12 @@ class Config(object):
         modify this value.
 
     """
+
     def __init__(self):
         self.SIGNED_VALUES = os.environ.get('UMODBUS_SIGNED_VALUES', False)
         self.BIT_SIZE = os.environ.get('UMODBUS_BIT_SIZE', 16)
+        self.COMPACT_BIT_VALUES = \
+            os.environ.get('UMODBUS_COMPACT_BIT_VALUES', False)
 
     @property
     def TYPE_CHAR(self):
@@ -89,3 +92,23 @@ class Config(object):
         """
         self._BIT_SIZE = value
         self._set_multi_bit_value_format_character()
+
+    @property
+    def COMPACT_BIT_VALUES(self):
+        """ Whether single bit values unpacked from PDU's, like the status of
+        coils in a response of Read Coils, are returned as a bytearray instead
+        of a list. A bytearray contains 1 byte per value and is cheaper to
+        create for large quantities. Default is False.
+
+        This value can also be set using the environment variable
+        `UMODBUS_COMPACT_BIT_VALUES`.
+        """
+        return self._COMPACT_BIT_VALUES
+
+    @COMPACT_BIT_VALUES.setter
+    def COMPACT_BIT_VALUES(self, value):
+        """ Set whether single bit values are returned as a bytearray.
+
+        :param value: Boolean indicating if values are compact or not.
+        """
+        self._COMPACT_BIT_VALUES = value
@@ -0,0 +1,344 @@
+""" Data stores which hold the coils, discrete inputs, holding registers and
+input registers of units.
+
+A data store binds block routes for all its tables to a route map. Requests
+are served by slicing the tables, without calling an endpoint per address::
+
+    >>> store = DataStore(unit_ids=[1, 2], size=100)
+    >>> store.bind(server.route_map)
+    >>> store[1].holding_registers[0:3] = [1, 2, 3]
+    >>> store[1].holding_registers[0:3]
+    [1, 2, 3]
+
+:class:`DataStore` keeps its tables in the memory of the process.
+:class:`SharedDataStore` keeps them in shared memory, so they can be used by
+multiple processes.
+
+Coils and discrete inputs take 1 byte per value, registers 2 bytes. Register
+values are unsigned, unless :attr:`umodbus.config.Config.SIGNED_VALUES` is
+set.
+
+.. note:: :class:`SharedDataStore` requires Python 3.3 or newer.
+
+"""
+import os
+import mmap
+from array import array
+
+from umodbus import conf
+from umodbus.functions import (READ_COILS, READ_DISCRETE_INPUTS,
+                               READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS,
+                               WRITE_SINGLE_COIL, WRITE_SINGLE_REGISTER,
+                               WRITE_MULTIPLE_COILS, WRITE_MULTIPLE_REGISTERS)
+
+COILS = 'coils'
+DISCRETE_INPUTS = 'discrete_inputs'
+HOLDING_REGISTERS = 'holding_registers'
+INPUT_REGISTERS = 'input_registers'
+
+# Name, format character, function codes for reading and function codes for
+# writing of every table.
+_table_specs = [
+    (COILS, 'B', [READ_COILS], [WRITE_SINGLE_COIL, WRITE_MULTIPLE_COILS]),
+    (DISCRETE_INPUTS, 'B', [READ_DISCRETE_INPUTS], []),
+    (HOLDING_REGISTERS, 'H', [READ_HOLDING_REGISTERS],
+     [WRITE_SINGLE_REGISTER, WRITE_MULTIPLE_REGISTERS]),
+    (INPUT_REGISTERS, 'H', [READ_INPUT_REGISTERS], []),
+]
+
+# Number of bytes per value.
+_value_size = {'B': 1, 'H': 2}
+
+function_code_to_table = dict(
+    (function_code, name)
+    for name, _, read_codes, write_codes in _table_specs
+    for function_code in read_codes + write_codes)
+
+
+class ArrayTable(object):
+    """ Values of a table of a unit, like its holding registers, in an
+    :class:`array.array`. It can be indexed and sliced like a list. Slices are
+    returned as list. Assigning to a slice doesn't change the size of the
+    table, so the number of values must equal the size of the slice.
+
+    :param size: Number of values.
+    :param format_character: 'B' for bits, 'H' for registers.
+    """
+    def __init__(self, size, format_character):
+        self.format_character = format_character
+        self._values = array(format_character, [0]) * size
+
+    @property
+    def _signed(self):
+        return self.format_character == 'H' and conf.SIGNED_VALUES
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self._to_signed(self._values[index])
+
+        values = self._values[index].tolist()
+
+        if self._signed:
+            values = [v - 0x10000 if v > 0x7FFF else v for v in values]
+
+        return values
+
+    def __setitem__(self, index, value):
+        if not isinstance(index, slice):
+            self._values[index] = self._to_unsigned(value)
+            return
+
+        if self._signed:
+            value = [v + 0x10000 if v < 0 else v for v in value]
+
+        value = array(self.format_character, value)
+
+        if len(value) != len(range(*index.indices(len(self._values)))):
+            raise ValueError('Number of values must equal size of slice.')
+
+        self._values[index] = value
+
+    def _to_signed(self, value):
+        if self._signed and value > 0x7FFF:
+            return value - 0x10000
+
+        return value
+
+    def _to_unsigned(self, value):
+        if self._signed and value < 0:
+            return value + 0x10000
+
+        return value
+
+    def release(self):
+        """ Free values. The table can't be used anymore. """
+        self._values = array(self.format_character)
+
+
+class MemoryTable(object):
+    """ Values of a table of a unit, like its holding registers, in a buffer.
+    It can be indexed and sliced like a list. Slices are returned as list.
+    Assigning to a slice doesn't change the size of the table, so the number
+    of values must equal the size of the slice.
+
+    :param buffer: Writable buffer, like a bytearray, with 1 byte per value
+        for bits and 2 bytes per value for registers.
+    :param format_character: 'B' for bits, 'H' for registers.
+    """
+    def __init__(self, buffer, format_character):
+        raw = memoryview(buffer).cast('B')
+
+        self.format_character = format_character
+        self._unsigned = raw.cast(format_character)
+        self._signed = raw.cast(format_character.lower())
+
+    @property
+    def _view(self):
+        if self.format_character == 'H' and conf.SIGNED_VALUES:
+            return self._signed
+
+        return self._unsigned
+
+    def __len__(self):
+        return len(self._unsigned)
+
+    def __getitem__(self, index):
+        value = self._view[index]
+
+        if isinstance(index, slice):
+            return value.tolist()
+
+        return value
+
+    def __setitem__(self, index, value):
+        view = self._view
+
+        if isinstance(index, slice):
+            value = array(view.format, value)
+
+        view[index] = value
+
+    def release(self):
+        """ Release views on the buffer. The table can't be used anymore. """
+        self._unsigned.release()
+        self._signed.release()
+
+
+class Unit(object):
+    """ Tables of a single unit.
+
+    :param tables: Dict mapping name of table to :class:`ArrayTable` or
+        :class:`MemoryTable`.
+    """
+    def __init__(self, tables):
+        self.coils = tables[COILS]
+        self.discrete_inputs = tables[DISCRETE_INPUTS]
+        self.holding_registers = tables[HOLDING_REGISTERS]
+        self.input_registers = tables[INPUT_REGISTERS]
+
+    def tables(self):
+        return [self.coils, self.discrete_inputs, self.holding_registers,
+                self.input_registers]
+
+
+class AbstractDataStore(object):
+    """ Base class of data stores. Subclasses implement :meth:`_create_table`.
+
+    :param unit_ids: Iterable with unit ids.
+    :param size: Number of values in each table, default 65536.
+    """
+    def __init__(self, unit_ids, size=65536):
+        self.unit_ids = list(unit_ids)
+        self.size = size
+
+        self._units = {}
+
+        for unit_id in self.unit_ids:
+            self._units[unit_id] = Unit(dict(
+                (name, self._create_table(format_character))
+                for name, format_character, _, _ in _table_specs))
+
+    def _create_table(self, format_character):
+        """ Return table with :attr:`size` values, initialized with zeros.
+
+        :param format_character: 'B' for bits, 'H' for registers.
+        """
+        raise NotImplementedError
+
+    def __getitem__(self, unit_id):
+        """ Return :class:`Unit` with tables of unit.
+
+        :param unit_id: Unit id.
+        :raises KeyError: When store doesn't contain unit.
+        """
+        return self._units[unit_id]
+
+    def __contains__(self, unit_id):
+        return unit_id in self._units
+
+    def bind(self, route_map):
+        """ Add block rules to route map for reading and writing all tables.
+
+        :param route_map: Instance of :class:`umodbus.route.Map`, like
+            `server.route_map`.
+        """
+        addresses = range(self.size)
+
+        read_codes = []
+        write_codes = []
+
+        for _, _, read, write in _table_specs:
+            read_codes.extend(read)
+            write_codes.extend(write)
+
+        route_map.add_block_rule(self.read, self.unit_ids, read_codes,
+                                 addresses)
+        route_map.add_block_rule(self.write, self.unit_ids, write_codes,
+                                 addresses)
+
+    def read(self, slave_id, function_code, starting_address, quantity):
+        """ Endpoint for block routes reading values.
+
+        :return: List with values.
+        """
+        table = getattr(self._units[slave_id],
+                        function_code_to_table[function_code])
+
+        return table[starting_address:starting_address + quantity]
+
+    def write(self, slave_id, function_code, starting_address, values):
+        """ Endpoint for block routes writing values. """
+        table = getattr(self._units[slave_id],
+                        function_code_to_table[function_code])
+
+        table[starting_address:starting_address + len(values)] = values
+
+    def close(self):
+        """ Release all tables. """
+        for unit in self._units.values():
+            for table in unit.tables():
+                table.release()
+
+        self._units = {}
+
+
+class DataStore(AbstractDataStore):
+    """ Data store in memory of the process. Each table is an
+    :class:`array.array`, a table with 65536 registers takes 128 KB.
+
+        >>> store = DataStore(unit_ids=[1], size=100)
+        >>> store.bind(server.route_map)
+
+    :param unit_ids: Iterable with unit ids.
+    :param size: Number of values in each table, default 65536.
+    """
+    def _create_table(self, format_character):
+        return ArrayTable(self.size, format_character)
+
+
+class SharedDataStore(AbstractDataStore):
+    """ Data store in shared memory, for servers which handle requests in
+    multiple processes, like :class:`umodbus.server.prefork.PreforkServer`.
+    A value written by 1 process is visible to all processes.
+
+    By default the memory is an anonymous mapping which is shared with
+    processes forked after the store has been created. If `path` is given,
+    the memory is mapped from that file instead. Other processes can open the
+    store by creating a :class:`SharedDataStore` with the same path, unit ids
+    and size.
+
+    Writing multiple values isn't atomic, a concurrent read in another
+    process might see only part of them.
+
+    :param unit_ids: Iterable with unit ids.
+    :param size: Number of values in each table, default 65536.
+    :param path: Path of file to map, default None.
+    """
+    def __init__(self, unit_ids, size=65536, path=None):
+        unit_ids = list(unit_ids)
+
+        self.path = path
+        self._mmap = self._map(len(unit_ids) *
+                               sum(size * _value_size[format_character]
+                                   for _, format_character, _, _
+                                   in _table_specs))
+        self._offset = 0
+
+        super(SharedDataStore, self).__init__(unit_ids, size)
+
+    def _map(self, length):
+        """ Return mmap of length bytes, initialized with zeros. """
+        if self.path is None:
+            return mmap.mmap(-1, length)
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+
+        try:
+            if os.fstat(fd).st_size < length:
+                os.ftruncate(fd, length)
+
+            return mmap.mmap(fd, length)
+        finally:
+            os.close(fd)
+
+    def _create_table(self, format_character):
+        length = self.size * _value_size[format_character]
+
+        with memoryview(self._mmap) as view:
+            table = MemoryTable(view[self._offset:self._offset + length],
+                                format_character)
+
+        self._offset += length
+
+        return table
+
+    def close(self):
+        """ Release all tables and unmap memory. """
+        super(SharedDataStore, self).close()
+
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
@@ -66,16 +66,17 @@ except ImportError:
     # Earlier versions have inspect.getargspec.
     from inspect import getargspec as getfullargspec
 
-try:
-    from functools import reduce
-except ImportError:
-    pass
-
 from umodbus import conf, log
+from umodbus.bits import pack_bits, unpack_bits
+from umodbus.codec import (get_struct, UNSIGNED_BYTE, UNSIGNED_SHORT,
+                           FUNCTION_CODE_AND_2_SHORTS, WRITE_MULTIPLE_HEADER,
+                           TWO_SHORTS)
 from umodbus.exceptions import (error_code_to_exception_map,
                                 IllegalDataValueError, IllegalFunctionError,
-                                IllegalDataAddressError)
-from umodbus.utils import memoize, get_function_code_from_request_pdu
+                                IllegalDataAddressError,
+                                ServerDeviceFailureError)
+from umodbus.utils import (memoize, to_bytes,
+                           get_function_code_from_request_pdu)
 
 # Function related to data access.
 READ_COILS = 1
@@ -111,10 +112,10 @@ def pdu_to_function_code_or_raise_error(resp_pdu):
     :return: Subclass of :class:`ModbusFunction` matching the response.
     :raises ModbusError: When response contains error code.
     """
-    function_code = struct.unpack('>B', resp_pdu[0:1])[0]
+    function_code = UNSIGNED_BYTE.unpack(resp_pdu[0:1])[0]
 
     if function_code not in function_code_to_function_map.keys():
-        error_code = struct.unpack('>B', resp_pdu[1:2])[0]
+        error_code = UNSIGNED_BYTE.unpack(resp_pdu[1:2])[0]
         raise error_code_to_exception_map[error_code]
 
     return function_code
@@ -140,10 +141,25 @@ def create_function_from_response_pdu(resp_pdu, req_pdu=None):
     return function.create_from_response_pdu(resp_pdu)
 
 
-@memoize
+def is_read_request_pdu(pdu):
+    """ Return whether request PDU is for one of the read functions. Those
+    requests don't change state of a server and often repeat.
+
+    :param pdu: Array of bytes.
+    :return: Boolean.
+    """
+    return pdu[:1] in (b'\x01', b'\x02', b'\x03', b'\x04')
+
+
+@memoize(maxsize=1024, cacheable=is_read_request_pdu, key=to_bytes)
 def create_function_from_request_pdu(pdu):
     """ Return function instance, based on request PDU.
 
+    Instances created from PDU's of read requests are cached, the cache is
+    bounded and evicts least recently used instances. The cache can be tuned
+    using `create_function_from_request_pdu.cache`, see
+    :class:`umodbus.utils.Cache`.
+
     :param pdu: Array of bytes.
     :return: Instance of a function.
     """
@@ -165,6 +181,29 @@ def expected_response_pdu_size_from_request_pdu(pdu):
     return create_function_from_request_pdu(pdu).expected_response_pdu_size
 
 
+def _read_block(endpoint, slave_id, function_code, starting_address, quantity):
+    """ Call block endpoint for a read request and return its values.
+
+    :param endpoint: Endpoint registered as block route.
+    :param slave_id: Slave id.
+    :param function_code: Function code.
+    :param starting_address: First address to read.
+    :param quantity: Number of addresses to read.
+    :return: Sequence with values.
+    :raises ServerDeviceFailureError: When endpoint doesn't return exactly
+        `quantity` values.
+    """
+    values = endpoint(slave_id=slave_id, function_code=function_code,
+                      starting_address=starting_address, quantity=quantity)
+
+    if len(values) != quantity:
+        log.error('Block endpoint {0} returned {1} values instead of '
+                  '{2}.'.format(endpoint, len(values), quantity))
+        raise ServerDeviceFailureError()
+
+    return values
+
+
 class ModbusFunction(object):
     function_code = None
 
@@ -275,8 +314,8 @@ class ReadCoils(ModbusFunction):
             # TODO Raise proper exception.
             raise Exception
 
-        return struct.pack('>BHH', self.function_code, self.starting_address,
-                           self.quantity)
+        return FUNCTION_CODE_AND_2_SHORTS.pack(
+            self.function_code, self.starting_address, self.quantity)
 
     @classmethod
     def create_from_request_pdu(cls, pdu):
@@ -285,7 +324,7 @@ class ReadCoils(ModbusFunction):
         :param pdu: A request PDU.
         :return: Instance of this class.
         """
-        _, starting_address, quantity = struct.unpack('>BHH', pdu)
+        _, starting_address, quantity = FUNCTION_CODE_AND_2_SHORTS.unpack(pdu)
 
         instance = cls()
         instance.starting_address = starting_address
@@ -307,22 +346,13 @@ class ReadCoils(ModbusFunction):
         :param data: A list with 0's and/or 1's.
         :return: Byte array of at least 3 bytes.
         """
-        log.debug('Create single bit response pdu {0}.'.format(data))
-        bytes_ = [data[i:i + 8] for i in range(0, len(data), 8)]
-
-        # Reduce each all bits per byte to a number. Byte
-        # [0, 0, 0, 0, 0, 1, 1, 1] is intepreted as binary en is decimal 3.
-        for index, byte in enumerate(bytes_):
-            bytes_[index] = \
-                reduce(lambda a, b: (a << 1) + b, list(reversed(byte)))
-
-        log.debug('Reduced single bit data to {0}.'.format(bytes_))
-        # The first 2 B's of the format encode the function code (1 byte) and
-        # the length (1 byte) of the following byte series. Followed by # a B
-        # for every byte in the series of bytes. 3 lead to the format '>BBB'
-        # and 257 lead to the format '>BBBB'.
-        fmt = '>BB' + self.format_character * len(bytes_)
-        return struct.pack(fmt, self.function_code, len(bytes_), *bytes_)
+        log.debug('Create single bit response pdu %s.', data)
+        bytes_ = pack_bits(data)
+
+        # The function code (1 byte) and the length (1 byte) of the packed
+        # values precede the packed values.
+        return get_struct('BB').pack(self.function_code, len(bytes_)) + \
+            bytes(bytes_)
 
     @classmethod
     def create_from_response_pdu(cls, resp_pdu, req_pdu):
@@ -335,25 +365,11 @@ class ReadCoils(ModbusFunction):
         :return: Instance of :class:`ReadCoils`.
         """
         read_coils = cls()
-        read_coils.quantity = struct.unpack('>H', req_pdu[-2:])[0]
-        byte_count = struct.unpack('>B', resp_pdu[1:2])[0]
-
-        fmt = '>' + ('B' * byte_count)
-        bytes_ = struct.unpack(fmt, resp_pdu[2:])
-
-        data = list()
+        read_coils.quantity = UNSIGNED_SHORT.unpack(req_pdu[-2:])[0]
+        byte_count = UNSIGNED_BYTE.unpack(resp_pdu[1:2])[0]
 
-        for i, value in enumerate(bytes_):
-            padding = 8 if (read_coils.quantity - (8 * i)) // 8 > 0 \
-                else read_coils.quantity % 8
-
-            fmt = '{{0:0{padding}b}}'.format(padding=padding)
-
-            # Create binary representation of integer, convert it to a list
-            # and reverse the list.
-            data = data + [int(i) for i in fmt.format(value)][::-1]
-
-        read_coils.data = data
+        read_coils.data = unpack_bits(resp_pdu[2:2 + byte_count],
+                                      read_coils.quantity)
         return read_coils
 
     def execute(self, slave_id, route_map):
@@ -363,6 +379,12 @@ class ReadCoils(ModbusFunction):
         :param route_map: Instance of modbus.route.Map.
         :return: Result of call to endpoint.
         """
+        endpoint = route_map.match_block(slave_id, self.function_code,
+                                         self.starting_address, self.quantity)
+        if endpoint is not None:
+            return _read_block(endpoint, slave_id, self.function_code,
+                               self.starting_address, self.quantity)
+
         values = []
 
         for address in range(self.starting_address,
@@ -483,8 +505,8 @@ class ReadDiscreteInputs(ModbusFunction):
             # TODO Raise proper exception.
             raise Exception
 
-        return struct.pack('>BHH', self.function_code, self.starting_address,
-                           self.quantity)
+        return FUNCTION_CODE_AND_2_SHORTS.pack(
+            self.function_code, self.starting_address, self.quantity)
 
     @classmethod
     def create_from_request_pdu(cls, pdu):
@@ -493,7 +515,7 @@ class ReadDiscreteInputs(ModbusFunction):
         :param pdu: A request PDU.
         :return: Instance of this class.
         """
-        _, starting_address, quantity = struct.unpack('>BHH', pdu)
+        _, starting_address, quantity = FUNCTION_CODE_AND_2_SHORTS.unpack(pdu)
 
         instance = cls()
         instance.starting_address = starting_address
@@ -515,22 +537,13 @@ class ReadDiscreteInputs(ModbusFunction):
         :param data: A list with 0's and/or 1's.
         :return: Byte array of at least 3 bytes.
         """
-        log.debug('Create single bit response pdu {0}.'.format(data))
-        bytes_ = [data[i:i + 8] for i in range(0, len(data), 8)]
-
-        # Reduce each all bits per byte to a number. Byte
-        # [0, 0, 0, 0, 0, 1, 1, 1] is intepreted as binary en is decimal 3.
-        for index, byte in enumerate(bytes_):
-            bytes_[index] = \
-                reduce(lambda a, b: (a << 1) + b, list(reversed(byte)))
-
-        log.debug('Reduced single bit data to {0}.'.format(bytes_))
-        # The first 2 B's of the format encode the function code (1 byte) and
-        # the length (1 byte) of the following byte series. Followed by # a B
-        # for every byte in the series of bytes. 3 lead to the format '>BBB'
-        # and 257 lead to the format '>BBBB'.
-        fmt = '>BB' + self.format_character * len(bytes_)
-        return struct.pack(fmt, self.function_code, len(bytes_), *bytes_)
+        log.debug('Create single bit response pdu %s.', data)
+        bytes_ = pack_bits(data)
+
+        # The function code (1 byte) and the length (1 byte) of the packed
+        # values precede the packed values.
+        return get_struct('BB').pack(self.function_code, len(bytes_)) + \
+            bytes(bytes_)
 
     @classmethod
     def create_from_response_pdu(cls, resp_pdu, req_pdu):
@@ -543,25 +556,12 @@ class ReadDiscreteInputs(ModbusFunction):
         :return: Instance of :class:`ReadDiscreteInputs`.
         """
         read_discrete_inputs = cls()
-        read_discrete_inputs.quantity = struct.unpack('>H', req_pdu[-2:])[0]
-        byte_count = struct.unpack('>B', resp_pdu[1:2])[0]
-
-        fmt = '>' + ('B' * byte_count)
-        bytes_ = struct.unpack(fmt, resp_pdu[2:])
+        read_discrete_inputs.quantity = \
+            UNSIGNED_SHORT.unpack(req_pdu[-2:])[0]
+        byte_count = UNSIGNED_BYTE.unpack(resp_pdu[1:2])[0]
 
-        data = list()
-
-        for i, value in enumerate(bytes_):
-            padding = 8 if (read_discrete_inputs.quantity - (8 * i)) // 8 > 0 \
-                else read_discrete_inputs.quantity % 8
-
-            fmt = '{{0:0{padding}b}}'.format(padding=padding)
-
-            # Create binary representation of integer, convert it to a list
-            # and reverse the list.
-            data = data + [int(i) for i in fmt.format(value)][::-1]
-
-        read_discrete_inputs.data = data
+        read_discrete_inputs.data = unpack_bits(resp_pdu[2:2 + byte_count],
+                                                read_discrete_inputs.quantity)
         return read_discrete_inputs
 
     def execute(self, slave_id, route_map):
@@ -571,6 +571,12 @@ class ReadDiscreteInputs(ModbusFunction):
         :param route_map: Instance of modbus.route.Map.
         :return: Result of call to endpoint.
         """
+        endpoint = route_map.match_block(slave_id, self.function_code,
+                                         self.starting_address, self.quantity)
+        if endpoint is not None:
+            return _read_block(endpoint, slave_id, self.function_code,
+                               self.starting_address, self.quantity)
+
         values = []
 
         for address in range(self.starting_address,
@@ -682,8 +688,8 @@ class ReadHoldingRegisters(ModbusFunction):
             # TODO Raise proper exception.
             raise Exception
 
-        return struct.pack('>BHH', self.function_code, self.starting_address,
-                           self.quantity)
+        return FUNCTION_CODE_AND_2_SHORTS.pack(
+            self.function_code, self.starting_address, self.quantity)
 
     @classmethod
     def create_from_request_pdu(cls, pdu):
@@ -692,7 +698,7 @@ class ReadHoldingRegisters(ModbusFunction):
         :param pdu: A request PDU.
         :return: Instance of this class.
         """
-        _, starting_address, quantity = struct.unpack('>BHH', pdu)
+        _, starting_address, quantity = FUNCTION_CODE_AND_2_SHORTS.unpack(pdu)
 
         instance = cls()
         instance.starting_address = starting_address
@@ -714,10 +720,9 @@ class ReadHoldingRegisters(ModbusFunction):
         :param data: A list with values.
         :return: Byte array of at least 4 bytes.
         """
-        log.debug('Create multi bit response pdu {0}.'.format(data))
-        fmt = '>BB' + conf.TYPE_CHAR * len(data)
-
-        return struct.pack(fmt, self.function_code, len(data) * 2, *data)
+        log.debug('Create multi bit response pdu %s.', data)
+        return get_struct('BB', len(data), conf.TYPE_CHAR).pack(
+            self.function_code, len(data) * 2, *data)
 
     @classmethod
     def create_from_response_pdu(cls, resp_pdu, req_pdu):
@@ -730,12 +735,14 @@ class ReadHoldingRegisters(ModbusFunction):
         :return: Instance of :class:`ReadCoils`.
         """
         read_holding_registers = cls()
-        read_holding_registers.quantity = struct.unpack('>H', req_pdu[-2:])[0]
+        read_holding_registers.quantity = \
+            UNSIGNED_SHORT.unpack(req_pdu[-2:])[0]
         read_holding_registers.byte_count = \
-            struct.unpack('>B', resp_pdu[1:2])[0]
+            UNSIGNED_BYTE.unpack(resp_pdu[1:2])[0]
 
-        fmt = '>' + (conf.TYPE_CHAR * read_holding_registers.quantity)
-        read_holding_registers.data = list(struct.unpack(fmt, resp_pdu[2:]))
+        values = get_struct('', read_holding_registers.quantity,
+                            conf.TYPE_CHAR).unpack(resp_pdu[2:])
+        read_holding_registers.data = list(values)
 
         return read_holding_registers
 
@@ -746,6 +753,12 @@ class ReadHoldingRegisters(ModbusFunction):
         :param route_map: Instance of modbus.route.Map.
         :return: Result of call to endpoint.
         """
+        endpoint = route_map.match_block(slave_id, self.function_code,
+                                         self.starting_address, self.quantity)
+        if endpoint is not None:
+            return _read_block(endpoint, slave_id, self.function_code,
+                               self.starting_address, self.quantity)
+
         values = []
 
         for address in range(self.starting_address,
@@ -857,8 +870,8 @@ class ReadInputRegisters(ModbusFunction):
             # TODO Raise proper exception.
             raise Exception
 
-        return struct.pack('>BHH', self.function_code, self.starting_address,
-                           self.quantity)
+        return FUNCTION_CODE_AND_2_SHORTS.pack(
+            self.function_code, self.starting_address, self.quantity)
 
     @classmethod
     def create_from_request_pdu(cls, pdu):
@@ -867,7 +880,7 @@ class ReadInputRegisters(ModbusFunction):
         :param pdu: A request PDU.
         :return: Instance of this class.
         """
-        _, starting_address, quantity = struct.unpack('>BHH', pdu)
+        _, starting_address, quantity = FUNCTION_CODE_AND_2_SHORTS.unpack(pdu)
 
         instance = cls()
         instance.starting_address = starting_address
@@ -889,10 +902,9 @@ class ReadInputRegisters(ModbusFunction):
         :param data: A list with values.
         :return: Byte array of at least 4 bytes.
         """
-        log.debug('Create multi bit response pdu {0}.'.format(data))
-        fmt = '>BB' + conf.TYPE_CHAR * len(data)
-
-        return struct.pack(fmt, self.function_code, len(data) * 2, *data)
+        log.debug('Create multi bit response pdu %s.', data)
+        return get_struct('BB', len(data), conf.TYPE_CHAR).pack(
+            self.function_code, len(data) * 2, *data)
 
     @classmethod
     def create_from_response_pdu(cls, resp_pdu, req_pdu):
@@ -905,10 +917,12 @@ class ReadInputRegisters(ModbusFunction):
         :return: Instance of :class:`ReadCoils`.
         """
         read_input_registers = cls()
-        read_input_registers.quantity = struct.unpack('>H', req_pdu[-2:])[0]
+        read_input_registers.quantity = \
+            UNSIGNED_SHORT.unpack(req_pdu[-2:])[0]
 
-        fmt = '>' + (conf.TYPE_CHAR * read_input_registers.quantity)
-        read_input_registers.data = list(struct.unpack(fmt, resp_pdu[2:]))
+        values = get_struct('', read_input_registers.quantity,
+                            conf.TYPE_CHAR).unpack(resp_pdu[2:])
+        read_input_registers.data = list(values)
 
         return read_input_registers
 
@@ -919,6 +933,12 @@ class ReadInputRegisters(ModbusFunction):
         :param route_map: Instance of modbus.route.Map.
         :return: Result of call to endpoint.
         """
+        endpoint = route_map.match_block(slave_id, self.function_code,
+                                         self.starting_address, self.quantity)
+        if endpoint is not None:
+            return _read_block(endpoint, slave_id, self.function_code,
+                               self.starting_address, self.quantity)
+
         values = []
 
         for address in range(self.starting_address,
@@ -1021,8 +1041,8 @@ class WriteSingleCoil(ModbusFunction):
             # TODO Raise proper exception.
             raise Exception
 
-        return struct.pack('>BHH', self.function_code, self.address,
-                           self._value)
+        return FUNCTION_CODE_AND_2_SHORTS.pack(
+            self.function_code, self.address, self._value)
 
     @classmethod
     def create_from_request_pdu(cls, pdu):
@@ -1031,7 +1051,7 @@ class WriteSingleCoil(ModbusFunction):
         :param pdu: A response PDU.
         :return: Instance of this class.
         """
-        _, address, value = struct.unpack('>BHH', pdu)
+        _, address, value = FUNCTION_CODE_AND_2_SHORTS.unpack(pdu)
 
         value = 1 if value == 0xFF00 else value
 
@@ -1055,8 +1075,8 @@ class WriteSingleCoil(ModbusFunction):
         :param data: A list with values.
         :return: Byte array of at least 4 bytes.
         """
-        fmt = '>BHH'
-        return struct.pack(fmt, self.function_code, self.address, self._value)
+        return FUNCTION_CODE_AND_2_SHORTS.pack(self.function_code,
+                                               self.address, self._value)
 
     @classmethod
     def create_from_response_pdu(cls, resp_pdu):
@@ -1067,7 +1087,7 @@ class WriteSingleCoil(ModbusFunction):
         """
         write_single_coil = cls()
 
-        address, value = struct.unpack('>HH', resp_pdu[1:5])
+        address, value = TWO_SHORTS.unpack(resp_pdu[1:5])
         value = 1 if value == 0xFF00 else value
 
         write_single_coil.address = address
@@ -1081,6 +1101,13 @@ class WriteSingleCoil(ModbusFunction):
         :param slave_id: Slave id.
         :param route_map: Instance of modbus.route.Map.
         """
+        endpoint = route_map.match_block(slave_id, self.function_code,
+                                         self.address, 1)
+        if endpoint is not None:
+            endpoint(slave_id=slave_id, starting_address=self.address,
+                     values=[self.value], function_code=self.function_code)
+            return
+
         endpoint = route_map.match(slave_id, self.function_code, self.address)
         if endpoint is None:
             raise IllegalDataAddressError()
@@ -1154,7 +1181,7 @@ class WriteSingleRegister(ModbusFunction):
         :raises: IllegalDataValueError when value isn't in range.
         """
         try:
-            struct.pack('>' + conf.TYPE_CHAR, value)
+            get_struct('', 1, conf.TYPE_CHAR).pack(value)
         except struct.error:
             raise IllegalDataValueError
 
@@ -1170,8 +1197,8 @@ class WriteSingleRegister(ModbusFunction):
             # TODO Raise proper exception.
             raise Exception
 
-        return struct.pack('>BH' + conf.TYPE_CHAR, self.function_code,
-                           self.address, self.value)
+        return get_struct('BH', 1, conf.TYPE_CHAR).pack(
+            self.function_code, self.address, self.value)
 
     @classmethod
     def create_from_request_pdu(cls, pdu):
@@ -1181,7 +1208,8 @@ class WriteSingleRegister(ModbusFunction):
         :return: Instance of this class.
         """
         _, address, value = \
-            struct.unpack('>BH' + conf.MULTI_BIT_VALUE_FORMAT_CHARACTER, pdu)
+            get_struct('BH', 1,
+                       conf.MULTI_BIT_VALUE_FORMAT_CHARACTER).unpack(pdu)
 
         instance = cls()
         instance.address = address
@@ -1198,8 +1226,8 @@ class WriteSingleRegister(ModbusFunction):
         return 5
 
     def create_response_pdu(self):
-        fmt = '>BH' + conf.TYPE_CHAR
-        return struct.pack(fmt, self.function_code, self.address, self.value)
+        return get_struct('BH', 1, conf.TYPE_CHAR).pack(
+            self.function_code, self.address, self.value)
 
     @classmethod
     def create_from_response_pdu(cls, resp_pdu):
@@ -1210,7 +1238,8 @@ class WriteSingleRegister(ModbusFunction):
         """
         write_single_register = cls()
 
-        address, value = struct.unpack('>H' + conf.TYPE_CHAR, resp_pdu[1:5])
+        address, value = get_struct('H', 1, conf.TYPE_CHAR).unpack(
+            resp_pdu[1:5])
 
         write_single_register.address = address
         write_single_register.data = value
@@ -1223,6 +1252,13 @@ class WriteSingleRegister(ModbusFunction):
         :param slave_id: Slave id.
         :param route_map: Instance of modbus.route.Map.
         """
+        endpoint = route_map.match_block(slave_id, self.function_code,
+                                         self.address, 1)
+        if endpoint is not None:
+            endpoint(slave_id=slave_id, starting_address=self.address,
+                     values=[self.value], function_code=self.function_code)
+            return
+
         endpoint = route_map.match(slave_id, self.function_code, self.address)
         if endpoint is None:
             raise IllegalDataAddressError()
@@ -1311,18 +1347,11 @@ class WriteMultipleCoils(ModbusFunction):
         if None in [self.starting_address, self._values]:
             raise IllegalDataValueError
 
-        bytes_ = [self.values[i:i + 8] for i in range(0, len(self.values), 8)]
-
-        # Reduce each all bits per byte to a number. Byte
-        # [0, 0, 0, 0, 0, 1, 1, 1] is intepreted as binary en is decimal 3.
-        for index, byte in enumerate(bytes_):
-            bytes_[index] = \
-                reduce(lambda a, b: (a << 1) + b, list(reversed(byte)))
+        bytes_ = pack_bits(self.values)
 
-        fmt = '>BHHB' + 'B' * len(bytes_)
-        return struct.pack(fmt, self.function_code, self.starting_address,
-                           len(self.values), (len(self.values) + 7) // 8,
-                           *bytes_)
+        return WRITE_MULTIPLE_HEADER.pack(
+            self.function_code, self.starting_address, len(self.values),
+            len(bytes_)) + bytes(bytes_)
 
     @classmethod
     def create_from_request_pdu(cls, pdu):
@@ -1377,26 +1406,13 @@ class WriteMultipleCoils(ModbusFunction):
         :param pdu: A request PDU.
         """
         _, starting_address, quantity, byte_count = \
-            struct.unpack('>BHHB', pdu[:6])
-
-        fmt = '>' + (conf.SINGLE_BIT_VALUE_FORMAT_CHARACTER * byte_count)
-        values = struct.unpack(fmt, pdu[6:])
-
-        res = list()
-
-        for i, value in enumerate(values):
-            padding = 8 if (quantity - (8 * i)) // 8 > 0 else quantity % 8
-            fmt = '{{0:0{padding}b}}'.format(padding=padding)
-
-            # Create binary representation of integer, convert it to a list
-            # and reverse the list.
-            res = res + [int(i) for i in fmt.format(value)][::-1]
+            WRITE_MULTIPLE_HEADER.unpack(pdu[:6])
 
         instance = cls()
         instance.starting_address = starting_address
         instance.quantity = quantity
 
-        instance.values = res
+        instance.values = unpack_bits(pdu[6:6 + byte_count], quantity)
 
         return instance
 
@@ -1414,14 +1430,14 @@ class WriteMultipleCoils(ModbusFunction):
         :param data: A list with values.
         :return: Byte array 5 bytes.
         """
-        return struct.pack('>BHH', self.function_code, self.starting_address,
-                           len(self.values))
+        return FUNCTION_CODE_AND_2_SHORTS.pack(
+            self.function_code, self.starting_address, len(self.values))
 
     @classmethod
     def create_from_response_pdu(cls, resp_pdu):
         write_multiple_coils = cls()
 
-        starting_address, data = struct.unpack('>HH', resp_pdu[1:5])
+        starting_address, data = TWO_SHORTS.unpack(resp_pdu[1:5])
 
         write_multiple_coils.starting_address = starting_address
         write_multiple_coils.data = data
@@ -1434,6 +1450,14 @@ class WriteMultipleCoils(ModbusFunction):
         :param slave_id: Slave id.
         :param route_map: Instance of modbus.route.Map.
         """
+        endpoint = route_map.match_block(slave_id, self.function_code,
+                                         self.starting_address,
+                                         len(self.values))
+        if endpoint is not None:
+            endpoint(slave_id=slave_id, starting_address=self.starting_address,
+                     values=self.values, function_code=self.function_code)
+            return
+
         for index, value in enumerate(self.values):
             address = self.starting_address + index
             endpoint = route_map.match(slave_id, self.function_code, address)
@@ -1510,21 +1534,21 @@ class WriteMultipleRegisters(ModbusFunction):
         if not (1 <= len(values) <= 0x7B0):
             raise IllegalDataValueError
 
-        for value in values:
-            try:
-                struct.pack(">" + conf.MULTI_BIT_VALUE_FORMAT_CHARACTER, value)
-            except struct.error:
-                raise IllegalDataValueError
+        # Packing all values at once fails if 1 of them is out of range.
+        try:
+            get_struct('', len(values),
+                       conf.MULTI_BIT_VALUE_FORMAT_CHARACTER).pack(*values)
+        except struct.error:
+            raise IllegalDataValueError
 
         self._values = values
         self._values = values
 
     @property
     def request_pdu(self):
-        fmt = '>BHHB' + (conf.TYPE_CHAR * len(self.values))
-        return struct.pack(fmt, self.function_code, self.starting_address,
-                           len(self.values), len(self.values) * 2,
-                           *self.values)
+        return get_struct('BHHB', len(self.values), conf.TYPE_CHAR).pack(
+            self.function_code, self.starting_address, len(self.values),
+            len(self.values) * 2, *self.values)
 
     @classmethod
     def create_from_request_pdu(cls, pdu):
@@ -1534,13 +1558,12 @@ class WriteMultipleRegisters(ModbusFunction):
         :return: Instance of this class.
         """
         _, starting_address, quantity, byte_count = \
-            struct.unpack('>BHHB', pdu[:6])
+            WRITE_MULTIPLE_HEADER.unpack(pdu[:6])
 
         # Values are 16 bit, so each value takes up 2 bytes.
-        fmt = '>' + (conf.MULTI_BIT_VALUE_FORMAT_CHARACTER *
-                     int((byte_count / 2)))
-
-        values = list(struct.unpack(fmt, pdu[6:]))
+        values = list(get_struct('', byte_count // 2,
+                                 conf.MULTI_BIT_VALUE_FORMAT_CHARACTER)
+                      .unpack(pdu[6:]))
 
         instance = cls()
         instance.starting_address = starting_address
@@ -1562,14 +1585,14 @@ class WriteMultipleRegisters(ModbusFunction):
         :param data: A list with values.
         :return: Byte array 5 bytes.
         """
-        return struct.pack('>BHH', self.function_code, self.starting_address,
-                           len(self.values))
+        return FUNCTION_CODE_AND_2_SHORTS.pack(
+            self.function_code, self.starting_address, len(self.values))
 
     @classmethod
     def create_from_response_pdu(cls, resp_pdu):
         write_multiple_registers = cls()
 
-        starting_address, data = struct.unpack('>HH', resp_pdu[1:5])
+        starting_address, data = TWO_SHORTS.unpack(resp_pdu[1:5])
 
         write_multiple_registers.starting_address = starting_address
         write_multiple_registers.data = data
@@ -1582,6 +1605,14 @@ class WriteMultipleRegisters(ModbusFunction):
         :param slave_id: Slave id.
         :param route_map: Instance of modbus.route.Map.
         """
+        endpoint = route_map.match_block(slave_id, self.function_code,
+                                         self.starting_address,
+                                         len(self.values))
+        if endpoint is not None:
+            endpoint(slave_id=slave_id, starting_address=self.starting_address,
+                     values=self.values, function_code=self.function_code)
+            return
+
         for index, value in enumerate(self.values):
             address = self.starting_address + index
             endpoint = route_map.match(slave_id, self.function_code, address)
@@ -0,0 +1,214 @@
+""" Metrics of requests handled by a server.
+
+Assign an instance of :class:`Metrics` to the `metrics` attribute of a server
+to record every request it handles::
+
+    >>> app = get_server(TCPServer, ('localhost', 502), RequestHandler)
+    >>> app.metrics = Metrics()
+
+Per unit id and function code it counts requests, exception responses per
+error code and the bytes received and sent. The time spent processing
+requests is recorded in a histogram. The counters of a combination of unit id
+and function code are allocated when its first request is recorded, later
+requests only increment them.
+
+Metrics can be exported as a dict with :meth:`Metrics.as_dict` or in the text
+format of Prometheus with :meth:`Metrics.to_prometheus`.
+
+"""
+import time
+import threading
+from bisect import bisect_left
+
+from umodbus.codec import UNSIGNED_BYTE
+
+try:
+    timer = time.perf_counter
+except AttributeError:
+    # Python 2 has no perf_counter().
+    timer = time.time
+
+#: Upper bounds in seconds of the buckets of latency histograms.
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Indexes of counters of a series.
+_REQUESTS = 0
+_BYTES_IN = 1
+_BYTES_OUT = 2
+_BUCKETS = 3
+
+
+class _Series(object):
+    """ Counters of a single combination of unit id and function code. """
+    def __init__(self, number_of_buckets):
+        # Requests, bytes in, bytes out and a counter per bucket, including
+        # 1 for durations larger than the largest bucket.
+        self.counters = [0] * (_BUCKETS + number_of_buckets + 1)
+        self.duration_sum = 0.0
+        # Map error code to number of exception responses.
+        self.exceptions = {}
+
+
+class Metrics(object):
+    """ Record requests handled by a server. It's safe to record requests
+    from multiple threads.
+
+    :param buckets: Sorted upper bounds in seconds of buckets of latency
+        histograms, default is :data:`DEFAULT_BUCKETS`.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+
+        self._lock = threading.Lock()
+        # Map unit id * 256 + function code to series.
+        self._series = {}
+
+    def record(self, unit_id, function_code, error_code, bytes_in, bytes_out,
+               duration):
+        """ Record a request.
+
+        :param unit_id: Unit id.
+        :param function_code: Function code of request.
+        :param error_code: Error code of exception response, or None.
+        :param bytes_in: Size of request ADU.
+        :param bytes_out: Size of response ADU.
+        :param duration: Seconds spent handling the request.
+        """
+        bucket = _BUCKETS + bisect_left(self.buckets, duration)
+        key = unit_id * 256 + function_code
+
+        with self._lock:
+            try:
+                series = self._series[key]
+            except KeyError:
+                series = self._series[key] = _Series(len(self.buckets))
+
+            counters = series.counters
+            counters[_REQUESTS] += 1
+            counters[_BYTES_IN] += bytes_in
+            counters[_BYTES_OUT] += bytes_out
+            counters[bucket] += 1
+            series.duration_sum += duration
+
+            if error_code is not None:
+                series.exceptions[error_code] = \
+                    series.exceptions.get(error_code, 0) + 1
+
+    def record_pdus(self, unit_id, request_pdu, response_pdu, bytes_in,
+                    bytes_out, duration):
+        """ Record a request, taking function code and error code from the
+        PDU's.
+
+        :param unit_id: Unit id.
+        :param request_pdu: Request PDU.
+        :param response_pdu: Response PDU.
+        :param bytes_in: Size of request ADU.
+        :param bytes_out: Size of response ADU.
+        :param duration: Seconds spent handling the request.
+        """
+        function_code = UNSIGNED_BYTE.unpack_from(request_pdu)[0]
+        error_code = None
+
+        # Exception responses have the highest bit of the function code set,
+        # followed by the error code.
+        if UNSIGNED_BYTE.unpack_from(response_pdu)[0] & 0x80:
+            error_code = UNSIGNED_BYTE.unpack_from(response_pdu, 1)[0]
+
+        self.record(unit_id, function_code, error_code, bytes_in, bytes_out,
+                    duration)
+
+    def as_dict(self):
+        """ Return metrics as dict.
+
+            >>> metrics.as_dict()
+            {1: {3: {'requests': 2, 'exceptions': {2: 1}, 'bytes_in': 24,
+                     'bytes_out': 20, 'duration_sum': 0.0003,
+                     'duration_buckets': [(0.0001, 0), (0.00025, 2), ...,
+                                          (inf, 2)]}}}
+
+        :return: Dict mapping unit id to dict which maps function code to
+            dict with metrics. Buckets are cumulative, like those of
+            Prometheus: each contains all durations up to its upper bound.
+        """
+        with self._lock:
+            snapshot = [(key, list(series.counters), series.duration_sum,
+                         dict(series.exceptions))
+                        for key, series in self._series.items()]
+
+        result = {}
+        bounds = self.buckets + (float('inf'),)
+
+        for key, counters, duration_sum, exceptions in sorted(snapshot):
+            cumulative = []
+            count = 0
+
+            for bound, n in zip(bounds, counters[_BUCKETS:]):
+                count += n
+                cumulative.append((bound, count))
+
+            result.setdefault(key // 256, {})[key % 256] = {
+                'requests': counters[_REQUESTS],
+                'exceptions': exceptions,
+                'bytes_in': counters[_BYTES_IN],
+                'bytes_out': counters[_BYTES_OUT],
+                'duration_sum': duration_sum,
+                'duration_buckets': cumulative,
+            }
+
+        return result
+
+    def to_prometheus(self, prefix='umodbus'):
+        """ Return metrics in text format of Prometheus.
+
+        :param prefix: Prefix of names of metrics.
+        :return: String.
+        """
+        metrics = [(unit_id, function_code, m)
+                   for unit_id, functions in sorted(self.as_dict().items())
+                   for function_code, m in sorted(functions.items())]
+
+        lines = []
+
+        def add(name, metric_type, help_text, samples):
+            name = prefix + '_' + name
+            lines.append('# HELP {0} {1}'.format(name, help_text))
+            lines.append('# TYPE {0} {1}'.format(name, metric_type))
+
+            for suffix, labels, value in samples:
+                lines.append('{0}{1}{{{2}}} {3}'.format(
+                    name, suffix, ','.join('{0}="{1}"'.format(k, v)
+                                           for k, v in labels), value))
+
+        def labels(unit_id, function_code, *extra):
+            return (('unit_id', unit_id), ('function_code', function_code)) + \
+                extra
+
+        add('requests_total', 'counter', 'Number of requests handled.',
+            [('', labels(u, f), m['requests']) for u, f, m in metrics])
+        add('exception_responses_total', 'counter',
+            'Number of exception responses sent.',
+            [('', labels(u, f, ('error_code', e)), n)
+             for u, f, m in metrics
+             for e, n in sorted(m['exceptions'].items())])
+        add('received_bytes_total', 'counter',
+            'Number of bytes of request ADU\'s.',
+            [('', labels(u, f), m['bytes_in']) for u, f, m in metrics])
+        add('sent_bytes_total', 'counter',
+            'Number of bytes of response ADU\'s.',
+            [('', labels(u, f), m['bytes_out']) for u, f, m in metrics])
+
+        samples = []
+
+        for u, f, m in metrics:
+            for bound, count in m['duration_buckets']:
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                samples.append(('_bucket', labels(u, f, ('le', le)), count))
+
+            samples.append(('_sum', labels(u, f), repr(m['duration_sum'])))
+            samples.append(('_count', labels(u, f), m['requests']))
+
+        add('request_duration_seconds', 'histogram',
+            'Time spent handling requests.', samples)
+
+        return '\n'.join(lines) + '\n'
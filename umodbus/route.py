@@ -1,23 +1,258 @@
+from heapq import heappush, heappop
+from bisect import bisect_right
+from numbers import Integral
+
+_INF = float('inf')
+
+
 class Map:
+    """ Collection of rules mapping requests to endpoints.
+
+    Rules are matched in the order they have been added, the first rule that
+    matches wins. To avoid scanning all rules for every address, :meth:`match`
+    uses an index which is compiled lazily per combination of slave id and
+    function code. The index is thrown away whenever a rule is added.
+
+    Block rules, added with :meth:`add_block_rule`, route a contiguous range
+    of addresses to a single endpoint. They are matched using
+    :meth:`match_block`.
+
+    .. note:: The constraints of a rule are read when the rule is added.
+        Mutating a list of addresses after it has been passed to
+        :meth:`add_rule` has no effect.
+    """
     def __init__(self):
         self._rules = []
+        self._tables = {}
+        self._block_rules = []
+        self._block_tables = {}
 
     def add_rule(self, endpoint, slave_ids, function_codes, addresses):
         self._rules.append(DataRule(endpoint, slave_ids, function_codes,
                                     addresses))
+        self._tables = {}
+
+    def add_block_rule(self, endpoint, slave_ids, function_codes, addresses):
+        self._block_rules.append(DataRule(endpoint, slave_ids,
+                                          function_codes, addresses))
+        self._block_tables = {}
+
+    def match_block(self, slave_id, function_code, starting_address,
+                    quantity):
+        """ Return endpoint of first block rule which covers all addresses
+        from starting address up to starting address + quantity, or None.
+
+        :param slave_id: Slave id.
+        :param function_code: Function code.
+        :param starting_address: First address of range.
+        :param quantity: Number of addresses in range.
+        :return: Endpoint or None.
+        """
+        if not self._block_rules:
+            return None
+
+        key = (slave_id, function_code)
+
+        try:
+            rules = self._block_tables[key]
+        except KeyError:
+            rules = self._block_tables[key] = [
+                rule for rule in self._block_rules
+                if rule.match_slave_id_and_function_code(slave_id,
+                                                         function_code)]
+
+        for rule in rules:
+            if rule.covers(starting_address, starting_address + quantity):
+                return rule.endpoint
 
     def match(self, slave_id, function_code, address):
+        key = (slave_id, function_code)
+
+        try:
+            starts, endpoints = self._tables[key]
+        except KeyError:
+            starts, endpoints = self._tables[key] = \
+                self._compile_table(slave_id, function_code)
+        except TypeError:
+            # Unhashable slave id or function code, these can't be indexed.
+            return self._scan(slave_id, function_code, address)
+
+        if starts is None:
+            return self._scan(slave_id, function_code, address)
+
+        index = bisect_right(starts, address) - 1
+        if index >= 0:
+            return endpoints[index]
+
+    def _scan(self, slave_id, function_code, address):
+        """ Match rules one by one. Only used when rules can't be indexed. """
         for rule in self._rules:
             if rule.match(slave_id, function_code, address):
                 return rule.endpoint
 
+    def _compile_table(self, slave_id, function_code):
+        """ Compile lookup table for all addresses of a slave id and function
+        code.
+
+        The table consists of 2 lists of equal length. The first contains
+        the sorted start addresses of segments, the second the endpoint of
+        the first rule matching that segment. A segment ends where the next
+        one starts. An endpoint of None means that no rule matches.
+
+        Return (None, None) if one of the candidate rules contains
+        constraints which can't be compiled.
+
+        :param slave_id: Slave id.
+        :param function_code: Function code.
+        :return: Tuple with 2 lists.
+        """
+        candidates = []
+
+        for rule in self._rules:
+            if not rule.indexable:
+                return None, None
+
+            if rule.match_slave_id_and_function_code(slave_id,
+                                                     function_code):
+                candidates.append(rule)
+
+                # Fast path, a rule without address constraint shadows all
+                # rules added later.
+                if rule.addresses is None:
+                    break
+
+        # Sweep over all boundaries of address ranges. A heap keeps track of
+        # the rules covering the current segment, ordered by priority.
+        boundaries = []
+        for priority, rule in enumerate(candidates):
+            for start, stop in rule.address_ranges:
+                boundaries.append((start, priority, stop))
+
+        boundaries.sort()
+
+        positions = sorted(set([b[0] for b in boundaries] +
+                               [b[2] for b in boundaries]))
+        starts = []
+        endpoints = []
+        active = []
+        i = 0
+
+        for position in positions:
+            while i < len(boundaries) and boundaries[i][0] == position:
+                _, priority, stop = boundaries[i]
+                heappush(active, (priority, stop))
+                i += 1
+
+            while active and active[0][1] <= position:
+                heappop(active)
+
+            endpoint = candidates[active[0][0]].endpoint if active else None
+
+            if endpoints and endpoints[-1] is endpoint:
+                continue
+
+            starts.append(position)
+            endpoints.append(endpoint)
+
+        return starts, endpoints
+
+
+class _Ranges(object):
+    """ Sorted, disjoint ranges of integers. Membership is tested with a
+    binary search.
+    """
+    def __init__(self, ranges):
+        self.ranges = ranges
+        self._starts = [start for start, _ in ranges]
+
+    def __contains__(self, value):
+        try:
+            index = bisect_right(self._starts, value) - 1
+        except TypeError:
+            return False
+
+        return index >= 0 and value < self.ranges[index][1]
+
+    def covers(self, start, stop):
+        """ Return whether all values from start up to stop are in one of
+        the ranges.
+        """
+        index = bisect_right(self._starts, start) - 1
+        return index >= 0 and stop <= self.ranges[index][1]
+
+
+def _compile_constraint(values):
+    """ Compile constraint into sorted, disjoint ranges.
+
+    :param values: None or an iterable with integers.
+    :return: None, instance of :class:`_Ranges`, or the original constraint
+        if it can't be compiled.
+    """
+    if values is None:
+        return None
+
+    if getattr(values, 'step', None) == 1:
+        # A range object, it can be compiled without iterating over it.
+        return _Ranges([(values.start, values.stop)]
+                       if values.start < values.stop else [])
+
+    try:
+        values = list(values)
+        sorted_values = sorted(set(values))
+    except TypeError:
+        return values
+
+    if not all(isinstance(v, Integral) for v in sorted_values):
+        return values
+
+    ranges = []
+    for value in sorted_values:
+        if ranges and ranges[-1][1] == value:
+            ranges[-1] = (ranges[-1][0], value + 1)
+        else:
+            ranges.append((value, value + 1))
+
+    return _Ranges(ranges)
+
 
 class DataRule:
     def __init__(self, endpoint, slave_ids, function_codes, addresses):
         self.endpoint = endpoint
-        self.slave_ids = slave_ids
-        self.function_codes = function_codes
-        self.addresses = addresses
+        self.slave_ids = _compile_constraint(slave_ids)
+        self.function_codes = _compile_constraint(function_codes)
+        self.addresses = _compile_constraint(addresses)
+
+        self.indexable = all(c is None or isinstance(c, _Ranges)
+                             for c in [self.slave_ids, self.function_codes,
+                                       self.addresses])
+
+    @property
+    def address_ranges(self):
+        """ Return list with (start, stop) tuples of addresses matching this
+        rule. Only valid for rules which are indexable.
+        """
+        if self.addresses is None:
+            return [(-_INF, _INF)]
+
+        return self.addresses.ranges
+
+    def match_slave_id_and_function_code(self, slave_id, function_code):
+        return (self.slave_ids is None or slave_id in self.slave_ids) and \
+            (self.function_codes is None or
+             function_code in self.function_codes)
+
+    def covers(self, start, stop):
+        """ Return whether all addresses from start up to stop match the
+        address constraint of this rule.
+        """
+        if self.addresses is None:
+            return True
+
+        if isinstance(self.addresses, _Ranges):
+            return self.addresses.covers(start, stop)
+
+        return all(address in self.addresses
+                   for address in range(start, stop))
 
     def match(self, slave_id, function_code, address):
         # A constraint of None matches any value
@@ -2,13 +2,16 @@ try:
     from socketserver import BaseRequestHandler
 except ImportError:
     from SocketServer import BaseRequestHandler
+import threading
+from logging import DEBUG
 from binascii import hexlify
 
-from umodbus import log
+from umodbus import log, frame_log
+from umodbus.metrics import timer
 from umodbus.functions import create_function_from_request_pdu
 from umodbus.exceptions import ModbusError, ServerDeviceFailureError
 from umodbus.utils import (get_function_code_from_request_pdu,
-                           pack_exception_pdu, recv_exactly)
+                           pack_exception_pdu, recv_exactly_into)
 
 
 def route(self, slave_ids=None, function_codes=None, addresses=None):
@@ -32,39 +35,165 @@ def route(self, slave_ids=None, function_codes=None, addresses=None):
     return inner
 
 
+def block_route(self, slave_ids=None, function_codes=None, addresses=None):
+    """ A decorator that is used to register an endpoint which handles a
+    contiguous block of addresses in a single call::
+
+        @server.block_route(slave_ids=[1], function_codes=[3, 4], addresses=list(range(100, 200)))  # NOQA
+        def read_registers(slave_id, function_code, starting_address, quantity):  # NOQA
+            return registers[starting_address:starting_address + quantity]
+
+        @server.block_route(slave_ids=[1], function_codes=[6, 16], addresses=list(range(100, 200)))  # NOQA
+        def write_registers(slave_id, function_code, starting_address, values):  # NOQA
+            registers[starting_address:starting_address + len(values)] = values
+
+    Endpoints for read requests receive `starting_address` and `quantity` and
+    must return a sequence with `quantity` values. Endpoints for write
+    requests receive `starting_address` and a list with `values`, also for
+    requests writing a single value.
+
+    A block route is only used when its addresses cover all addresses of a
+    request. Otherwise the request is dispatched per address to the routes
+    registered with :func:`route`.
+
+    Any argument can be omitted to match any value.
+
+    :param slave_ids: A list (or iterable) of slave ids.
+    :param function_codes: A list (or iterable) of function codes.
+    :param addresses: A list (or iterable) of addresses.
+    """
+    def inner(f):
+        self.route_map.add_block_rule(f, slave_ids, function_codes, addresses)
+        return f
+
+    return inner
+
+
 class AbstractRequestHandler(BaseRequestHandler):
     """ A subclass of :class:`socketserver.BaseRequestHandler` dispatching
     incoming Modbus requests using the server's :attr:`route_map`.
 
     """
+    #: Size of receive buffer of a connection. It fits the MBAP header
+    #: (7 bytes) and the largest PDU (253 bytes).
+    buffer_size = 260
+
     def handle(self):
+        # Requests are received in a buffer which is reused for all requests
+        # of this connection. The hooks, like process(), get a copy of the
+        # request as bytes, so they may keep it.
+        buffer = bytearray(self.buffer_size)
+        view = memoryview(buffer)
+
+        executor = getattr(self.server, 'executor', None)
+        # Serializes responses sent by threads of the executor and counts
+        # submitted requests which haven't been responded to yet.
+        self._responding = threading.Condition()
+        self._pending = 0
+
         try:
             while True:
                 try:
-                    mbap_header = recv_exactly(self.request.recv, 7)
-                    remaining = self.get_meta_data(mbap_header)['length'] - 1
-                    request_pdu = recv_exactly(self.request.recv, remaining)
+                    recv_exactly_into(self.request.recv_into, view[:7])
+                    remaining = self.get_meta_data(view[:7])['length'] - 1
+
+                    # Length field counts unit id and PDU, which is at most
+                    # 253 bytes. Close connection on invalid lengths instead
+                    # of growing the buffer.
+                    if remaining < 0 or 7 + remaining > len(buffer):
+                        return
+
+                    recv_exactly_into(self.request.recv_into,
+                                      view[7:7 + remaining])
                 except ValueError:
                     return
 
-                response_adu = self.process(mbap_header + request_pdu)
-                self.respond(response_adu)
+                request_adu = view[:7 + remaining].tobytes()
+
+                if frame_log.isEnabledFor(DEBUG):
+                    frame_log.debug('<-- %s - %s.', self.client_address[0],
+                                    hexlify(request_adu).decode())
+
+                if executor is None:
+                    response_adu = self.process(request_adu)
+                    self.respond(response_adu)
+                else:
+                    self.submit(executor, request_adu)
         except:
             log.exception('Error while handling request')
             raise
+        finally:
+            # Send responses of submitted requests before the connection is
+            # closed. A future is done before its response has been sent, so
+            # wait for the responses instead of the futures.
+            with self._responding:
+                while self._pending > 0:
+                    self._responding.wait()
+
+    def submit(self, executor, request_adu):
+        """ Process request ADU on executor and send response when it's done.
+        Responses are sent in the order they're done, which might differ from
+        the order of the requests.
+
+        :param executor: Instance of
+            :class:`umodbus.server.executor.UnitExecutor`.
+        :param request_adu: A bytearray containing the ADU request.
+        :return: Instance of :class:`concurrent.futures.Future`.
+        """
+        unit_id = self.get_meta_data(request_adu)['unit_id']
+
+        with self._responding:
+            self._pending += 1
+
+        try:
+            future = executor.submit(unit_id, self.process, request_adu)
+        except Exception:
+            self._responded()
+            raise
+
+        future.add_done_callback(self._respond_when_done)
+
+        return future
+
+    def _respond_when_done(self, future):
+        """ Send response ADU of processed request. """
+        try:
+            if not future.cancelled():
+                with self._responding:
+                    self.respond(future.result())
+        except Exception:
+            log.exception('Could not respond to request')
+        finally:
+            self._responded()
+
+    def _responded(self):
+        with self._responding:
+            self._pending -= 1
+            self._responding.notify_all()
 
     def process(self, request_adu):
-        """ Process request ADU and return response.
+        """ Process request ADU and return response. The request is recorded
+        by the :attr:`metrics` of the server, if it has any.
 
         :param request_adu: A bytearray containing the ADU request.
         :return: A bytearray containing the response of the ADU request.
         """
+        metrics = getattr(self.server, 'metrics', None)
+
+        if metrics is not None:
+            start = timer()
+
         meta_data = self.get_meta_data(request_adu)
         request_pdu = self.get_request_pdu(request_adu)
 
         response_pdu = self.execute_route(meta_data, request_pdu)
         response_adu = self.create_response_adu(meta_data, response_pdu)
 
+        if metrics is not None:
+            metrics.record_pdus(meta_data['unit_id'], request_pdu,
+                                response_pdu, len(request_adu),
+                                len(response_adu), timer() - start)
+
         return response_adu
 
     def execute_route(self, meta_data, request_pdu):
@@ -103,6 +232,8 @@ class AbstractRequestHandler(BaseRequestHandler):
 
         :param response_adu: A bytearray containing the response of an ADU.
         """
-        log.debug('--> {0} - {1}.'.format(self.client_address[0],
-                  hexlify(response_adu)))
+        if frame_log.isEnabledFor(DEBUG):
+            frame_log.debug('--> %s - %s.', self.client_address[0],
+                            hexlify(response_adu).decode())
+
         self.request.sendall(response_adu)
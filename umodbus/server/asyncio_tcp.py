@@ -0,0 +1,338 @@
+""" Modbus TCP server based on :mod:`asyncio`.
+
+All connections are served by a single event loop, so no thread is needed per
+connected client. Framing of requests and responses is reused from
+:class:`umodbus.server.tcp.RequestHandler`, routes are registered with the
+same :func:`umodbus.server.route` and :func:`umodbus.server.block_route`
+decorators.
+
+Endpoints can be plain functions or coroutine functions. The latter are
+awaited before the response is created.
+
+.. note:: This module requires Python 3.5 or newer.
+
+"""
+import asyncio
+from inspect import isawaitable
+from logging import DEBUG
+from binascii import hexlify
+from types import MethodType
+
+from umodbus import log, frame_log
+from umodbus.route import Map
+from umodbus.metrics import timer
+from umodbus.server import route, block_route
+from umodbus.server.tcp import RequestHandler
+from umodbus.functions import create_function_from_request_pdu
+from umodbus.exceptions import ModbusError, ServerDeviceFailureError
+from umodbus.utils import (get_function_code_from_request_pdu,
+                           pack_exception_pdu)
+
+
+def get_server(server_address, request_handler_class=None):
+    """ Return instance of :class:`Server` with :param:`request_handler_class`
+    bound to it.
+
+    This method also binds a :func:`route` and a :func:`block_route` method
+    to the server instance.
+
+        >>> server = get_server(('localhost', 502))
+        >>> asyncio.get_event_loop().run_until_complete(server.serve_forever())
+
+    :param server_address: Tuple with host and port.
+    :param request_handler_class: (sub)Class of
+        :class:`AsyncRequestHandler`, default is :class:`AsyncRequestHandler`.
+    :return: Instance of :class:`Server`.
+    """
+    if request_handler_class is None:
+        request_handler_class = AsyncRequestHandler
+
+    s = Server(server_address, request_handler_class)
+
+    s.route_map = Map()
+    s.route = MethodType(route, s)
+    s.block_route = MethodType(block_route, s)
+
+    return s
+
+
+class Server(object):
+    """ Modbus TCP server which handles all connections in a single event
+    loop.
+
+    :param server_address: Tuple with host and port.
+    :param request_handler_class: (sub)Class of
+        :class:`AsyncRequestHandler`.
+    """
+    def __init__(self, server_address, request_handler_class):
+        self.server_address = server_address
+        self.request_handler_class = request_handler_class
+
+        self._server = None
+        self._shutdown_request = None
+        # Map writers of open connections to a future which is done when the
+        # connection has been handled.
+        self._connections = {}
+
+    @property
+    def sockets(self):
+        """ List with listening sockets, empty if server isn't started. """
+        if self._server is None:
+            return []
+
+        return self._server.sockets
+
+    async def start(self):
+        """ Start listening for connections. """
+        host, port = self.server_address
+        self._server = await asyncio.start_server(self.handle_connection,
+                                                  host, port)
+        self._shutdown_request = asyncio.get_event_loop().create_future()
+
+    async def serve_forever(self):
+        """ Start server, if not started yet, and handle connections until
+        :meth:`shutdown` is called.
+        """
+        if self._server is None:
+            await self.start()
+
+        try:
+            await self._shutdown_request
+        finally:
+            await self.server_close()
+
+    def shutdown(self):
+        """ Stop :meth:`serve_forever`. """
+        if self._shutdown_request is not None and \
+                not self._shutdown_request.done():
+            self._shutdown_request.set_result(None)
+
+    async def server_close(self):
+        """ Stop listening and close all connections. """
+        if self._server is None:
+            return
+
+        self._server.close()
+
+        connections = list(self._connections.items())
+        for writer, _ in connections:
+            writer.close()
+
+        for _, handled in connections:
+            await handled
+
+        await self._server.wait_closed()
+        self._server = None
+
+    async def handle_connection(self, reader, writer):
+        """ Handle requests of a connection until the client disconnects.
+
+        :param reader: Instance of :class:`asyncio.StreamReader`.
+        :param writer: Instance of :class:`asyncio.StreamWriter`.
+        """
+        handled = asyncio.get_event_loop().create_future()
+        self._connections[writer] = handled
+
+        try:
+            handler = self.request_handler_class(reader, writer, self)
+            await handler.handle()
+        except Exception:
+            log.exception('Error while handling request')
+        finally:
+            del self._connections[writer]
+            writer.close()
+            handled.set_result(None)
+
+
+class AsyncRequestHandler(RequestHandler):
+    """ A subclass of :class:`umodbus.server.tcp.RequestHandler` which reads
+    requests from and writes responses to :mod:`asyncio` streams.
+
+    Unlike :class:`socketserver.BaseRequestHandler` an instance doesn't
+    handle requests on creation, :meth:`handle` must be awaited instead.
+    """
+    def __init__(self, reader, writer, server):
+        self.reader = reader
+        self.writer = writer
+        self.server = server
+        self.client_address = writer.get_extra_info('peername')
+
+    async def handle(self):
+        while True:
+            try:
+                mbap_header = await self.reader.readexactly(7)
+                remaining = self.get_meta_data(mbap_header)['length'] - 1
+                request_pdu = await self.reader.readexactly(remaining)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return
+
+            if frame_log.isEnabledFor(DEBUG):
+                frame_log.debug('<-- %s - %s.', self.client_address[0],
+                                hexlify(mbap_header + request_pdu).decode())
+
+            response_adu = await self.process(mbap_header + request_pdu)
+            self.respond(response_adu)
+            await self.writer.drain()
+
+    async def process(self, request_adu):
+        """ Process request ADU and return response. The request is recorded
+        by the :attr:`metrics` of the server, if it has any.
+
+        :param request_adu: A bytearray containing the ADU request.
+        :return: A bytearray containing the response of the ADU request.
+        """
+        metrics = getattr(self.server, 'metrics', None)
+
+        if metrics is not None:
+            start = timer()
+
+        meta_data = self.get_meta_data(request_adu)
+        request_pdu = self.get_request_pdu(request_adu)
+
+        response_pdu = await self.execute_route(meta_data, request_pdu)
+        response_adu = self.create_response_adu(meta_data, response_pdu)
+
+        if metrics is not None:
+            metrics.record_pdus(meta_data['unit_id'], request_pdu,
+                                response_pdu, len(request_adu),
+                                len(response_adu), timer() - start)
+
+        return response_adu
+
+    async def execute_route(self, meta_data, request_pdu):
+        """ Execute configured route based on requests meta data and request
+        PDU. Results of endpoints which are coroutines are awaited.
+
+        :param meta_data: A dict with meta data. It must at least contain
+            key 'unit_id'.
+        :param request_pdu: A bytearray containing request PDU.
+        :return: A bytearry containing reponse PDU.
+        """
+        try:
+            function = create_function_from_request_pdu(request_pdu)
+            route_map = AwaitingRouteMap(self.server.route_map)
+
+            try:
+                results = function.execute(meta_data['unit_id'], route_map)
+            except Exception:
+                route_map.close()
+                raise
+
+            results = await route_map.resolve(results)
+
+            try:
+                # ReadFunction's use results of callbacks to build response
+                # PDU...
+                return function.create_response_pdu(results)
+            except TypeError:
+                # ...other functions don't.
+                return function.create_response_pdu()
+        except ModbusError as e:
+            function_code = get_function_code_from_request_pdu(request_pdu)
+            return pack_exception_pdu(function_code, e.error_code)
+        except Exception:
+            log.exception('Could not handle request')
+            function_code = get_function_code_from_request_pdu(request_pdu)
+
+            return pack_exception_pdu(function_code,
+                                      ServerDeviceFailureError.error_code)
+
+    def respond(self, response_adu):
+        """ Send response ADU back to client.
+
+        :param response_adu: A bytearray containing the response of an ADU.
+        """
+        if frame_log.isEnabledFor(DEBUG):
+            frame_log.debug('--> %s - %s.', self.client_address[0],
+                            hexlify(response_adu).decode())
+
+        self.writer.write(response_adu)
+
+
+class _Pending(object):
+    """ Placeholder for the result of an endpoint which returned an
+    awaitable.
+
+    A block endpoint for a read request must return `quantity` values. The
+    placeholder claims to have that length, the actual length is checked once
+    the awaitable has been resolved.
+    """
+    def __init__(self, awaitable, quantity=None):
+        self.awaitable = awaitable
+        self.quantity = quantity
+        self.value = None
+
+    def __len__(self):
+        return self.quantity
+
+
+class AwaitingRouteMap(object):
+    """ Wrapper around :class:`umodbus.route.Map` for executing a single
+    request. Endpoints returning an awaitable are replaced by a placeholder,
+    :meth:`resolve` awaits them in the order the endpoints were called.
+
+    :param route_map: Instance of :class:`umodbus.route.Map`.
+    """
+    def __init__(self, route_map):
+        self.route_map = route_map
+        self.pending = []
+
+    def match(self, slave_id, function_code, address):
+        return self._wrap(self.route_map.match(slave_id, function_code,
+                                               address))
+
+    def match_block(self, slave_id, function_code, starting_address,
+                    quantity):
+        return self._wrap(self.route_map.match_block(
+            slave_id, function_code, starting_address, quantity))
+
+    def _wrap(self, endpoint):
+        if endpoint is None:
+            return None
+
+        def call(**kwargs):
+            result = endpoint(**kwargs)
+
+            if isawaitable(result):
+                result = _Pending(result, kwargs.get('quantity'))
+                self.pending.append(result)
+
+            return result
+
+        return call
+
+    def close(self):
+        """ Close coroutines of endpoints which haven't been awaited. """
+        for placeholder in self.pending:
+            if asyncio.iscoroutine(placeholder.awaitable):
+                placeholder.awaitable.close()
+
+        self.pending = []
+
+    async def resolve(self, results):
+        """ Await all pending results and return results with placeholders
+        replaced by the actual values.
+
+        :param results: Return value of `ModbusFunction.execute()`.
+        :return: Results without placeholders.
+        :raises ServerDeviceFailureError: When block endpoint of read request
+            doesn't resolve to the requested number of values.
+        """
+        try:
+            while self.pending:
+                placeholder = self.pending.pop(0)
+                placeholder.value = await placeholder.awaitable
+        finally:
+            self.close()
+
+        if isinstance(results, _Pending):
+            if len(results.value) != results.quantity:
+                raise ServerDeviceFailureError()
+
+            return results.value
+
+        if isinstance(results, list):
+            return [r.value if isinstance(r, _Pending) else r
+                    for r in results]
+
+        return results
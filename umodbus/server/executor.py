@@ -0,0 +1,116 @@
+""" Run endpoints on a pool of threads, serially per unit.
+
+By default a server calls endpoints on the thread which receives the
+requests. An endpoint which waits for a database or another bus stalls all
+following requests of the connection or serial line, also those for other
+units.
+
+:class:`UnitExecutor` runs calls on a :class:`concurrent.futures.Executor`.
+Calls for the same unit id are queued and run one after the other in the
+order they have been submitted, calls for different units run concurrently::
+
+    >>> from concurrent.futures import ThreadPoolExecutor
+    >>> executor = UnitExecutor(ThreadPoolExecutor(max_workers=8))
+    >>> future = executor.submit(1, read_from_database, 'holding_registers')
+
+.. note:: This module requires :mod:`concurrent.futures`, which on Python 2
+    is provided by the `futures` package.
+
+"""
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+
+class UnitExecutor(object):
+    """ Run calls on an executor, serially per unit id.
+
+    :param executor: Instance of :class:`concurrent.futures.Executor`, like
+        :class:`concurrent.futures.ThreadPoolExecutor`.
+    """
+    def __init__(self, executor):
+        self.executor = executor
+
+        self._lock = threading.Lock()
+        # Map unit id to queue with calls waiting for the running call of that
+        # unit. A unit has a queue as long as a call of it is running.
+        self._queues = {}
+
+    def submit(self, unit_id, fn, *args, **kwargs):
+        """ Schedule `fn(*args, **kwargs)` to run after all calls submitted
+        earlier for the same unit id.
+
+        :param unit_id: Unit id.
+        :param fn: Callable.
+        :return: Instance of :class:`concurrent.futures.Future`.
+        """
+        call = (unit_id, fn, args, kwargs, Future())
+
+        with self._lock:
+            queue = self._queues.get(unit_id)
+
+            if queue is not None:
+                queue.append(call)
+                return call[-1]
+
+            self._queues[unit_id] = deque()
+
+        try:
+            self.executor.submit(self._run, *call)
+        except Exception:
+            with self._lock:
+                self._queues.pop(unit_id, None)
+            raise
+
+        return call[-1]
+
+    def _run(self, unit_id, fn, args, kwargs, future):
+        """ Run call and submit next call of unit, if any. """
+        if future.set_running_or_notify_cancel():
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+        with self._lock:
+            queue = self._queues.get(unit_id)
+
+            if not queue:
+                # Queue is empty, or it has been removed by shutdown().
+                self._queues.pop(unit_id, None)
+                return
+
+            call = queue.popleft()
+
+        try:
+            # Submit next call instead of running it in this thread, so a
+            # unit with a long queue doesn't keep a worker from other units.
+            self.executor.submit(self._run, *call)
+        except Exception as e:
+            # For example because executor has been shut down. Fail all
+            # queued calls of unit, so later calls of it aren't queued behind
+            # a call which never runs.
+            with self._lock:
+                if self._queues.get(unit_id) is queue:
+                    del self._queues[unit_id]
+
+            for _, _, _, _, f in [call] + list(queue):
+                if f.set_running_or_notify_cancel():
+                    f.set_exception(e)
+
+    def shutdown(self, wait=True):
+        """ Cancel queued calls and shutdown executor.
+
+        :param wait: Whether to wait until all running calls are done.
+        """
+        with self._lock:
+            queues = list(self._queues.values())
+            self._queues = {}
+
+        for queue in queues:
+            for call in queue:
+                call[-1].cancel()
+
+        self.executor.shutdown(wait)
@@ -0,0 +1,267 @@
+""" Modbus TCP server which handles requests in multiple processes.
+
+A single :class:`socketserver.TCPServer` handles all requests in one process,
+so it can use only one CPU core. :class:`PreforkServer` forks a number of
+worker processes which accept connections on the same port. Each worker
+serves its connections with its own :class:`socketserver.ThreadingTCPServer`.
+
+Routes are registered on the :class:`PreforkServer` before it's started. The
+workers are forked afterwards and inherit the route map::
+
+    >>> server = get_server(('localhost', 502), workers=4)
+    >>> @server.route(slave_ids=[1], function_codes=[3], addresses=[0])
+    ... def read_register(slave_id, function_code, address):
+    ...     return 1337
+    >>> server.serve_forever()
+
+Every worker has its own copy of the memory of the parent process. A value
+written by an endpoint in 1 worker isn't visible in other workers. Use
+:class:`umodbus.datastore.SharedDataStore` to share values between workers.
+
+.. note:: This module requires an OS which supports :func:`os.fork`.
+
+"""
+import socket
+import threading
+import multiprocessing
+from types import MethodType
+try:
+    from socketserver import ThreadingTCPServer
+except ImportError:
+    from SocketServer import ThreadingTCPServer
+
+from umodbus import log
+from umodbus.route import Map
+from umodbus.server import route, block_route
+from umodbus.server.tcp import RequestHandler
+
+try:
+    # Routes are inherited by forking, they can't be pickled.
+    _context = multiprocessing.get_context('fork')
+except AttributeError:
+    # Python 2 has no contexts, it always forks.
+    _context = multiprocessing
+
+
+def get_server(server_address, request_handler_class=None, workers=None,
+               **kwargs):
+    """ Return instance of :class:`PreforkServer` with
+    :param:`request_handler_class` bound to it.
+
+    This method also binds a :func:`route` and a :func:`block_route` method
+    to the server instance.
+
+        >>> server = get_server(('localhost', 502), workers=4)
+        >>> server.serve_forever()
+
+    :param server_address: Tuple with host and port.
+    :param request_handler_class: (sub)Class of
+        :class:`umodbus.server.tcp.RequestHandler`, default is
+        :class:`umodbus.server.tcp.RequestHandler`.
+    :param workers: Number of worker processes, default is number of CPU's.
+    :param kwargs: Other keyword arguments are passed to
+        :class:`PreforkServer`.
+    :return: Instance of :class:`PreforkServer`.
+    """
+    if request_handler_class is None:
+        request_handler_class = RequestHandler
+
+    s = PreforkServer(server_address, request_handler_class, workers,
+                      **kwargs)
+
+    s.route_map = Map()
+    s.route = MethodType(route, s)
+    s.block_route = MethodType(block_route, s)
+
+    return s
+
+
+class PreforkServer(object):
+    """ Modbus TCP server which forks worker processes to handle requests.
+
+    With `reuse_port` every worker binds its own socket using the socket
+    option `SO_REUSEPORT`. The kernel distributes connections evenly over the
+    workers. Otherwise the workers accept connections on a single listening
+    socket which is created before the workers are forked.
+
+    :param server_address: Tuple with host and port.
+    :param request_handler_class: (sub)Class of
+        :class:`umodbus.server.tcp.RequestHandler`.
+    :param workers: Number of worker processes, default is number of CPU's.
+    :param server_class: (sub)Class of :class:`socketserver.TCPServer` each
+        worker serves its connections with, default is
+        :class:`socketserver.ThreadingTCPServer`.
+    :param reuse_port: Whether workers bind their own socket using
+        `SO_REUSEPORT`. Default is True on platforms which support it.
+    """
+    def __init__(self, server_address, request_handler_class, workers=None,
+                 server_class=ThreadingTCPServer, reuse_port=None):
+        if reuse_port is None:
+            reuse_port = hasattr(socket, 'SO_REUSEPORT')
+
+        self.server_address = server_address
+        self.request_handler_class = request_handler_class
+        self.workers = workers or multiprocessing.cpu_count()
+        self.server_class = server_class
+        self.reuse_port = reuse_port
+
+        self.socket = None
+        self.processes = []
+
+        self._shutdown_request = _context.Event()
+        # Number of connections and requests handled, 2 counters per worker.
+        self._counters = _context.RawArray('L', 2 * self.workers)
+
+    def start(self):
+        """ Bind socket and fork workers. """
+        self.socket = socket.socket(self.server_class.address_family,
+                                    socket.SOCK_STREAM)
+
+        if self.reuse_port:
+            # The socket of the parent process isn't listening, so it doesn't
+            # receive connections. It reserves the address, which also
+            # resolves port 0 to a free port, until the server is closed.
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        elif self.server_class.allow_reuse_address:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+        self.socket.bind(self.server_address)
+        self.server_address = self.socket.getsockname()
+
+        if not self.reuse_port:
+            self.socket.listen(self.server_class.request_queue_size)
+            # All workers are notified of a new connection, but only 1 of them
+            # accepts it. The others must not block in accept().
+            self.socket.setblocking(False)
+
+        for index in range(self.workers):
+            process = _context.Process(target=self._run_worker, args=(index,),
+                                       name='uModbus worker {0}'.format(index))
+            process.daemon = True
+            process.start()
+            self.processes.append(process)
+
+    def serve_forever(self, poll_interval=0.5):
+        """ Start server, if not started yet, and wait until :meth:`shutdown`
+        is called.
+
+        :param poll_interval: Interval in seconds to check for a shutdown
+            request and for workers which have exited.
+        """
+        if not self.processes:
+            self.start()
+
+        while not self._shutdown_request.wait(poll_interval):
+            alive = []
+
+            for process in self.processes:
+                if process.is_alive():
+                    alive.append(process)
+                else:
+                    log.error('Worker {0} exited unexpectedly with code '
+                              '{1}.'.format(process.pid, process.exitcode))
+
+            self.processes = alive
+
+    def shutdown(self, timeout=5):
+        """ Stop all workers. Workers stop accepting connections and close
+        their open connections.
+
+        :param timeout: Seconds to wait for a worker to stop, before it's
+            terminated.
+        """
+        self._shutdown_request.set()
+
+        for process in self.processes:
+            process.join(timeout)
+
+            if process.is_alive():
+                log.warning('Terminate worker {0}.'.format(process.pid))
+                process.terminate()
+                process.join()
+
+        self.processes = []
+
+    def server_close(self):
+        """ Close socket of parent process. """
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+    def stats(self):
+        """ Return number of connections and requests handled by all workers.
+
+        :return: Dict with keys 'connections', 'requests' and 'workers'. The
+            latter contains a list with a dict with both counters per worker.
+        """
+        workers = [{'connections': self._counters[2 * i],
+                    'requests': self._counters[2 * i + 1]}
+                   for i in range(self.workers)]
+
+        return {
+            'connections': sum(w['connections'] for w in workers),
+            'requests': sum(w['requests'] for w in workers),
+            'workers': workers,
+        }
+
+    def _run_worker(self, index):
+        """ Serve connections until shutdown is requested. Runs in worker
+        process.
+
+        :param index: Index of worker.
+        """
+        server = self.server_class(self.server_address,
+                                   self._create_handler_class(index),
+                                   bind_and_activate=False)
+        server.route_map = self.route_map
+        # Connections are kept open by clients, don't wait for them when the
+        # worker stops.
+        server.daemon_threads = True
+        server.block_on_close = False
+
+        if self.reuse_port:
+            server.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            server.server_bind()
+            server.server_activate()
+            self.socket.close()
+        else:
+            server.socket.close()
+            server.socket = self.socket
+
+        def wait_for_shutdown():
+            self._shutdown_request.wait()
+            server.shutdown()
+
+        t = threading.Thread(target=wait_for_shutdown)
+        t.daemon = True
+        t.start()
+
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+
+    def _create_handler_class(self, index):
+        """ Return subclass of request handler class which counts the
+        connections and requests of a worker.
+
+        :param index: Index of worker.
+        """
+        counters = self._counters
+        lock = threading.Lock()
+
+        class CountingRequestHandler(self.request_handler_class):
+            def setup(self):
+                with lock:
+                    counters[2 * index] += 1
+
+                super(CountingRequestHandler, self).setup()
+
+            def process(self, request_adu):
+                with lock:
+                    counters[2 * index + 1] += 1
+
+                return super(CountingRequestHandler, self).process(
+                    request_adu)
+
+        return CountingRequestHandler
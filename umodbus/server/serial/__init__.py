@@ -1,11 +1,14 @@
 import struct
+import threading
+from logging import DEBUG
 from binascii import hexlify
 from types import MethodType
 from serial import SerialTimeoutException
 
-from umodbus import log
+from umodbus import log, frame_log
 from umodbus.route import Map
-from umodbus.server import route
+from umodbus.metrics import timer
+from umodbus.server import route, block_route
 from umodbus.functions import create_function_from_request_pdu
 from umodbus.exceptions import ModbusError, ServerDeviceFailureError
 from umodbus.utils import (get_function_code_from_request_pdu,
@@ -13,15 +16,20 @@ from umodbus.utils import (get_function_code_from_request_pdu,
 from umodbus.client.serial.redundancy_check import CRCError
 
 
-def get_server(server_class, serial_port):
+def get_server(server_class, serial_port, executor=None):
     """ Return instance of :param:`server_class` with :param:`request_handler`
     bound to it.
-    This method also binds a :func:`route` method to the server instance.
+    This method also binds a :func:`route` and a :func:`block_route` method
+    to the server instance.
         >>> server = get_server(TcpServer, ('localhost', 502), RequestHandler)
         >>> server.serve_forever()
     :param server_class: (sub)Class of :class:`socketserver.BaseServer`.
     :param request_handler_class: (sub)Class of
         :class:`umodbus.server.RequestHandler`.
+    :param executor: Instance of :class:`concurrent.futures.Executor` to call
+        endpoints on, serially per unit id. It's shut down when
+        :meth:`AbstractSerialServer.serve_forever` returns. Default is None,
+        which calls endpoints on the thread reading the serial port.
     :return: Instance of :param:`server_class`.
     """
     s = server_class()
@@ -29,6 +37,11 @@ def get_server(server_class, serial_port):
 
     s.route_map = Map()
     s.route = MethodType(route, s)
+    s.block_route = MethodType(block_route, s)
+
+    if executor is not None:
+        from umodbus.server.executor import UnitExecutor
+        s.executor = UnitExecutor(executor)
 
     return s
 
@@ -36,6 +49,17 @@ def get_server(server_class, serial_port):
 class AbstractSerialServer(object):
     _shutdown_request = False
 
+    #: Instance of :class:`umodbus.server.executor.UnitExecutor` to process
+    #: requests on, or None to process requests on the thread reading the
+    #: serial port.
+    executor = None
+
+    #: Instance of :class:`umodbus.metrics.Metrics` which records every
+    #: request, or None.
+    metrics = None
+
+    _respond_lock = None
+
     def get_meta_data(self, request_adu):
         """" Extract MBAP header from request adu and return it. The dict has
         4 keys: transaction_id, protocol_id, length and unit_id.
@@ -60,29 +84,48 @@ class AbstractSerialServer(object):
         raise NotImplementedError
 
     def serve_forever(self, poll_interval=0.5):
-        """ Wait for incomming requests. """
+        """ Wait for incomming requests. The :attr:`executor` is shut down
+        when this method returns.
+        """
         self.serial_port.timeout = poll_interval
 
-        while not self._shutdown_request:
-            try:
-                self.serve_once()
-            except (CRCError, struct.error) as e:
-                log.error('Can\'t handle request: {0}'.format(e))
-            except (SerialTimeoutException, ValueError):
-                pass
+        try:
+            while not self._shutdown_request:
+                try:
+                    self.serve_once()
+                except (CRCError, struct.error) as e:
+                    log.error('Can\'t handle request: {0}'.format(e))
+                except (SerialTimeoutException, ValueError):
+                    pass
+        finally:
+            if self.executor is not None:
+                # Wait for requests being processed, so their responses are
+                # sent.
+                self.executor.shutdown()
 
     def process(self, request_adu):
-        """ Process request ADU and return response.
+        """ Process request ADU and return response. The request is recorded
+        by :attr:`metrics`, if set.
 
         :param request_adu: A bytearray containing the ADU request.
         :return: A bytearray containing the response of the ADU request.
         """
+        metrics = self.metrics
+
+        if metrics is not None:
+            start = timer()
+
         meta_data = self.get_meta_data(request_adu)
         request_pdu = self.get_request_pdu(request_adu)
 
         response_pdu = self.execute_route(meta_data, request_pdu)
         response_adu = self.create_response_adu(meta_data, response_pdu)
 
+        if metrics is not None:
+            metrics.record_pdus(meta_data['unit_id'], request_pdu,
+                                response_pdu, len(request_adu),
+                                len(response_adu), timer() - start)
+
         return response_adu
 
     def execute_route(self, meta_data, request_pdu):
@@ -116,12 +159,44 @@ class AbstractSerialServer(object):
             return pack_exception_pdu(function_code,
                                       ServerDeviceFailureError.error_code)
 
+    def submit(self, request_adu):
+        """ Process request ADU on :attr:`executor` and send response when
+        it's done. Responses are sent in the order they're done, which might
+        differ from the order of the requests.
+
+        :param request_adu: A bytearray containing the ADU request.
+        :return: Instance of :class:`concurrent.futures.Future`.
+        """
+        if self._respond_lock is None:
+            # Responses are written by the threads of the executor.
+            self._respond_lock = threading.Lock()
+
+        unit_id = self.get_meta_data(request_adu)['unit_id']
+
+        future = self.executor.submit(unit_id, self.process, request_adu)
+        future.add_done_callback(self._respond_when_done)
+
+        return future
+
+    def _respond_when_done(self, future):
+        """ Send response ADU of processed request. """
+        if future.cancelled():
+            return
+
+        try:
+            with self._respond_lock:
+                self.respond(future.result())
+        except Exception:
+            log.exception('Could not respond to request')
+
     def respond(self, response_adu):
         """ Send response ADU back to client.
 
         :param response_adu: A bytearray containing the response of an ADU.
         """
-        log.debug('--> {0}'.format(hexlify(response_adu)))
+        if frame_log.isEnabledFor(DEBUG):
+            frame_log.debug('--> %s', hexlify(response_adu).decode())
+
         self.serial_port.write(response_adu)
 
     def shutdown(self):
@@ -1,33 +1,69 @@
 from __future__ import division
 import struct
+from logging import DEBUG
 from binascii import hexlify
 
-from umodbus import log
+from umodbus import frame_log
 from umodbus.server.serial import AbstractSerialServer
-from umodbus.client.serial.redundancy_check import get_crc, validate_crc
-
+from umodbus.functions import (READ_COILS, READ_DISCRETE_INPUTS,
+                               READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS,
+                               WRITE_SINGLE_COIL, WRITE_SINGLE_REGISTER,
+                               WRITE_MULTIPLE_COILS, WRITE_MULTIPLE_REGISTERS)
+from umodbus.client.serial.redundancy_check import (validate_crc, pack_adu,
+                                                    CRCError)
+from umodbus.client.serial.rtu import get_char_size, MAX_ADU_SIZE
+
+# Size of request ADU's with a fixed size: address field (1 byte), function
+# code (1 byte), 2 fields of 2 bytes and CRC (2 bytes).
+function_code_to_request_adu_size = {
+    READ_COILS: 8,
+    READ_DISCRETE_INPUTS: 8,
+    READ_HOLDING_REGISTERS: 8,
+    READ_INPUT_REGISTERS: 8,
+    WRITE_SINGLE_COIL: 8,
+    WRITE_SINGLE_REGISTER: 8,
+}
+
+# The size of these request ADU's depends on the byte count, which is the 7th
+# byte of the ADU. It's followed by byte count bytes and the CRC.
+variable_size_function_codes = [
+    WRITE_MULTIPLE_COILS,
+    WRITE_MULTIPLE_REGISTERS,
+]
+
+
+def get_request_adu_size(request_adu):
+    """ Return size of request ADU based on the first bytes of the ADU.
+
+    The size of some requests depends on a byte count field. If not enough
+    bytes have been received to read that field, the number of bytes required
+    to read it is returned. Call this function again when those bytes have
+    arrived.
+
+        >>> get_request_adu_size(b'\\x01\\x10')
+        7
+        >>> get_request_adu_size(b'\\x01\\x10\\x00\\x00\\x00\\x01\\x02')
+        11
+
+    :param request_adu: First bytes of request ADU, at least 2.
+    :return: Number of bytes, or None if size can't be determined because
+        function code is unknown.
+    """
+    function_code = struct.unpack('>B', request_adu[1:2])[0]
 
-def get_char_size(baudrate):
-    """ Get the size of 1 character in seconds.
+    try:
+        return function_code_to_request_adu_size[function_code]
+    except KeyError:
+        pass
 
-    From the implementation guide:
+    if function_code not in variable_size_function_codes:
+        return None
 
-        "The implementation of RTU reception driver may imply the management of
-        a lot of interruptions due to the t 1.5  and t 3.5  timers. With high
+    if len(request_adu) < 7:
+        return 7
 
-        communication baud rates, this leads to a heavy CPU load. Consequently
-        these two timers must be strictly respected when the baud rate is equal
-        or lower than 19200 Bps. For baud rates greater than 19200 Bps, fixed
-        values for the 2 timers should be used:  it is recommended to use a
-        value of 750us for the inter-character time-out (t 1.5) and a value of
-        1.750ms for inter-frame delay (t 3.5)."
-    """
-    if baudrate <= 19200:
-        # One frame is 11 bits.
-        return 11 / baudrate
-
-    # 750 us / 1.5 = 500 us or 0.0005 s.
-    return 0.0005
+    byte_count = struct.unpack('>B', request_adu[6:7])[0]
+    return min(9 + byte_count, MAX_ADU_SIZE)
 
 
 class RTUServer(AbstractSerialServer):
@@ -47,16 +83,85 @@ class RTUServer(AbstractSerialServer):
 
     def serve_once(self):
         """ Listen and handle 1 request. """
-        # 256 is the maximum size of a Modbus RTU frame.
-        request_adu = self.serial_port.read(256)
-        log.debug('<-- {0}'.format(hexlify(request_adu)))
+        request_adu = self.read_request_adu()
+
+        if frame_log.isEnabledFor(DEBUG):
+            frame_log.debug('<-- %s', hexlify(request_adu).decode())
 
         if len(request_adu) == 0:
             raise ValueError
 
-        response_adu = self.process(request_adu)
+        if self.executor is not None:
+            # Validate CRC before the request is handed over, so the server
+            # can resynchronize on this thread. process() validates it again,
+            # which is cheap compared to the endpoints it calls.
+            try:
+                validate_crc(request_adu)
+            except CRCError:
+                self.resynchronize()
+                raise
+
+            self.submit(request_adu)
+            return
+
+        try:
+            response_adu = self.process(request_adu)
+        except CRCError:
+            self.resynchronize()
+            raise
+
         self.respond(response_adu)
 
+    def read_request_adu(self):
+        """ Read 1 request ADU from serial port and return it.
+
+        The size of the request is derived from the function code and, if
+        present, the byte count of the request. So a request is returned as
+        soon as it has been received, without waiting for the inter-frame
+        delay. Only requests with an unknown function code are read until the
+        serial port times out.
+
+        :return: Bytes with request ADU, might be incomplete or empty if serial
+            port timed out.
+        """
+        request_adu = self.serial_port.read(2)
+
+        if len(request_adu) < 2:
+            return request_adu
+
+        size = get_request_adu_size(request_adu)
+
+        while size is not None and len(request_adu) < size:
+            remainder = self.serial_port.read(size - len(request_adu))
+
+            if len(remainder) == 0:
+                # Incomplete frame, it will fail the CRC check.
+                return request_adu
+
+            request_adu += remainder
+            size = get_request_adu_size(request_adu)
+
+        if size is None:
+            request_adu += self.serial_port.read(MAX_ADU_SIZE - 2)
+
+        return request_adu
+
+    def resynchronize(self):
+        """ Discard received bytes until the line has been silent for the
+        inter-frame delay, so the next read starts at the start of a frame.
+        """
+        # serve_forever() sets the timeout to its poll interval, which is
+        # much longer than the inter-frame delay.
+        timeout = self.serial_port.timeout
+        self.serial_port.timeout = \
+            3.5 * get_char_size(self.serial_port.baudrate)
+
+        try:
+            while len(self.serial_port.read(MAX_ADU_SIZE)) > 0:
+                pass
+        finally:
+            self.serial_port.timeout = timeout
+
     def process(self, request_adu):
         """ Process request ADU and return response.
 
@@ -73,5 +178,4 @@ class RTUServer(AbstractSerialServer):
         :param request_pdu: A bytearray containing request PDU.
         :return: A bytearray containing request ADU.
         """
-        first_part_adu = struct.pack('>B', meta_data['unit_id']) + response_pdu
-        return first_part_adu + get_crc(first_part_adu)
+        return pack_adu(meta_data['unit_id'], response_pdu)
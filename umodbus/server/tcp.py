@@ -2,26 +2,41 @@ import struct
 from types import MethodType
 
 from umodbus.route import Map
-from umodbus.server import AbstractRequestHandler, route
-from umodbus.utils import unpack_mbap, pack_mbap
+from umodbus.server import AbstractRequestHandler, route, block_route
+from umodbus.codec import MBAP
+from umodbus.utils import unpack_mbap
 from umodbus.exceptions import ServerDeviceFailureError
 
 
-def get_server(server_class, server_address, request_handler_class):
+def get_server(server_class, server_address, request_handler_class,
+               executor=None):
     """ Return instance of :param:`server_class` with :param:`request_handler`
     bound to it.
-    This method also binds a :func:`route` method to the server instance.
+    This method also binds a :func:`route` and a :func:`block_route` method
+    to the server instance.
         >>> server = get_server(TcpServer, ('localhost', 502), RequestHandler)
         >>> server.serve_forever()
     :param server_class: (sub)Class of :class:`socketserver.BaseServer`.
     :param request_handler_class: (sub)Class of
         :class:`umodbus.server.RequestHandler`.
+    :param executor: Instance of :class:`concurrent.futures.Executor` to call
+        endpoints on, serially per unit id. Default is None, which calls
+        endpoints on the thread of the connection.
     :return: Instance of :param:`server_class`.
     """
     s = server_class(server_address, request_handler_class)
 
     s.route_map = Map()
     s.route = MethodType(route, s)
+    s.block_route = MethodType(block_route, s)
+
+    s.executor = None
+    # Assign an instance of umodbus.metrics.Metrics to record requests.
+    s.metrics = None
+
+    if executor is not None:
+        from umodbus.server.executor import UnitExecutor
+        s.executor = UnitExecutor(executor)
 
     return s
 
@@ -66,11 +81,8 @@ class RequestHandler(AbstractRequestHandler):
         :param request_pdu: A bytearray containing request PDU.
         :return: A bytearray containing request ADU.
         """
-        response_mbap = pack_mbap(
-            transaction_id=meta_data['transaction_id'],
-            protocol_id=meta_data['protocol_id'],
-            length=len(response_pdu) + 1,
-            unit_id=meta_data['unit_id']
-        )
-
-        return response_mbap + response_pdu
+        # Packing header and PDU into a preallocated bytearray using
+        # Struct.pack_into() has been measured to be slower than this.
+        return MBAP.pack(meta_data['transaction_id'],
+                         meta_data['protocol_id'], len(response_pdu) + 1,
+                         meta_data['unit_id']) + response_pdu
@@ -1,10 +1,13 @@
 import sys
 import struct
 import logging
+from threading import Lock
+from collections import OrderedDict
 from logging import StreamHandler, Formatter
 from functools import wraps
 
-from umodbus import log
+from umodbus import log, frame_log
+from umodbus.codec import MBAP
 
 
 def log_to_stream(stream=sys.stderr, level=logging.NOTSET,
@@ -23,6 +26,22 @@ def log_to_stream(stream=sys.stderr, level=logging.NOTSET,
     log.addHandler(handler)
 
 
+def trace_frames(enabled=True):
+    """ Switch logging of frames received and sent by servers on or off. It
+    can be called at any time, also while a server is running.
+
+    Frames are logged as hex dumps at level DEBUG by logger 'uModbus.frames',
+    a child of logger 'uModbus'. By default it logs frames when logger
+    'uModbus' has level DEBUG. Frames aren't formatted at all if they aren't
+    logged.
+
+    :param enabled: True to log frames, even if logger 'uModbus' has a higher
+        level, False to not log frames, even if logger 'uModbus' has level
+        DEBUG. Default True.
+    """
+    frame_log.setLevel(logging.DEBUG if enabled else logging.INFO)
+
+
 def unpack_mbap(mbap):
     """ Parse MBAP of 7 bytes and return tuple with fields.
 
@@ -39,7 +58,7 @@ def unpack_mbap(mbap):
 
     # TODO What it right exception to raise? Error code 04, Server failure,
     # seems most appropriate.
-    return struct.unpack('>HHHB', mbap)
+    return MBAP.unpack(mbap)
 
 
 def pack_mbap(transaction_id, protocol_id, length, unit_id):
@@ -51,7 +70,7 @@ def pack_mbap(transaction_id, protocol_id, length, unit_id):
     :param unit_id: Unit id.
     :return: Byte array of 7 bytes.
     """
-    return struct.pack('>HHHB', transaction_id, protocol_id, length, unit_id)
+    return MBAP.pack(transaction_id, protocol_id, length, unit_id)
 
 
 def pack_exception_pdu(function_code, error_code):
@@ -100,18 +119,146 @@ def get_function_code_from_request_pdu(pdu):
     return struct.unpack('>B', pdu[:1])[0]
 
 
-def memoize(f):
+class Cache(object):
+    """ Bounded mapping used by :func:`memoize`.
+
+    :param maxsize: Maximum number of entries, None for no limit. 0 disables
+        caching.
+    :param policy: Which entry to evict when cache is full: 'lru' evicts
+        least recently used entry, 'fifo' evicts oldest entry.
+    :param cacheable: Function which receives the argument of the memoized
+        function and returns whether its result may be cached. None means
+        every result is cached.
+    """
+    policies = ('lru', 'fifo')
+
+    def __init__(self, maxsize=None, policy='lru', cacheable=None):
+        if policy not in self.policies:
+            raise ValueError('Policy must be one of {0}.'.format(
+                ', '.join(self.policies)))
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self.cacheable = cacheable
+
+        self.hits = 0
+        self.misses = 0
+
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """ Return value for key and count hit or miss. """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+
+            if self.policy == 'lru':
+                # Move entry to end, it's the most recently used now.
+                del self._data[key]
+                self._data[key] = value
+
+            return value
+
+    def set(self, key, value):
+        """ Store value, evicting entries when cache is full. """
+        if self.maxsize == 0:
+            return
+
+        with self._lock:
+            self._data[key] = value
+
+            while self.maxsize is not None and len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """ Remove all entries and reset counters. """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """ Return dict with statistics of cache. """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'policy': self.policy,
+        }
+
+
+def memoize(f=None, maxsize=None, policy='lru', cacheable=None, key=None):
     """ Decorator which caches function's return value each it is called.
     If called later with same arguments, the cached value is returned.
+
+    It can be used with or without arguments::
+
+        @memoize
+        def f(arg):
+            ...
+
+        @memoize(maxsize=128, policy='fifo')
+        def g(arg):
+            ...
+
+    The :class:`Cache` is available as attribute `cache` of the decorated
+    function. Every decorated function has its own cache, its settings can be changed at runtime.
+
+    :param f: Function with 1 hashable argument.
+    :param maxsize: Maximum number of cached values, default None (no limit).
+    :param policy: Eviction policy, 'lru' (default) or 'fifo'.
+    :param cacheable: Function returning whether result for argument may be
+        cached, default None (cache everything).
+    :param key: Function returning the cache key for an argument, default
+        None (argument itself is key). Use it for arguments which aren't
+        hashable.
+    :raises ValueError: When policy is unknown.
     """
-    cache = {}
+    if policy not in Cache.policies:
+        raise ValueError('Policy must be one of {0}.'.format(
+            ', '.join(Cache.policies)))
+
+    missing = object()
+
+    def decorator(f):
+        # Every decorated function has a cache of its own, also when the
+        # decorator is applied to multiple functions.
+        cache = Cache(maxsize, policy, cacheable)
+
+        @wraps(f)
+        def inner(arg):
+            if cache.cacheable is not None and not cache.cacheable(arg):
+                return f(arg)
 
-    @wraps(f)
-    def inner(arg):
-        if arg not in cache:
-            cache[arg] = f(arg)
-        return cache[arg]
-    return inner
+            k = arg if key is None else key(arg)
+            value = cache.get(k, missing)
+
+            if value is missing:
+                value = f(arg)
+                cache.set(k, value)
+
+            return value
+
+        inner.cache = cache
+        return inner
+
+    if f is None:
+        return decorator
+
+    return decorator(f)
 
 
 def recv_exactly(recv_fn, size):
@@ -141,3 +288,37 @@ def recv_exactly(recv_fn, size):
         raise ValueError
 
     return response
+
+
+def recv_exactly_into(recv_into_fn, buffer):
+    """ Use the function to fill buffer completely. Unlike
+    :func:`recv_exactly` no new bytes object is created.
+
+    :param recv_into_fn: Function that receives up to len(buffer) bytes in a
+        buffer and returns number of bytes received (i.e. socket.recv_into).
+    :param buffer: Writable :class:`memoryview` to fill.
+    :raises ValueError: Could not receive enough data (usually timeout).
+    """
+    size = len(buffer)
+    received = 0
+
+    while received < size:
+        count = recv_into_fn(buffer[received:])
+
+        if count == 0:  # when closed or empty
+            raise ValueError
+
+        received += count
+
+
+def to_bytes(data):
+    """ Return copy of bytes-like object as bytes, for example to use it as
+    key of a dict.
+
+    :param data: Bytes, bytearray or memoryview.
+    :return: Bytes.
+    """
+    if isinstance(data, memoryview):
+        return data.tobytes()
+
+    return bytes(data)